@@ -0,0 +1,47 @@
+"""
+Benchmark: biaya ingest per pesan untuk 1..500 device
+Jalankan: python -m benchmarks.bench_fleet
+"""
+import json
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from core import IoTClient
+
+N_MESSAGES = 50_000
+
+
+def make_messages(n_devices):
+    payload = json.dumps({"temp": 45.0, "volt": 12.0, "curr": 1.2, "relay": True}).encode()
+    return [SimpleNamespace(topic=f"smartamp/amp{i % n_devices:03d}/data", payload=payload)
+            for i in range(N_MESSAGES)]
+
+
+def run(n_devices):
+    msgs = make_messages(n_devices)
+    client = IoTClient()
+    t0 = time.perf_counter()
+    for msg in msgs:
+        client.on_message(None, None, msg)
+    elapsed = time.perf_counter() - t0
+
+    # Ukur memori terpisah, tracemalloc memperlambat timing
+    client = IoTClient()
+    tracemalloc.start()
+    for msg in msgs:
+        client.on_message(None, None, msg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / N_MESSAGES * 1e6, peak / 1024
+
+
+def main():
+    print(f"{'devices':>8} {'us/msg':>10} {'peak KiB':>10}")
+    for n in (1, 10, 100, 500):
+        us, kib = run(n)
+        print(f"{n:>8} {us:>10.2f} {kib:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
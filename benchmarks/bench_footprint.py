@@ -0,0 +1,88 @@
+"""
+Benchmark: CPU / RSS footprint headless vs GUI
+Kedua mode memutar rekaman sintetis yang sama (--replay, kecepatan 1x) selama
+--duration detik, lalu CPU time dan peak RSS child process dibaca lewat os.wait4.
+GUI butuh display; tanpa display hanya headless yang diukur. Unix only.
+
+Jalankan: python -m benchmarks.bench_footprint --duration 20 --rate 50
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from core.recording import REC_DTYPE, write_header
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_recording(path, seconds, rate):
+    n = int(seconds * rate)
+    rec = np.zeros(n, dtype=REC_DTYPE)
+    t0 = time.time()
+    rec["ts"] = t0 + np.arange(n) / rate
+    rec["temp"] = 45 + 5 * np.sin(np.arange(n) / (rate * 10))
+    rec["volt"] = 12.0
+    rec["curr"] = 1.0 + 0.2 * np.sin(np.arange(n) / rate)
+    with open(path, "wb") as f:
+        write_header(f, t0)
+        f.write(rec.tobytes())
+
+
+def run(args, workdir):
+    """Returns: (cpu_seconds, peak_rss_mb, wall_seconds, returncode)"""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")] + args, cwd=workdir,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    rss = usage.ru_maxrss / (1048576.0 if sys.platform == "darwin" else 1024.0)
+    if proc.returncode:
+        print(proc.stderr.read().decode(errors="replace").strip().splitlines()[-1])
+    return usage.ru_utime + usage.ru_stime, rss, wall, proc.returncode
+
+
+def heavy_modules(module):
+    """Cek apakah import modul ikut menarik tkinter / matplotlib"""
+    code = (f"import sys, {module}; "
+            "print(','.join(m for m in ('tkinter', 'matplotlib') if m in sys.modules) or 'none')")
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless vs GUI footprint")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--rate", type=float, default=50.0, help="sample/s dalam rekaman")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rec = os.path.join(workdir, "bench.smr")
+        make_recording(rec, args.duration * 2, args.rate)
+        with open(os.path.join(workdir, "bench.json"), "w") as f:
+            f.write('{"status_interval": 0, "record_dir": "%s"}' % workdir.replace("\\", "/"))
+
+        common = ["--replay", rec, "--duration", str(args.duration)]
+        modes = {
+            "headless": common + ["--headless", "--config", os.path.join(workdir, "bench.json")],
+            "gui": common,
+        }
+        print(f"{args.duration:.0f} s replay @ {args.rate:.0f} samples/s")
+        print(f"  heavy imports: core.service -> {heavy_modules('core.service')} | gui -> {heavy_modules('gui')}")
+        for name, cmd in modes.items():
+            if name == "gui" and not os.environ.get("DISPLAY") and os.name != "nt" and sys.platform != "darwin":
+                print(f"  {name:<9}: skipped (no display)")
+                continue
+            cpu, rss, wall, rc = run(cmd, workdir)
+            if rc:
+                print(f"  {name:<9}: failed (exit {rc})")
+                continue
+            print(f"  {name:<9}: cpu {cpu:6.2f} s ({cpu / wall:6.1%} of one core) | peak rss {rss:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
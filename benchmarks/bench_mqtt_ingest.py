@@ -0,0 +1,75 @@
+"""
+Benchmark: ingest IoTClient end-to-end lewat broker lokal
+Butuh broker di localhost (misal: mosquitto -p 1883).
+
+Jalankan: python -m benchmarks.bench_mqtt_ingest --devices 100 --rate 50 --duration 20
+Hasil: sustained ingest rate, parse-error rate, dan persentil queueing delay
+(waktu publish di load generator -> sample masuk IoTClient).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core import IoTClient
+from tools.loadgen import LoadGenerator
+
+
+class InstrumentedClient(IoTClient):
+    """IoTClient yang mencatat delay publish -> ingest dari field "ts" payload"""
+
+    def __init__(self):
+        super().__init__()
+        self.delays = []
+
+    def _ingest(self, device_id, ts, temp, volt, curr, relay, t_arrival_ns, data=None):
+        if data is not None and "ts" in data:
+            self.delays.append(ts - data["ts"])
+        super()._ingest(device_id, ts, temp, volt, curr, relay, t_arrival_ns, data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MQTT ingest benchmark against a local broker")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20.0, help="Hz per device")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fault-rate", type=float, default=0.001)
+    args = parser.parse_args(argv)
+
+    client = InstrumentedClient()
+    client.port = args.port
+    client.connect_broker(args.broker)
+    deadline = time.time() + 5
+    while not client.is_connected:
+        if time.time() > deadline:
+            client.disconnect_broker()
+            raise SystemExit("Cannot reach broker - start mosquitto on localhost first")
+        time.sleep(0.05)
+    time.sleep(0.5)  # Tunggu SUBACK
+
+    gen = LoadGenerator(args.broker, args.port, args.devices, args.rate,
+                        fault_rate=args.fault_rate, seed=1)
+    t0 = time.perf_counter()
+    gen.start(args.duration)
+    gen.wait()
+    elapsed = time.perf_counter() - t0
+    time.sleep(1.0)  # Drain pesan yang masih di jalan
+    gen.stop()
+    client.disconnect_broker()
+
+    received = client.messages_received
+    delays_ms = np.asarray(client.delays) * 1000.0
+    print(f"Offered     : {args.devices} devices x {args.rate} Hz = {args.devices * args.rate:,.0f} msg/s")
+    print(f"Published   : {gen.published:,}")
+    print(f"Received    : {received:,} ({received / max(gen.published, 1):.1%})")
+    print(f"Ingest rate : {received / elapsed:,.0f} msg/s sustained")
+    print(f"Parse errors: {client.parse_errors:,} ({client.parse_errors / max(received, 1):.2%})")
+    if len(delays_ms):
+        p50, p95, p99 = np.percentile(delays_ms, [50, 95, 99])
+        print(f"Queue delay : p50 {p50:.2f} ms | p95 {p95:.2f} ms | p99 {p99:.2f} ms | max {delays_ms.max():.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: samples/detik untuk ingest single JSON vs batch JSON vs frame biner
+Jalankan: python -m benchmarks.bench_payloads
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from core import IoTClient
+from core import codec
+
+N_SAMPLES = 100_000
+BATCH = 50
+
+
+def single_json():
+    return [SimpleNamespace(topic="smartamp/amp001/data",
+                            payload=json.dumps({"temp": 40.0 + i % 10, "volt": 12.0,
+                                                "curr": 1.2, "relay": True}).encode())
+            for i in range(N_SAMPLES)]
+
+
+def batched_json():
+    msgs = []
+    for start in range(0, N_SAMPLES, BATCH):
+        samples = [{"ms": start + i, "temp": 40.0 + i % 10, "volt": 12.0, "curr": 1.2, "relay": True}
+                   for i in range(BATCH)]
+        msgs.append(SimpleNamespace(topic="smartamp/amp001/batch", payload=json.dumps(samples).encode()))
+    return msgs
+
+
+def binary_frames():
+    msgs = []
+    for start in range(0, N_SAMPLES, BATCH):
+        ms = np.arange(start, start + BATCH)
+        frame = codec.encode_frame(ms, 40.0 + ms % 10, np.full(BATCH, 12.0),
+                                   np.full(BATCH, 1.2), np.ones(BATCH))
+        msgs.append(SimpleNamespace(topic="smartamp/amp001/bin", payload=frame))
+    return msgs
+
+
+def run(msgs):
+    client = IoTClient()
+    t0 = time.perf_counter()
+    for msg in msgs:
+        client.on_message(None, None, msg)
+    elapsed = time.perf_counter() - t0
+    assert client.buffer.write_seq == N_SAMPLES
+    return N_SAMPLES / elapsed
+
+
+def main():
+    print(f"{'format':<14} {'samples/s':>12}")
+    for name, factory in (("single-json", single_json),
+                          (f"batch-json/{BATCH}", batched_json),
+                          (f"binary/{BATCH}", binary_frames)):
+        print(f"{name:<14} {run(factory()):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
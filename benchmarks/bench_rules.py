@@ -0,0 +1,75 @@
+"""
+Benchmark: biaya evaluasi rule engine per sample
+Batch satu device (N sample per panggilan) dan fleet (D device x 1 sample per panggilan).
+Sebelum mengukur, dicek dulu bahwa evaluate_one() dan evaluate() memberi hasil sama
+untuk sample tepi (pembagian dengan nol, nilai negatif).
+Jalankan: python -m benchmarks.bench_rules
+"""
+import time
+
+import numpy as np
+
+from core.rules import DEFAULT_RULES, RuleEngine
+
+RULES = DEFAULT_RULES + [
+    {"name": "overtemp", "expr": "temp > 60", "hysteresis": 2.0, "min_duration": 1.0, "action": "trip"},
+    {"name": "short", "expr": "curr > 2 and d_curr > 5", "action": "trip"},
+]
+N_SAMPLES = 200_000
+# Rule dengan pembagian: volt/curr = 0 harus inf/nan di kedua jalur, bukan ZeroDivisionError
+DIV_RULES = [
+    {"name": "ratio_hi", "expr": "curr / volt > 2", "action": "trip"},
+    {"name": "ratio_lo", "expr": "curr / volt < -2", "action": "trip"},
+    {"name": "load", "expr": "volt / curr <= 4"},
+]
+EDGE_SAMPLES = [(20.0, 0.0, 1.0), (20.0, -0.0, 1.0), (20.0, 0.0, 0.0), (20.0, 12.0, 0.0),
+                (20.0, 0.0, -1.0), (20.0, 12.0, 1.0), (20.0, 1.0, 3.0)]
+
+
+def signals(shape, rng):
+    return (45 + 20 * rng.random(shape), 12 + rng.normal(0, 0.5, shape), 2.5 * rng.random(shape))
+
+
+def check_scalar_matches_batch():
+    """evaluate_one (jalur JSON per pesan) harus sama dengan evaluate (batch / frame biner)"""
+    for temp, volt, curr in EDGE_SAMPLES:
+        scalar = RuleEngine(DIV_RULES).evaluate_one(0.0, temp, volt, curr)
+        batch = RuleEngine(DIV_RULES).evaluate(np.zeros(1), np.array([temp]), np.array([volt]), np.array([curr]))
+        assert scalar == batch[:, 0].tolist(), (temp, volt, curr, scalar, batch[:, 0].tolist())
+
+
+def bench_batch(batch, rng):
+    engine = RuleEngine(RULES)
+    calls = N_SAMPLES // batch
+    temp, volt, curr = signals((calls, batch), rng)
+    ts = np.arange(calls * batch, dtype=np.float64).reshape(calls, batch) * 0.01
+    t0 = time.perf_counter()
+    for i in range(calls):
+        engine.evaluate(ts[i], temp[i], volt[i], curr[i])
+    return (time.perf_counter() - t0) / (calls * batch) * 1e9
+
+
+def bench_fleet(devices, rng, calls=200):
+    engine = RuleEngine(RULES)
+    keys = [f"amp{i:03d}" for i in range(devices)]
+    temp, volt, curr = signals((calls, devices, 1), rng)
+    t0 = time.perf_counter()
+    for i in range(calls):
+        engine.evaluate(np.full((devices, 1), i * 0.1), temp[i], volt[i], curr[i], keys=keys)
+    return (time.perf_counter() - t0) / (calls * devices) * 1e9
+
+
+def main():
+    check_scalar_matches_batch()
+    rng = np.random.default_rng(0)
+    print(f"{len(RULES)} rules")
+    print(f"{'batch':>8} {'ns/sample':>12}")
+    for batch in (1, 16, 256, 4096):
+        print(f"{batch:>8} {bench_batch(batch, rng):>12,.0f}")
+    print(f"{'devices':>8} {'ns/device':>12}")
+    for devices in (1, 10, 100, 500):
+        print(f"{devices:>8} {bench_fleet(devices, rng):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
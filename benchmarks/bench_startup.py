@@ -0,0 +1,98 @@
+"""
+Benchmark: cold start GUI
+Mengukur (1) waktu import per modul lewat `python -X importtime` dan
+(2) time-to-first-frame: import gui -> window pertama tampil -> live chart siap.
+Setiap pengukuran jalan di subprocess baru supaya benar-benar cold (tanpa cache modul).
+
+Jalankan: python -m benchmarks.bench_startup --runs 3 --max-ms 1500
+Exit code 1 kalau median time-to-first-frame > --max-ms (untuk deteksi regresi).
+Butuh display (X11/Windows); tanpa display bagian first-frame di-skip.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script yang dijalankan di subprocess: cetak timing sebagai satu baris JSON
+FIRST_FRAME_SCRIPT = r"""
+import json, time
+t0 = time.perf_counter()
+import tkinter as tk
+try:
+    import gui
+    t_import = time.perf_counter()
+    app = gui.FirmataControllerApp()
+except tk.TclError as e:
+    print(json.dumps({"error": str(e)}))
+    raise SystemExit(0)
+app.update()
+t_shell = time.perf_counter()
+deadline = t_shell + 30
+while app.chart is None and time.perf_counter() < deadline:
+    app.update()
+    time.sleep(0.001)
+t_chart = time.perf_counter()
+app.on_close()
+print(json.dumps({"import": t_import - t0, "shell": t_shell - t0, "chart": t_chart - t0}))
+"""
+
+
+def import_times(module="gui", top=15):
+    """Parse stderr `-X importtime`: list (self_us, cumulative_us, nama) diurutkan cumulative"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cum_us), name.rstrip()))
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows[:top]
+
+
+def first_frame():
+    proc = subprocess.run([sys.executable, "-c", FIRST_FRAME_SCRIPT],
+                          cwd=ROOT, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"}
+    return json.loads(lines[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GUI cold start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="jumlah modul terlambat yang ditampilkan")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="gagal (exit 1) kalau median time-to-first-frame melebihi nilai ini")
+    args = parser.parse_args(argv)
+
+    print(f"Import time (cumulative, top {args.top}):")
+    for self_us, cum_us, name in import_times(top=args.top):
+        print(f"  {cum_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    results = []
+    for _ in range(args.runs):
+        r = first_frame()
+        if "error" in r:
+            print(f"\nFirst frame skipped: {r['error']}")
+            return
+        results.append(r)
+
+    print(f"\nTime to first frame (median of {args.runs} cold runs):")
+    for key, label in (("import", "import gui"), ("shell", "shell window"), ("chart", "live chart ready")):
+        print(f"  {label:<17}: {statistics.median(r[key] for r in results) * 1000:8.1f} ms")
+
+    shell_ms = statistics.median(r["shell"] for r in results) * 1000
+    if args.max_ms is not None and shell_ms > args.max_ms:
+        print(f"\nREGRESSION: first frame {shell_ms:.1f} ms > {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,4 @@
-from .iot_client import IoTClient
\ No newline at end of file
+from .iot_client import IoTClient
+from .sample_buffer import SampleBuffer
+from .protection import ProtectionEngine
+from .device_store import DeviceStore
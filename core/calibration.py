@@ -0,0 +1,206 @@
+"""
+Calibration Profiles - Per-Device Sensor Correction
+Setiap device punya profil per channel (temp/volt/curr), disimpan di JSON:
+    {"default": {"temp": {"gain": 1.0, "offset": 0.0}},
+     "amp3":    {"temp": {"gain": 0.987, "offset": 0.4},
+                 "volt": {"poly": [0.0012, 0.995, 0.02]},
+                 "curr": {"lut": {"x": [0, 0.5, 1, 2, 4], "y": [0, 0.52, 1.03, 2.05, 4.1]}, "trim": -0.01}}}
+gain/offset  : y = gain * x + offset (gain error LM35, toleransi shunt INA219)
+poly         : koefisien pangkat tertinggi dulu (seperti np.polyval), dievaluasi Horner
+lut          : piecewise-linear np.interp; di luar range diekstrapolasi dengan kemiringan
+               segmen ujung (arus 10 A tidak boleh terbaca sebagai titik LUT terakhir)
+trim         : offset tambahan setelah transform (diatur dari GUI)
+
+Transform di-compile sekali menjadi fungsi yang bekerja untuk float maupun
+array NumPy, sehingga IoTClient bisa menerapkannya ke seluruh batch saat ingest.
+Channel yang identitas tidak dihitung sama sekali.
+"""
+import json
+import os
+
+import numpy as np
+
+SIGNALS = ("temp", "volt", "curr")
+DEFAULT_KEY = "default"
+
+
+class ChannelCalibration:
+    def __init__(self, gain=1.0, offset=0.0, poly=None, lut=None, trim=0.0):
+        if poly is not None and lut is not None:
+            raise ValueError("Use either poly or lut, not both")
+        if (poly is not None or lut is not None) and (gain != 1.0 or offset != 0.0):
+            raise ValueError("gain/offset cannot be combined with poly or lut (use trim for a final offset)")
+        self.gain = float(gain)
+        self.offset = float(offset)
+        self.poly = None if poly is None else [float(c) for c in poly]
+        self.lut = None
+        if lut is not None:
+            x = np.asarray(lut["x"], dtype=np.float64)
+            y = np.asarray(lut["y"], dtype=np.float64)
+            if x.ndim != 1 or x.shape != y.shape or len(x) < 2:
+                raise ValueError("lut needs equal-length x and y with at least 2 points")
+            if np.any(np.diff(x) <= 0):
+                raise ValueError("lut x must be strictly increasing")
+            self.lut = (x, y)
+        self.trim = float(trim)
+        self.fn = self._compile()
+
+    @classmethod
+    def from_dict(cls, spec):
+        unknown = set(spec) - {"gain", "offset", "poly", "lut", "trim"}
+        if unknown:
+            raise ValueError(f"Unknown calibration keys: {', '.join(sorted(unknown))}")
+        return cls(**spec)
+
+    def to_dict(self):
+        out = {}
+        if self.poly is not None:
+            out["poly"] = list(self.poly)
+        elif self.lut is not None:
+            out["lut"] = {"x": self.lut[0].tolist(), "y": self.lut[1].tolist()}
+        else:
+            if self.gain != 1.0:
+                out["gain"] = self.gain
+            if self.offset != 0.0:
+                out["offset"] = self.offset
+        if self.trim:
+            out["trim"] = self.trim
+        return out
+
+    @property
+    def is_identity(self):
+        return self.fn is None
+
+    def with_trim(self, trim):
+        spec = self.to_dict()
+        spec["trim"] = trim
+        return ChannelCalibration.from_dict(spec)
+
+    def _compile(self):
+        """Returns: fungsi x -> y (float atau ndarray), None untuk identitas"""
+        trim = self.trim
+        if self.poly is not None:
+            coeffs = self.poly
+            head, tail = coeffs[0], coeffs[1:]
+
+            def fn(x):
+                y = head
+                for c in tail:
+                    y = y * x + c
+                return y + trim
+            return fn
+        if self.lut is not None:
+            xp, fp = self.lut
+            fp = fp + trim
+            x_lo, x_hi = xp[0], xp[-1]
+            slope_lo = (fp[1] - fp[0]) / (xp[1] - xp[0])
+            slope_hi = (fp[-1] - fp[-2]) / (xp[-1] - xp[-2])
+
+            def fn(x):
+                y = np.interp(x, xp, fp)
+                return (y + np.minimum(x - x_lo, 0.0) * slope_lo
+                        + np.maximum(x - x_hi, 0.0) * slope_hi)
+            return fn
+        gain, offset = self.gain, self.offset + trim
+        if gain == 1.0 and offset == 0.0:
+            return None
+        if gain == 1.0:
+            return lambda x: x + offset
+        return lambda x: x * gain + offset
+
+    def __call__(self, x):
+        return x if self.fn is None else self.fn(x)
+
+
+IDENTITY = ChannelCalibration()
+
+
+class CalibrationProfile:
+    """Profil satu device; immutable supaya bisa dibaca thread paho tanpa lock"""
+
+    def __init__(self, temp=None, volt=None, curr=None):
+        self.channels = {"temp": temp or IDENTITY, "volt": volt or IDENTITY, "curr": curr or IDENTITY}
+        self._temp, self._volt, self._curr = (self.channels[s].fn for s in SIGNALS)
+
+    @classmethod
+    def from_dict(cls, spec):
+        unknown = set(spec) - set(SIGNALS)
+        if unknown:
+            raise ValueError(f"Unknown calibration channels: {', '.join(sorted(unknown))}")
+        return cls(**{s: ChannelCalibration.from_dict(v) for s, v in spec.items()})
+
+    def to_dict(self):
+        return {s: ch.to_dict() for s, ch in self.channels.items() if not ch.is_identity}
+
+    @property
+    def is_identity(self):
+        return self._temp is None and self._volt is None and self._curr is None
+
+    def trim(self, signal):
+        return self.channels[signal].trim
+
+    def with_trim(self, signal, trim):
+        channels = dict(self.channels)
+        channels[signal] = channels[signal].with_trim(trim)
+        return CalibrationProfile(**channels)
+
+    def apply(self, temp, volt, curr):
+        """Kalibrasi satu sample (float) atau satu batch (ndarray). Returns: (temp, volt, curr)"""
+        if self._temp is not None:
+            temp = self._temp(temp)
+        if self._volt is not None:
+            volt = self._volt(volt)
+        if self._curr is not None:
+            curr = self._curr(curr)
+        return temp, volt, curr
+
+
+IDENTITY_PROFILE = CalibrationProfile()
+
+
+class CalibrationStore:
+    """Profil per device dari file JSON; device tanpa profil memakai "default" """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.profiles = {}
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.update(json.load(f))
+
+    def to_dict(self):
+        return {key: p.to_dict() for key, p in sorted(self.profiles.items())}
+
+    def update(self, specs):
+        """Ganti semua profil dari dict (isi file JSON / snapshot)"""
+        self.profiles = {key: CalibrationProfile.from_dict(spec) for key, spec in specs.items()}
+
+    def save(self, path=None):
+        """Tulis atomic (tmp lalu os.replace)"""
+        path = path or self.path
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+    def profile_for(self, device_id):
+        profile = self.profiles.get(device_id)
+        if profile is None:
+            profile = self.profiles.get(DEFAULT_KEY, IDENTITY_PROFILE)
+        return profile
+
+    def set(self, device_id, profile):
+        # Ganti referensi dict (bukan mutasi profil) -> aman dibaca dari thread paho
+        profiles = dict(self.profiles)
+        profiles[device_id or DEFAULT_KEY] = profile
+        self.profiles = profiles
+
+    def set_trim(self, device_id, signal, trim):
+        """Offset tambahan untuk satu channel (spinbox kalibrasi GUI)"""
+        key = device_id or DEFAULT_KEY
+        current = self.profiles.get(key) or self.profile_for(key)
+        if current.trim(signal) != trim:
+            self.set(key, current.with_trim(signal, trim))
@@ -0,0 +1,77 @@
+"""
+Telemetry Codec - Batched JSON & Binary Frames
+Format frame biner (little-endian):
+  header : u8 magic (0xA5) | u8 version | u16 count
+  record : u32 device_ms | f32 temp | f32 volt | f32 curr | u8 relay   (17 byte, packed)
+"""
+import struct
+import numpy as np
+
+FRAME_MAGIC = 0xA5
+FRAME_VERSION = 1
+HEADER = struct.Struct("<BBH")
+RECORD_DTYPE = np.dtype([
+    ("ms", "<u4"),
+    ("temp", "<f4"),
+    ("volt", "<f4"),
+    ("curr", "<f4"),
+    ("relay", "u1"),
+])
+
+
+def is_binary_frame(payload):
+    """Frame biner ditandai byte pertama = FRAME_MAGIC"""
+    return len(payload) >= HEADER.size and payload[0] == FRAME_MAGIC
+
+
+def decode_frame(payload):
+    """
+    Decode frame biner dengan satu panggilan numpy.frombuffer (zero copy).
+    Returns: structured array RECORD_DTYPE
+    """
+    magic, ver, count = HEADER.unpack_from(payload)
+    if magic != FRAME_MAGIC or ver != FRAME_VERSION:
+        raise ValueError(f"Bad frame header: magic={magic:#x} version={ver}")
+    expected = HEADER.size + count * RECORD_DTYPE.itemsize
+    if len(payload) != expected:
+        raise ValueError(f"Bad frame length: {len(payload)} != {expected}")
+    return np.frombuffer(payload, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+
+
+def encode_frame(ms, temp, volt, curr, relay):
+    """Kebalikan decode_frame (dipakai load generator / benchmark)"""
+    rec = np.empty(len(temp), dtype=RECORD_DTYPE)
+    rec["ms"] = ms
+    rec["temp"] = temp
+    rec["volt"] = volt
+    rec["curr"] = curr
+    rec["relay"] = relay
+    return HEADER.pack(FRAME_MAGIC, FRAME_VERSION, len(rec)) + rec.tobytes()
+
+
+def decode_json_batch(samples):
+    """
+    Ubah list sample JSON ([{"temp":..}, ...]) jadi kolom NumPy.
+    Returns: (ms or None, temp, volt, curr, relay)
+    """
+    n = len(samples)
+    temp = np.fromiter((s.get("temp", 0.0) for s in samples), np.float64, n)
+    volt = np.fromiter((s.get("volt", 0.0) for s in samples), np.float64, n)
+    curr = np.fromiter((s.get("curr", 0.0) for s in samples), np.float64, n)
+    relay = np.fromiter((bool(s.get("relay", True)) for s in samples), np.bool_, n)
+    ms = None
+    if n and "ms" in samples[0]:
+        ms = np.fromiter((s.get("ms", 0) for s in samples), np.float64, n)
+    return ms, temp, volt, curr, relay
+
+
+def arrival_timestamps(now, ms, n):
+    """
+    Timestamp host untuk sample batch: sample terakhir = now,
+    sample lain mundur sesuai selisih clock device (ms). Tanpa ms: semua = now.
+    """
+    if ms is None:
+        return np.full(n, now)
+    ms = np.asarray(ms).astype(np.uint32)
+    # Aritmetika uint32 supaya wrap-around millis() ESP32 tetap benar
+    return now - (ms[-1] - ms) / 1000.0
@@ -0,0 +1,245 @@
+"""
+Connection Manager - Resilient MQTT Session
+Connect di background thread dengan backoff eksponensial (dibatasi + jitter),
+reconnect otomatis setelah putus, dan statistik reconnect/downtime untuk
+mengukur biaya data gap. Client dibuat dengan client_id stabil dan
+clean_session=False supaya broker bisa melanjutkan session (subscription +
+pesan QoS 1 yang tertunda) setelah reconnect.
+"""
+import atexit
+import os
+import random
+import socket
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".smartamp")
+MAX_INSTANCES = 32
+
+
+def pid_alive(pid):
+    """True kalau proses pid masih jalan (tanpa mengirim sinyal apa pun)"""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) di Windows = CTRL_C_EVENT, jangan dipakai
+        try:
+            import psutil
+            return psutil.pid_exists(pid)
+        except ImportError:
+            import ctypes
+            handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return False
+            ctypes.windll.kernel32.CloseHandle(handle)
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Ada, tapi milik user lain
+    return True
+
+
+def _claim(path):
+    """Ambil file pid untuk satu slot client id. Returns: False kalau dipakai proses lain yang hidup"""
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            try:
+                with open(path, "r") as f:
+                    pid = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pid = 0
+            # pid sendiri juga dianggap terpakai: dua IoTClient di satu proses tetap beda id
+            if pid == os.getpid() or pid_alive(pid):
+                return False
+            try:
+                os.remove(path)  # Sisa proses yang sudah mati
+            except OSError:
+                return False
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        atexit.register(_release, path)
+        return True
+    return False
+
+
+def _release(path):
+    try:
+        with open(path, "r") as f:
+            if int(f.read().strip() or 0) == os.getpid():
+                os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+def default_client_id(role="monitor", state_dir=STATE_DIR):
+    """
+    Client id stabil per host + peran + slot instance. Instance pertama tetap
+    smartamp-<role>-<host> (session persisten di broker dipakai lagi setelah restart);
+    instance yang jalan bersamaan (dua GUI, service + proses ingest) mendapat -2, -3, ...
+    Tanpa ini broker melakukan session takeover dan kedua ConnectionManager saling
+    menendang dalam loop reconnect tanpa akhir.
+    """
+    base = f"smartamp-{role}-{socket.gethostname()}"
+    lock_dir = os.path.join(state_dir, "client-ids")
+    try:
+        os.makedirs(lock_dir, exist_ok=True)
+    except OSError:
+        return f"{base}-{os.getpid()}"  # State dir tidak bisa ditulis: unik, tapi tidak persisten
+    for n in range(1, MAX_INSTANCES + 1):
+        client_id = base if n == 1 else f"{base}-{n}"
+        if _claim(os.path.join(lock_dir, client_id + ".pid")):
+            return client_id
+    return f"{base}-{os.getpid()}"
+
+
+class ConnectionManager:
+    def __init__(self, client, on_connect=None, on_disconnect=None, min_delay=0.5, max_delay=30.0, keepalive=60):
+        """
+        client: paho mqtt.Client; callback on_connect(client, userdata, flags, rc) dan
+        on_disconnect(client, userdata, rc) diteruskan setelah bookkeeping
+        """
+        self.client = client
+        self.user_on_connect = on_connect
+        self.user_on_disconnect = on_disconnect
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.keepalive = keepalive
+        self.host = None
+        self.port = 1883
+
+        self.connected = False
+        self.attempts = 0             # percobaan gagal berturut-turut (reset saat CONNACK ok)
+        self.connects = 0             # total CONNACK sukses
+        self.failed_attempts = 0      # total connect gagal / ditolak
+        self.session_resumed = 0      # CONNACK dengan session present
+        self.total_downtime = 0.0     # detik putus (setelah pernah connect)
+        self.last_gap = 0.0
+        self.gaps = []                # (wall_ts putus, durasi detik)
+        self._down_since = None       # monotonic saat putus
+        self._down_wall = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+
+    # --- API ---
+    def start(self, host, port=1883):
+        """Mulai connect di background; langsung return"""
+        self.host, self.port = host, port
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mqtt-connection", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._close_gap()
+        self.connected = False
+
+    @property
+    def reconnects(self):
+        return max(self.connects - 1, 0)
+
+    @property
+    def downtime(self):
+        """Total downtime termasuk gap yang sedang berjalan"""
+        if self._down_since is None:
+            return self.total_downtime
+        return self.total_downtime + time.monotonic() - self._down_since
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "failed_attempts": self.failed_attempts,
+            "session_resumed": self.session_resumed,
+            "downtime_s": self.downtime,
+            "last_gap_s": self.last_gap,
+        }
+
+    def backoff(self, attempt):
+        """Jeda sebelum percobaan ke-attempt: min_delay * 2^attempt, max max_delay, jitter 50-100%"""
+        delay = min(self.max_delay, self.min_delay * (2 ** attempt))
+        return random.uniform(delay / 2.0, delay)
+
+    # --- Callback paho ---
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            self.connected = True
+            self.connects += 1
+            self.attempts = 0
+            if flags.get("session present"):
+                self.session_resumed += 1
+            if self._down_since is not None:
+                self.last_gap = time.monotonic() - self._down_since
+                self.total_downtime += self.last_gap
+                self.gaps.append((self._down_wall, self.last_gap))
+                self._down_since = None
+                print(f"🔁 Reconnected after {self.last_gap:.1f} s (reconnect #{self.reconnects})")
+        else:
+            self.failed_attempts += 1
+        if self.user_on_connect is not None:
+            self.user_on_connect(client, userdata, flags, rc)
+
+    def _on_disconnect(self, client, userdata, rc):
+        if self.connected and not self._stop.is_set():
+            self._mark_down()
+        self.connected = False
+        if self.user_on_disconnect is not None:
+            self.user_on_disconnect(client, userdata, rc)
+
+    def _mark_down(self):
+        if self._down_since is None and self.connects:
+            self._down_since = time.monotonic()
+            self._down_wall = time.time()
+
+    def _close_gap(self):
+        """Stop manual: gap terakhir ditutup supaya downtime tidak terus bertambah"""
+        if self._down_since is not None:
+            self.total_downtime += time.monotonic() - self._down_since
+            self._down_since = None
+
+    # --- Thread koneksi ---
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.client.connect(self.host, self.port, self.keepalive)
+            except (OSError, ValueError) as e:
+                self.failed_attempts += 1
+                delay = self.backoff(self.attempts)
+                self.attempts += 1
+                print(f"Connection Failed: {e} (retry in {delay:.1f} s)")
+                self._stop.wait(delay)
+                continue
+
+            # Network loop sampai koneksi putus / ditolak
+            while not self._stop.is_set():
+                rc = self.client.loop(timeout=1.0)
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    break
+            if self._stop.is_set():
+                break
+
+            self._mark_down()
+            self.connected = False
+            delay = self.backoff(self.attempts)
+            self.attempts += 1
+            print(f"MQTT connection lost (retry in {delay:.1f} s)")
+            self._stop.wait(delay)
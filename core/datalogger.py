@@ -0,0 +1,198 @@
+"""
+Data Logger - Background Buffered Writer
+Row dimasukkan ke queue (tidak pernah blocking), thread terpisah menulis
+per batch, flush/fsync berkala, dan rotasi file berdasarkan ukuran/waktu.
+Error tulis tidak pernah mematikan thread writer: batch yang gagal dihitung
+di rows_lost dan writer lanjut dengan batch berikutnya.
+"""
+import abc
+import csv
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+_STOP = object()
+
+
+def device_tag(device_id):
+    """Device id -> potongan nama file yang aman"""
+    return re.sub(r"[^A-Za-z0-9.-]+", "-", str(device_id))
+
+
+def device_prefix(device_id=None, prefix="DataLog"):
+    """Prefix file per device (DataLog_amp3_...), dipakai core.query untuk filter device"""
+    return f"{prefix}_{device_tag(device_id)}" if device_id else prefix
+
+
+class BackgroundLogger(abc.ABC):
+    """Base class: subclass cukup mengisi extension, _open_file dan _write_rows"""
+    extension = ""
+
+    def __init__(self, directory=".", prefix="DataLog", max_queue=10000, batch_size=256,
+                 flush_interval=1.0, fsync_interval=10.0,
+                 rotate_bytes=50 * 1024 * 1024, rotate_seconds=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval  # None = tidak pernah fsync
+        self.rotate_bytes = rotate_bytes      # None = tanpa rotasi ukuran
+        self.rotate_seconds = rotate_seconds  # None = tanpa rotasi waktu
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rows_written = 0
+        self.rows_dropped = 0  # Row yang dibuang karena queue penuh (backpressure) / logger sudah stop
+        self.rows_lost = 0     # Row yang gagal ditulis (disk penuh, share putus, ...)
+        self.write_errors = 0
+        self.last_error = None
+        self.files = []        # Semua file yang pernah dibuat (urut)
+        self.filename = None
+        self._file = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    # --- API (dipanggil dari thread GUI / MQTT) ---
+    def start(self):
+        self._rotate()
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}", daemon=True)
+        self._thread.start()
+        return self
+
+    def log(self, row):
+        """Masukkan row ke queue. Returns: False kalau row dibuang (queue penuh / sudah stop)"""
+        if self._stopping.is_set():
+            self.rows_dropped += 1
+            return False
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.rows_dropped += 1
+            return False
+
+    def stop(self, timeout=None):
+        """Tulis sisa queue lalu tutup file. timeout=0 berarti tidak menunggu thread"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(_STOP)  # Hanya membangunkan writer; queue penuh -> writer melihat _stopping
+        except queue.Full:
+            pass
+        if timeout != 0:
+            self._thread.join(timeout)
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    # --- Hook untuk subclass ---
+    @abc.abstractmethod
+    def _open_file(self, path):
+        """Buka file baru (termasuk header). Returns: file object"""
+
+    @abc.abstractmethod
+    def _write_rows(self, rows):
+        """Tulis satu batch row ke self._file"""
+
+    # --- Writer thread ---
+    def _new_path(self):
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{self.prefix}_{ts}{self.extension}")
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{self.prefix}_{ts}_{n}{self.extension}")
+            n += 1
+        return path
+
+    def _rotate(self):
+        if self._file is not None:
+            self._close_file()
+        path = self._new_path()
+        self._file = self._open_file(path)
+        self.filename = path
+        self.files.append(path)
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        self._file.flush()
+        if self.fsync_interval is not None:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def _should_rotate(self):
+        if self.rotate_seconds is not None and time.time() - self._opened_at >= self.rotate_seconds:
+            return True
+        if self.rotate_bytes is not None and self._file.tell() >= self.rotate_bytes:
+            return True
+        return False
+
+    def _run(self):
+        last_flush = last_fsync = time.time()
+        while True:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is not _STOP:
+                        batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            # Setelah stop(): sisa queue tetap ditulis, keluar begitu queue kosong
+            done = self._stopping.is_set() and self.queue.empty()
+
+            try:
+                if self._file is None:
+                    self._rotate()  # Buka ulang setelah rotasi gagal
+                if batch:
+                    self._write_rows(batch)
+                    self.rows_written += len(batch)
+                    batch = []
+                now = time.time()
+                if now - last_flush >= self.flush_interval:
+                    self._file.flush()
+                    last_flush = now
+                if self.fsync_interval is not None and now - last_fsync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    last_fsync = now
+                if not done and self._should_rotate():
+                    self._rotate()
+            except Exception as e:
+                # Thread writer harus tetap hidup, kalau tidak log() mengisi queue tanpa pembaca
+                self.rows_lost += len(batch)
+                self.write_errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Logger Error: {self.last_error}")
+            if done:
+                break
+        if self._file is not None:
+            try:
+                self._close_file()
+            except OSError as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Logger Error: {self.last_error}")
+
+
+class CsvLogger(BackgroundLogger):
+    """Format DataLog_*.csv yang sama dengan versi lama (Time = HH:MM:SS)"""
+    extension = ".csv"
+    HEADER = ["Time", "Temp(C)", "Volt(V)", "Curr(A)", "Protection_Active"]
+
+    def _open_file(self, path):
+        f = open(path, "w", newline="")
+        self._writer = csv.writer(f)
+        self._writer.writerow(self.HEADER)
+        return f
+
+    def _write_rows(self, rows):
+        # row: (epoch_ts, temp, volt, curr, protection)
+        self._writer.writerows(
+            [datetime.fromtimestamp(ts).strftime("%H:%M:%S"), t, f"{v:.2f}", f"{i:.2f}", prot]
+            for ts, t, v, i, prot in rows)
@@ -0,0 +1,113 @@
+"""
+Device Store - Columnar Per-Device State
+Semua amplifier di rack disimpan dalam array NumPy yang diindeks slot,
+bukan dict per pesan. Biaya per sample tetap O(1) dari 1 sampai ratusan device.
+"""
+import threading
+import numpy as np
+from .sample_buffer import (N_COLS, COL_TS, COL_TEMP, COL_VOLT, COL_CURR, COL_RELAY,
+                            COL_TEMP_RAW, COL_VOLT_RAW, COL_CURR_RAW)
+
+
+class DeviceStore:
+    def __init__(self, ring_len=256, initial_slots=16):
+        self.ring_len = int(ring_len)
+        self._lock = threading.Lock()
+        self._slots = {}       # device_id -> slot
+        self.device_ids = []   # slot -> device_id
+        self._alloc(int(initial_slots))
+
+    def _alloc(self, capacity):
+        """Alokasi (atau perbesar 2x) array per slot"""
+        n = len(self.device_ids)
+        latest = np.zeros((capacity, N_COLS), dtype=np.float64)
+        rings = np.zeros((capacity, self.ring_len, N_COLS), dtype=np.float64)
+        write_seq = np.zeros(capacity, dtype=np.int64)
+        if n:
+            latest[:n] = self.latest[:n]
+            rings[:n] = self.rings[:n]
+            write_seq[:n] = self.write_seq[:n]
+        self.latest = latest
+        self.rings = rings
+        self.write_seq = write_seq
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.device_ids)
+
+    def slot_for(self, device_id):
+        """Slot untuk device_id, dibuat otomatis kalau device baru"""
+        slot = self._slots.get(device_id)
+        if slot is not None:
+            return slot
+        with self._lock:
+            slot = self._slots.get(device_id)
+            if slot is None:
+                slot = len(self.device_ids)
+                if slot >= self.capacity:
+                    self._alloc(self.capacity * 2)
+                self.device_ids.append(device_id)
+                self._slots[device_id] = slot
+            return slot
+
+    def append(self, slot, ts, temp, volt, curr, relay, raw=None):
+        """Tulis satu sample ke latest + ring milik slot. raw = (temp, volt, curr) sebelum kalibrasi"""
+        temp_raw, volt_raw, curr_raw = raw if raw is not None else (temp, volt, curr)
+        with self._lock:
+            row = self.latest[slot]
+            row[COL_TS] = ts
+            row[COL_TEMP] = temp
+            row[COL_VOLT] = volt
+            row[COL_CURR] = curr
+            row[COL_RELAY] = 1.0 if relay else 0.0
+            row[COL_TEMP_RAW] = temp_raw
+            row[COL_VOLT_RAW] = volt_raw
+            row[COL_CURR_RAW] = curr_raw
+            seq = self.write_seq[slot]
+            self.rings[slot, seq % self.ring_len] = row
+            self.write_seq[slot] = seq + 1
+
+    def extend(self, slot, ts, temp, volt, curr, relay, raw=None):
+        """Tulis batch sample (kolom NumPy) ke ring milik slot"""
+        n = len(temp)
+        if n == 0:
+            return
+        temp_raw, volt_raw, curr_raw = raw if raw is not None else (temp, volt, curr)
+        cols = (ts, temp, volt, curr, relay, temp_raw, volt_raw, curr_raw)
+        with self._lock:
+            seq = int(self.write_seq[slot])
+            if n > self.ring_len:
+                cols = tuple(c[-self.ring_len:] for c in cols)
+                seq += n - self.ring_len
+                n = self.ring_len
+            idx = np.arange(seq, seq + n) % self.ring_len
+            ring = self.rings[slot]
+            for col, values in enumerate(cols):
+                ring[idx, col] = values
+            self.latest[slot] = ring[idx[-1]]
+            self.write_seq[slot] = seq + n
+
+    def drain_since(self, slot, cursor):
+        """Sama seperti SampleBuffer.drain_since, tapi untuk satu slot"""
+        with self._lock:
+            end = int(self.write_seq[slot])
+            start = max(cursor, end - self.ring_len)
+            lost = start - cursor if cursor < start else 0
+            n = end - start
+            if n <= 0:
+                return self.rings[slot, :0].copy(), end, 0
+            idx = np.arange(start, end) % self.ring_len
+            rows = self.rings[slot, idx]
+        return rows, end, lost
+
+    def snapshot(self):
+        """Returns: (device_ids, latest rows (n, N_COLS)) untuk seluruh fleet"""
+        with self._lock:
+            n = len(self.device_ids)
+            return list(self.device_ids), self.latest[:n].copy()
+
+    def online_mask(self, now, timeout=5.0):
+        """Boolean array per slot: True kalau device kirim data < timeout detik"""
+        with self._lock:
+            n = len(self.device_ids)
+            return (now - self.latest[:n, COL_TS]) <= timeout
@@ -0,0 +1,511 @@
+"""
+Ingest Process - Protection Outside the GUI Process
+IoTClient + ProtectionEngine + logging (HeadlessService) jalan di proses sendiri.
+Sample dipublish ke ring shared memory (core.shm_ring) dan GUI hanya attach
+read-only, jadi draw matplotlib / GC di proses GUI tidak pernah berebut GIL
+dengan on_message dan keputusan trip. Perintah GUI (relay, setpoint, reset,
+pilih device) lewat multiprocessing.connection di localhost dengan authkey.
+
+GUI bisa ditutup dan dibuka lagi tanpa memutus session MQTT:
+    python main.py --ingest-process          # attach, atau spawn proses ingest kalau belum ada
+    python -m core.ingest_process serve --config smartamp.json
+    python -m core.ingest_process status | stop
+"""
+import argparse
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from multiprocessing import AuthenticationError
+
+from .connection import pid_alive
+from .shm_ring import (RING_NAME, MAX_RULES, SharedRing, I_CONNECTED, I_LATCHED, I_TRIPS, I_MESSAGES,
+                       I_RECONNECTS, I_RULES_FIRED, I_RULES_ACTIVE, I_RULE_COUNTS, I_LATENCY_NS,
+                       I_LATCHED_DEVICES, I_DEVICE_TRIPS, I_LAST_TRIP_SLOT,
+                       F_LAST_RECEIVED, F_LAST_TRIP, F_HEARTBEAT, F_LAST_GAP, F_DOWNTIME)
+from .sample_buffer import COL_TEMP, COL_VOLT, COL_CURR, COL_RELAY
+
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".smartamp")
+# Alamat listener + authkey + nama ring; hanya bisa dibaca user ini (0600)
+KEY_FILE = os.path.join(STATE_DIR, "ingest.key")
+LOG_FILE = os.path.join(STATE_DIR, "ingest.log")
+HEARTBEAT_TIMEOUT = 2.0  # Detik tanpa heartbeat -> proses ingest dianggap mati
+
+
+def read_key(path=KEY_FILE):
+    """Returns: dict isi key file, atau None kalau belum ada / rusak"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class IngestServer:
+    """Publisher ring + listener perintah di samping HeadlessService.run()"""
+
+    def __init__(self, service, ring_name=RING_NAME, capacity=65536, key_file=KEY_FILE, publish_interval=0.01):
+        self.service = service
+        self.ring_name = ring_name
+        self.capacity = capacity
+        self.key_file = key_file
+        self.publish_interval = publish_interval
+        self.ring = None
+        self.listener = None
+        self.clients = 0  # GUI yang attach; diubah thread ingest-client -> _clients_lock
+        self._clients_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._threads = []
+        self._cal_mtime = None
+        self._trips_published = -1
+
+    def start(self):
+        info = read_key(self.key_file)
+        pid = info.get("pid", 0) if info is not None else 0
+        if pid and pid != os.getpid() and pid_alive(pid):
+            raise RuntimeError(f"Ingest process {pid} is already running ({self.key_file})")
+        self.ring = SharedRing.create(self.ring_name, self.capacity)  # RuntimeError kalau ring dipakai proses hidup
+        authkey = secrets.token_bytes(32)
+        self.listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        self._write_key(authkey)
+        path = self.service.calibration.path
+        self._cal_mtime = os.stat(path).st_mtime if path and os.path.exists(path) else None
+        for target, name in ((self._publish_loop, "ring-publisher"), (self._accept_loop, "ingest-listener")):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        host, port = self.listener.address
+        print(f"Ingest process {os.getpid()}: ring {self.ring_name} ({self.capacity} rows), commands on {host}:{port}")
+        return self
+
+    def close(self):
+        self._closed.set()
+        self.listener.close()  # accept() yang sedang menunggu -> OSError
+        for t in self._threads:
+            t.join(1.0)
+        info = read_key(self.key_file)
+        if info is not None and info.get("pid") == os.getpid():
+            os.remove(self.key_file)
+        self.ring.close()
+
+    def _write_key(self, authkey):
+        os.makedirs(os.path.dirname(self.key_file) or ".", exist_ok=True)
+        info = {"pid": os.getpid(), "address": list(self.listener.address), "authkey": authkey.hex(),
+                "ring": self.ring_name, "calibration_file": self.service.calibration.path,
+                "started_at": time.time()}
+        tmp = self.key_file + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp, self.key_file)
+
+    # --- Publisher: buffer IoTClient -> ring + status header ---
+    def _publish_loop(self):
+        iot = self.service.iot
+        cursor = iot.buffer.cursor()
+        next_cal_check = 0.0
+        while not self._closed.wait(self.publish_interval):
+            rows, cursor, _lost = iot.buffer.drain_since(cursor)
+            self.ring.extend(rows)
+            self._publish_status()
+            now = time.monotonic()
+            if now >= next_cal_check:
+                next_cal_check = now + 1.0
+                self._reload_calibration()
+
+    def _publish_status(self):
+        iot, protection = self.service.iot, self.service.protection
+        ints, floats = self.ring.ints, self.ring.floats
+        device = iot.device_id
+        ints[I_CONNECTED] = int(iot.is_connected)
+        ints[I_LATCHED] = int(protection.is_latched(device))
+        ints[I_LATCHED_DEVICES] = len(protection.latched_devices())
+        ints[I_DEVICE_TRIPS] = protection.device_trip_count(device)
+        trips = protection.trip_count
+        if trips != self._trips_published:
+            self._trips_published = trips
+            ids = iot.devices.device_ids
+            last = protection.last_trip_device
+            ints[I_LAST_TRIP_SLOT] = ids.index(last) if last in ids else -1
+        ints[I_TRIPS] = trips
+        ints[I_MESSAGES] = iot.messages_received
+        ints[I_RECONNECTS] = iot.connection.reconnects
+        if protection.latencies_ns:
+            ints[I_LATENCY_NS] = protection.latencies_ns[-1]
+        rules = protection.rules  # Referensi lokal: set_rules bisa mengganti engine
+        ints[I_RULES_FIRED], ints[I_RULES_ACTIVE] = rules.status_masks(device)
+        n = min(len(rules), MAX_RULES)
+        ints[I_RULE_COUNTS:I_RULE_COUNTS + n] = rules.fire_counts[:n]
+        floats[F_LAST_RECEIVED] = iot.last_received_time
+        floats[F_LAST_TRIP] = protection.last_trip_time
+        floats[F_LAST_GAP] = iot.connection.last_gap
+        floats[F_DOWNTIME] = iot.connection.downtime
+        floats[F_HEARTBEAT] = time.time()
+
+    def _reload_calibration(self):
+        """calibration.json diubah GUI (spinbox trim) -> profil baru untuk sample berikutnya"""
+        store = self.service.calibration
+        if not store.path:
+            return
+        try:
+            mtime = os.stat(store.path).st_mtime
+        except OSError:
+            return
+        if mtime == self._cal_mtime:
+            return
+        self._cal_mtime = mtime
+        try:
+            store.load()
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring {store.path}: {e}")
+
+    # --- Perintah dari GUI ---
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError as e:
+                print(f"Rejected GUI connection: {e}")
+                continue
+            except OSError:
+                return  # Listener ditutup
+            t = threading.Thread(target=self._serve_client, args=(conn,), name="ingest-client", daemon=True)
+            t.start()
+
+    def hello(self):
+        iot, protection = self.service.iot, self.service.protection
+        return {"pid": os.getpid(), "ring": self.ring_name, "broker": iot.connection.host,
+                "device_id": iot.device_id, "device_ids": list(iot.devices.device_ids),
+                "latched": protection.latched_devices(),
+                "rules": [r.to_dict() for r in protection.rules.rules],
+                "settings": {"setpoint_temp": protection.setpoint_temp, "setpoint_curr": protection.setpoint_curr,
+                             "gate": protection.gate, "force_short": protection.force_short},
+                "calibration_file": self.service.calibration.path}
+
+    def _serve_client(self, conn):
+        """
+        Satu thread per GUI. Proses ingest tidak pernah menunggu GUI: perintah
+        tidak dibalas, dan yang dikirim ke GUI hanya daftar device + device
+        yang terkunci saat berubah
+        """
+        iot, protection = self.service.iot, self.service.protection
+        with self._clients_lock:
+            self.clients += 1
+        last = None
+        try:
+            conn.send(("hello", self.hello()))
+            while not self._closed.is_set():
+                if conn.poll(0.2):
+                    self._dispatch(conn.recv())
+                devices = (list(iot.devices.device_ids), iot.device_id, protection.latched_devices())
+                if devices != last:
+                    last = devices
+                    conn.send(("devices",) + devices)
+        except (EOFError, OSError):
+            pass  # GUI ditutup / crash
+        finally:
+            with self._clients_lock:
+                self.clients -= 1
+            conn.close()
+
+    def _dispatch(self, msg):
+        iot, protection = self.service.iot, self.service.protection
+        kind, args = msg[0], msg[1:]
+        try:
+            if kind == "connect":
+                if args[0] != iot.connection.host:
+                    iot.disconnect_broker()
+                    iot.connect_broker(args[0])
+            elif kind == "command":
+                iot.send_command(*args)
+            elif kind == "select_device":
+                if args[0] != iot.device_id:
+                    iot.select_device(args[0])
+            elif kind == "configure":
+                protection.configure(**args[0])
+            elif kind == "reset":
+                protection.reset(**args[0])
+            elif kind == "shutdown":
+                print("Shutdown requested")
+                self.service.stop()
+            else:
+                print(f"Unknown ingest command: {kind}")
+        except (AttributeError, ValueError, TypeError, IndexError) as e:
+            print(f"Ingest command {kind} failed: {e}")
+
+
+class _RemoteDevices:
+    def __init__(self, device_ids=()):
+        self.device_ids = list(device_ids)
+
+    def __len__(self):
+        return len(self.device_ids)
+
+
+class _RemoteConnection:
+    """Statistik ConnectionManager proses ingest (dibaca dari header ring)"""
+
+    def __init__(self, ring):
+        self._ring = ring
+
+    @property
+    def reconnects(self):
+        return int(self._ring.ints[I_RECONNECTS])
+
+    @property
+    def last_gap(self):
+        return float(self._ring.floats[F_LAST_GAP])
+
+    @property
+    def downtime(self):
+        return float(self._ring.floats[F_DOWNTIME])
+
+
+class RemoteIoTClient:
+    """
+    Pengganti IoTClient untuk GUI: sample dari ring shared memory, perintah ke
+    proses ingest. ProtectionEngine GUI menjadi cermin (status dari header,
+    configure/reset diteruskan); trip tetap diputuskan proses ingest.
+    """
+
+    def __init__(self, key_file=KEY_FILE, timeout=5.0, poll_interval=0.01):
+        info = read_key(key_file)
+        if info is None:
+            raise ConnectionError(f"No ingest process ({key_file} not found)")
+        self.conn = Client(tuple(info["address"]), authkey=bytes.fromhex(info["authkey"]))
+        if not self.conn.poll(timeout):
+            self.conn.close()
+            raise ConnectionError("Ingest process did not answer")
+        kind, hello = self.conn.recv()
+        self.pid = hello["pid"]
+        self.buffer = SharedRing.attach(hello["ring"])
+        self.connection = _RemoteConnection(self.buffer)
+        self.devices = _RemoteDevices(hello["device_ids"])
+        self.device_id = hello["device_id"]
+        self.broker = hello["broker"]
+        self.calibration_file = hello["calibration_file"]
+        self._rules = hello["rules"]
+        self._settings = hello["settings"]
+        self._latched_devices = hello["latched"]
+        self.protection = None
+        self.calibration = None
+        self.on_data = None
+        self._data_signaled = False
+        self._send_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._poll_interval = poll_interval
+        self._last_latency = int(self.buffer.ints[I_LATENCY_NS])
+        self._watcher = threading.Thread(target=self._watch, name="ring-watcher", daemon=True)
+        self._watcher.start()
+
+    @classmethod
+    def connect_or_spawn(cls, args=(), key_file=KEY_FILE, timeout=15.0):
+        """Attach ke proses ingest yang sudah jalan, atau jalankan satu (terlepas dari GUI)"""
+        try:
+            return cls(key_file)
+        except (ConnectionError, OSError, AuthenticationError, EOFError):
+            pass
+        os.makedirs(STATE_DIR, exist_ok=True)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cmd = [sys.executable, "-u", "-m", "core.ingest_process", "serve", "--key-file", key_file, *args]
+        kwargs = {"start_new_session": True} if os.name == "posix" else {
+            "creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        with open(LOG_FILE, "ab") as log:
+            proc = subprocess.Popen(cmd, cwd=root, stdin=subprocess.DEVNULL, stdout=log,
+                                    stderr=subprocess.STDOUT, **kwargs)
+        print(f"Started ingest process {proc.pid} (log: {LOG_FILE})")
+        t_end = time.monotonic() + timeout
+        while time.monotonic() < t_end:
+            exited = proc.poll() is not None
+            info = read_key(key_file)
+            pid = info.get("pid", 0) if info is not None else 0
+            # Proses kita siap, atau kalah race dengan proses ingest lain yang masih hidup: attach ke sana
+            if pid == proc.pid or (exited and pid and pid_alive(pid)):
+                return cls(key_file)
+            if exited:
+                # Beri waktu pemenang race menulis key file-nya
+                t_end = min(t_end, time.monotonic() + HEARTBEAT_TIMEOUT)
+            time.sleep(0.05)
+        if proc.poll() is not None:
+            raise RuntimeError(f"Ingest process exited with code {proc.returncode}, see {LOG_FILE}")
+        raise RuntimeError(f"Ingest process did not start within {timeout:.0f} s, see {LOG_FILE}")
+
+    # --- Status (header ring) ---
+    @property
+    def child_alive(self):
+        return not self._closed.is_set() and time.time() - self.buffer.floats[F_HEARTBEAT] < HEARTBEAT_TIMEOUT
+
+    @property
+    def is_connected(self):
+        return self.child_alive and bool(self.buffer.ints[I_CONNECTED])
+
+    @property
+    def last_received_time(self):
+        return float(self.buffer.floats[F_LAST_RECEIVED])
+
+    @property
+    def messages_received(self):
+        return int(self.buffer.ints[I_MESSAGES])
+
+    def check_online_status(self):
+        return self.child_alive and time.time() - self.last_received_time <= 5
+
+    def get_data(self):
+        row = self.buffer.latest()
+        if row is None:
+            return {"temp": 0.0, "volt": 0.0, "curr": 0.0, "relay": True}
+        return {"temp": float(row[COL_TEMP]), "volt": float(row[COL_VOLT]),
+                "curr": float(row[COL_CURR]), "relay": bool(row[COL_RELAY])}
+
+    @property
+    def data_pending(self):
+        return self._data_signaled
+
+    def ack_data_signal(self):
+        self._data_signaled = False
+
+    # --- Perintah ---
+    def _send(self, *msg):
+        with self._send_lock:
+            try:
+                self.conn.send(msg)
+            except OSError as e:
+                print(f"Ingest process unreachable: {e}")
+
+    def attach_protection(self, engine):
+        """Engine GUI jadi cermin: rule + setting proses ingest, configure/reset diteruskan"""
+        engine.forward = None
+        engine.set_rules(self._rules)
+        engine.configure(**self._settings)
+        engine.forward = lambda method, settings: self._send(method, settings)
+        self.protection = engine
+        self._mirror_protection()
+
+    def attach_calibration(self, store):
+        # Proses ingest membaca ulang file kalibrasi sendiri saat berubah
+        self.calibration = store
+        if store.path and self.calibration_file and os.path.abspath(store.path) != os.path.abspath(self.calibration_file):
+            print(f"Warning: ingest process uses {self.calibration_file}, GUI saves to {store.path}")
+
+    def connect_broker(self, broker_address="broker.emqx.io"):
+        self.broker = broker_address
+        self._send("connect", broker_address)
+        return True
+
+    def disconnect_broker(self):
+        """Tidak memutus MQTT: session tetap dipegang proses ingest, GUI hanya berhenti menampilkan"""
+
+    def send_command(self, cmd, device_id=None):
+        self._send("command", cmd, device_id)
+
+    def select_device(self, device_id):
+        if device_id != self.device_id:
+            self.device_id = device_id
+            self._send("select_device", device_id)
+
+    def shutdown(self):
+        """Hentikan proses ingest (MQTT ikut putus)"""
+        self._send("shutdown")
+
+    def detach(self):
+        """Lepas dari proses ingest; proteksi dan session MQTT tetap jalan"""
+        self._closed.set()
+        self._watcher.join(1.0)
+        self.conn.close()
+        self.buffer.close()
+
+    # --- Watcher: ring -> on_data, header -> engine cermin ---
+    def _watch(self):
+        seen = self.buffer.write_seq
+        conn_ok = True
+        while not self._closed.wait(self._poll_interval):
+            try:
+                while conn_ok and self.conn.poll():
+                    msg = self.conn.recv()
+                    if msg[0] == "devices":
+                        self.devices.device_ids, device_id, self._latched_devices = msg[1], msg[2], msg[3]
+                        if self.device_id is None:
+                            self.device_id = device_id
+            except (EOFError, OSError):
+                conn_ok = False
+                print("Ingest process closed the command connection")
+            if self.protection is not None:
+                self._mirror_protection()
+            seq = self.buffer.write_seq
+            if seq != seen:
+                seen = seq
+                if not self._data_signaled:
+                    self._data_signaled = True
+                    if self.on_data is not None:
+                        self.on_data()
+
+    def _mirror_protection(self):
+        ints, floats = self.buffer.ints, self.buffer.floats
+        engine = self.protection
+        latency = int(ints[I_LATENCY_NS])
+        if latency != self._last_latency:
+            self._last_latency = latency
+            engine.latencies_ns.append(latency)
+        # Device terpilih dari header (langsung), device lain dari pesan "devices" (<= 0.2 s)
+        devices = {d: {"latched": True} for d in self._latched_devices}
+        devices[self.device_id] = {"latched": bool(ints[I_LATCHED]), "trip_count": int(ints[I_DEVICE_TRIPS])}
+        ids, slot = self.devices.device_ids, int(ints[I_LAST_TRIP_SLOT])
+        engine.set_state({"trip_count": int(ints[I_TRIPS]), "last_trip_time": float(floats[F_LAST_TRIP]),
+                          "last_trip_device": ids[slot] if 0 <= slot < len(ids) else None, "devices": devices})
+        engine.rules.load_status(int(ints[I_RULES_FIRED]), int(ints[I_RULES_ACTIVE]),
+                                 ints[I_RULE_COUNTS:I_RULE_COUNTS + MAX_RULES], key=self.device_id)
+
+
+def serve(config, key_file=KEY_FILE, capacity=65536):
+    from .service import HeadlessService
+    service = HeadlessService(config)
+    server = IngestServer(service, capacity=capacity, key_file=key_file).start()
+    try:
+        service.start().run()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart Amp ingest/protection process for the GUI")
+    parser.add_argument("action", choices=("serve", "status", "stop"))
+    parser.add_argument("--config", metavar="FILE", help="JSON config (see core/service.py DEFAULT_CONFIG)")
+    parser.add_argument("--broker", help="MQTT broker (overrides config)")
+    parser.add_argument("--rules", metavar="FILE", help="Rules JSON (same file as the GUI's rules.json)")
+    parser.add_argument("--calibration", metavar="FILE", help="Calibration profiles JSON, reloaded when it changes")
+    parser.add_argument("--no-record", action="store_true", help="Do not write DataLog files")
+    parser.add_argument("--capacity", type=int, default=65536, help="Shared ring size in samples")
+    parser.add_argument("--key-file", default=KEY_FILE)
+    args = parser.parse_args(argv)
+
+    if args.action == "serve":
+        from .rules import load_rules
+        from .service import load_config
+        rules = [r.to_dict() for r in load_rules(args.rules)] if args.rules else None
+        config = load_config(args.config, broker=args.broker, rules=rules, calibration_file=args.calibration,
+                             record=False if args.no_record else None)
+        serve(config, key_file=args.key_file, capacity=args.capacity)
+        return
+
+    try:
+        client = RemoteIoTClient(args.key_file)
+    except (ConnectionError, OSError, AuthenticationError, EOFError) as e:
+        print(f"Ingest process not running: {e}")
+        sys.exit(1)
+    if args.action == "stop":
+        client.shutdown()
+        print(f"Stop sent to ingest process {client.pid}")
+    else:
+        ints = client.buffer.ints
+        print(f"pid={client.pid} broker={client.broker} connected={client.is_connected} "
+              f"device={client.device_id} samples={client.buffer.write_seq} msgs={client.messages_received} "
+              f"trips={int(ints[I_TRIPS])} latched={bool(ints[I_LATCHED])}")
+    client.detach()
+
+
+if __name__ == "__main__":
+    main()
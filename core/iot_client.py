@@ -5,12 +5,23 @@ Author: 03TELE004
 """
 import paho.mqtt.client as mqtt
 import json
+import threading
 import time
-import random
+import numpy as np
+from .connection import ConnectionManager, default_client_id
+from .metrics import REGISTRY
+from .sample_buffer import SampleBuffer
+from .device_store import DeviceStore
+from . import codec
+
+TOPIC_ROOT = "smartamp"
+LEGACY_DEVICE = "default" # Firmware lama publish ke smartamp/data tanpa device id
 
 class IoTClient:
-    def __init__(self):
-        self.client = mqtt.Client(client_id=f"PythonMonitor-{random.randint(0, 1000)}")
+    def __init__(self, client_id=None, registry=REGISTRY):
+        # Client id stabil + clean_session=False: broker menyimpan session antar reconnect
+        self.client_id = client_id or default_client_id()
+        self.client = mqtt.Client(client_id=self.client_id, clean_session=False)
         self.broker = "broker.emqx.io" # Default Public Broker
         self.port = 1883
         
@@ -21,66 +32,234 @@ class IoTClient:
             "curr": 0.0,
             "relay": True
         }
+        # latest_data ditulis thread paho, dibaca thread GUI
+        self._data_lock = threading.Lock()
+        # Flag data_pending + callback opsional (dipanggil di thread paho, jangan menyentuh Tk)
+        # saat ada sample baru untuk device terpilih.
+        # Edge-triggered: hanya sekali sampai reader memanggil ack_data_signal()
+        self.on_data = None
+        self._data_signaled = False
+        # State semua device di rack (smartamp/<device_id>/data)
+        self.devices = DeviceStore()
+        # Device yang sedang dipantau GUI (None = pilih otomatis device pertama)
+        self.device_id = None
+        # Ring buffer semua sample device terpilih (lossless, dibaca via drain_since)
+        self.buffer = SampleBuffer()
+        # Engine proteksi (opsional), dievaluasi langsung di on_message
+        self.protection = None
+        # Profil kalibrasi per device (opsional, core.calibration.CalibrationStore),
+        # diterapkan ke setiap sample sebelum masuk buffer / proteksi
+        self.calibration = None
         self.is_connected = False
         self.last_received_time = 0 # Untuk deteksi device offline
+        self.messages_received = 0
+        self.parse_errors = 0
 
-        # Callback events
-        self.client.on_connect = self.on_connect
+        # Callback events (on_connect lewat ConnectionManager untuk statistik reconnect)
+        self.connection = ConnectionManager(self.client, on_connect=self.on_connect,
+                                            on_disconnect=self.on_disconnect)
         self.client.on_message = self.on_message
+        self._register_metrics(registry)
+
+    def _register_metrics(self, registry):
+        """Counter hot path (per topik, byte) + callback untuk nilai yang sudah ada"""
+        self.m_messages = registry.counter("smartamp_messages_total", "MQTT messages received", label="topic")
+        self.m_bytes = registry.counter("smartamp_bytes_received_total", "MQTT payload bytes received")
+        self.m_interarrival = registry.histogram("smartamp_sample_interarrival_seconds",
+                                                 "Time between messages of the monitored device")
+        self.m_commands = registry.counter("smartamp_commands_published_total", "Relay commands published", label="cmd")
+        registry.counter("smartamp_parse_errors_total", "Payloads that failed to parse", fn=lambda: self.parse_errors)
+        registry.counter("smartamp_trips_total", "Protection trips",
+                         fn=lambda: self.protection.trip_count if self.protection is not None else 0)
+        registry.gauge("smartamp_seconds_since_last_sample", "Seconds since the monitored device last sent data",
+                       fn=lambda: time.time() - self.last_received_time if self.last_received_time else -1)
+        registry.gauge("smartamp_mqtt_connected", "1 if the MQTT session is up", fn=lambda: int(self.is_connected))
+        registry.counter("smartamp_mqtt_reconnects_total", "MQTT reconnects", fn=lambda: self.connection.reconnects)
+        registry.counter("smartamp_mqtt_downtime_seconds_total", "Time spent disconnected after first connect",
+                         fn=lambda: self.connection.downtime)
 
     def connect_broker(self, broker_address="broker.emqx.io"):
-        try:
-            self.broker = broker_address
-            print(f"Connecting to MQTT Broker: {self.broker}...")
-            self.client.connect(self.broker, self.port, 60)
-            self.client.loop_start() # Jalankan di background thread
-            return True
-        except Exception as e:
-            print(f"Connection Failed: {e}")
-            return False
+        """Connect + reconnect otomatis di background thread; langsung return"""
+        self.broker = broker_address
+        print(f"Connecting to MQTT Broker: {self.broker}...")
+        self.connection.start(self.broker, self.port)
+        return True
 
     def disconnect_broker(self):
-        self.client.loop_stop()
-        self.client.disconnect()
+        self.connection.stop()
         self.is_connected = False
 
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
             print("✅ Connected to MQTT Broker!")
             self.is_connected = True
-            # Subscribe ke topik data dari ESP32
-            self.client.subscribe("smartamp/data")
-            self.client.subscribe("smartamp/status")
+            # Subscribe ulang di setiap (re)connect: topik single device lama + fleet,
+            # payload batch (JSON array) dan frame biner. QoS 1 supaya pesan QoS 1
+            # dari device ditahan broker selama session putus.
+            self.client.subscribe([(f"{TOPIC_ROOT}/{sub}", 1) for sub in
+                                   ("data", "status", "+/data", "+/status", "+/batch", "+/bin")])
         else:
             print(f"❌ Failed to connect, return code {rc}")
             self.is_connected = False
 
+    def on_disconnect(self, client, userdata, rc):
+        self.is_connected = False
+
+    def attach_protection(self, engine):
+        """Pasang ProtectionEngine yang publish OFF lewat client ini"""
+        engine.publish = self.send_command
+        self.protection = engine
+
+    def attach_calibration(self, store):
+        self.calibration = store
+
+    @staticmethod
+    def parse_topic(topic):
+        """
+        Pisahkan device id dan jenis pesan dari topik.
+        Returns: (device_id, kind) atau (None, None) kalau bukan topik smartamp
+        """
+        parts = topic.split("/")
+        if parts[0] != TOPIC_ROOT:
+            return None, None
+        if len(parts) == 2:
+            return LEGACY_DEVICE, parts[1]
+        if len(parts) == 3:
+            return parts[1], parts[2]
+        return None, None
+
     def on_message(self, client, userdata, msg):
         """Saat ada pesan masuk dari ESP32"""
+        t_arrival_ns = time.perf_counter_ns()
+        self.messages_received += 1
+        self.m_messages.inc(label=msg.topic)
+        self.m_bytes.inc(len(msg.payload))
         try:
-            topic = msg.topic
-            payload = msg.payload.decode()
-            
-            if topic == "smartamp/data":
-                # Parsing JSON: {"temp": 45.0, "volt": 12.0 ...}
-                data = json.loads(payload)
-                self.latest_data = data # Update buffer
-                self.last_received_time = time.time()
-                # print(f"Data received: {data}") # Debug only
+            device_id, kind = self.parse_topic(msg.topic)
+            if kind not in ("data", "batch", "bin"):
+                return
+            payload = msg.payload
+
+            if codec.is_binary_frame(payload):
+                # Frame biner: satu numpy.frombuffer untuk seluruh batch
+                rec = codec.decode_frame(payload)
+                if len(rec) == 0: return
+                ts = codec.arrival_timestamps(time.time(), rec["ms"], len(rec))
+                self._ingest_batch(device_id, ts, rec["temp"], rec["volt"], rec["curr"],
+                                   rec["relay"], t_arrival_ns)
+                return
+
+            # Parsing JSON: {"temp": 45.0, "volt": 12.0 ...} atau [{...}, {...}]
+            data = json.loads(payload)
+            if isinstance(data, list):
+                if not data: return
+                ms, temp, volt, curr, relay = codec.decode_json_batch(data)
+                ts = codec.arrival_timestamps(time.time(), ms, len(data))
+                self._ingest_batch(device_id, ts, temp, volt, curr, relay, t_arrival_ns, data[-1])
+            else:
+                self._ingest(device_id, time.time(),
+                             float(data.get("temp", 0.0)),
+                             float(data.get("volt", 0.0)),
+                             float(data.get("curr", 0.0)),
+                             bool(data.get("relay", True)),
+                             t_arrival_ns, data)
+            # print(f"Data received: {data}") # Debug only
                 
         except Exception as e:
+            self.parse_errors += 1
             print(f"Error parsing JSON: {e}")
 
-    def send_command(self, cmd):
+    def _ingest(self, device_id, ts, temp, volt, curr, relay, t_arrival_ns, data=None):
+        """Simpan satu sample ke store fleet; device terpilih juga ke buffer + proteksi"""
+        raw = None
+        if self.calibration is not None:
+            profile = self.calibration.profile_for(device_id)
+            if not profile.is_identity:
+                raw = (temp, volt, curr)
+                temp, volt, curr = (float(v) for v in profile.apply(temp, volt, curr))
+                data = None
+        self.devices.append(self.devices.slot_for(device_id), ts, temp, volt, curr, relay, raw)
+        # Proteksi untuk SEMUA device (latch per device); filter device terpilih hanya untuk GUI
+        if self.protection is not None:
+            self.protection.process(temp, curr, relay, t_arrival_ns, volt=volt, ts=ts, device_id=device_id)
+        if self.device_id is None:
+            self.device_id = device_id
+        if device_id != self.device_id:
+            return
+        with self._data_lock:
+            self.latest_data = data if data is not None else {
+                "temp": temp, "volt": volt, "curr": curr, "relay": relay}
+        self.buffer.append(ts, temp, volt, curr, relay, raw)
+        if self.last_received_time:
+            self.m_interarrival.observe(ts - self.last_received_time)
+        self.last_received_time = ts
+        self._signal_data()
+
+    def _ingest_batch(self, device_id, ts, temp, volt, curr, relay, t_arrival_ns, last=None):
+        """Sama seperti _ingest, tapi untuk kolom NumPy (batch JSON / frame biner)"""
+        raw = None
+        if self.calibration is not None:
+            profile = self.calibration.profile_for(device_id)
+            if not profile.is_identity:
+                # Satu transform NumPy untuk seluruh batch
+                raw = (temp, volt, curr)
+                temp, volt, curr = (np.asarray(v, dtype=np.float64) for v in profile.apply(temp, volt, curr))
+                last = None
+        self.devices.extend(self.devices.slot_for(device_id), ts, temp, volt, curr, relay, raw)
+        if self.protection is not None:
+            self.protection.process_batch(temp, curr, relay, t_arrival_ns, volts=volt, ts=ts, device_id=device_id)
+        if self.device_id is None:
+            self.device_id = device_id
+        if device_id != self.device_id:
+            return
+        with self._data_lock:
+            self.latest_data = last if last is not None else {
+                "temp": float(temp[-1]), "volt": float(volt[-1]),
+                "curr": float(curr[-1]), "relay": bool(relay[-1])}
+        self.buffer.extend(ts, temp, volt, curr, relay, raw)
+        if self.last_received_time:
+            self.m_interarrival.observe(float(ts[0]) - self.last_received_time)
+        self.last_received_time = float(ts[-1])
+        self._signal_data()
+
+    def _signal_data(self):
+        if not self._data_signaled:
+            self._data_signaled = True
+            if self.on_data is not None:
+                self.on_data()
+
+    @property
+    def data_pending(self):
+        """True kalau ada sample baru yang belum diambil reader sejak ack terakhir"""
+        return self._data_signaled
+
+    def ack_data_signal(self):
+        """Dipanggil reader SEBELUM drain_since: sample yang masuk setelahnya memicu signal baru"""
+        self._data_signaled = False
+
+    def select_device(self, device_id):
+        """Ganti device yang dipantau GUI. Latch + state rule per device tidak disentuh"""
+        self.device_id = device_id
+        self.last_received_time = 0
+
+    def command_topic(self, device_id=None):
+        device_id = device_id or self.device_id or LEGACY_DEVICE
+        if device_id == LEGACY_DEVICE:
+            return f"{TOPIC_ROOT}/control/relay"
+        return f"{TOPIC_ROOT}/{device_id}/control/relay"
+
+    def send_command(self, cmd, device_id=None):
         """Kirim perintah kontrol ke ESP32"""
         # cmd bisa "ON" atau "OFF"
         if self.is_connected:
-            self.client.publish("smartamp/control/relay", cmd)
+            self.client.publish(self.command_topic(device_id), cmd)
+            self.m_commands.inc(label=cmd)
             print(f"Command Sent: {cmd}")
 
     def get_data(self):
-        """Diambil oleh GUI untuk update grafik"""
-        return self.latest_data
+        """Diambil oleh GUI untuk update grafik (salinan, aman dari thread lain)"""
+        with self._data_lock:
+            return dict(self.latest_data)
 
     def check_online_status(self):
         """Cek apakah ESP32 masih hidup (Heartbeat)"""
@@ -0,0 +1,213 @@
+"""
+Metrics Registry - Prometheus Text Exporter
+Counter / Gauge / Histogram in-process yang cukup murah untuk hot path
+on_message (satu dict lookup + penjumlahan, tanpa lock). Nilai yang sudah
+dihitung di tempat lain (trip_count, queue depth, ...) didaftarkan sebagai
+callback dan baru dibaca saat export.
+
+Export: registry.render() (Prometheus text format 0.0.4), registry.dump(path),
+atau endpoint HTTP lokal registry.serve(port) -> http://127.0.0.1:<port>/metrics
+"""
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default bucket inter-arrival / durasi (detik)
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help="", label=None, fn=None):
+        self.name = name
+        self.help = help
+        self.label = label      # Satu nama label opsional (misal "topic")
+        self.fn = fn            # Callback: nilai dibaca saat export
+        self.values = {}
+
+    def samples(self):
+        """Yield (suffix, label_names, label_values, value)"""
+        if self.fn is not None:
+            yield "", (), (), self.fn()
+            return
+        for key, value in list(self.values.items()):
+            if key is None:
+                yield "", (), (), value
+            else:
+                yield "", (self.label,), (key,), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(names, values)} {_fmt(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n=1, label=None):
+        values = self.values
+        values[label] = values.get(label, 0) + n
+
+    def get(self, label=None):
+        return self.fn() if self.fn is not None else self.values.get(label, 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, label=None):
+        self.values[label] = value
+
+    def get(self, label=None):
+        return self.fn() if self.fn is not None else self.values.get(label, 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=TIME_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)   # bucket terakhir = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, x):
+        self.counts[bisect.bisect_left(self.buckets, x)] += 1
+        self.sum += x
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), list(self.counts)):
+            cumulative += n
+            yield "_bucket", ("le",), (_fmt(bound),), cumulative
+        yield "_sum", (), (), self.sum
+        yield "_count", (), (), self.count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()   # Hanya untuk registrasi, bukan update nilai
+        self._server = None
+        self._dumper = None
+        self._stop = threading.Event()
+
+    def _get_or_create(self, cls, name, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            elif kwargs.get("fn") is not None:
+                metric.fn = kwargs["fn"]  # Pemilik terbaru (misal IoTClient baru) menang
+            return metric
+
+    def counter(self, name, help="", label=None, fn=None):
+        return self._get_or_create(Counter, name, help=help, label=label, fn=fn)
+
+    def gauge(self, name, help="", label=None, fn=None):
+        return self._get_or_create(Gauge, name, help=help, label=label, fn=fn)
+
+    def histogram(self, name, help="", buckets=TIME_BUCKETS):
+        return self._get_or_create(Histogram, name, help=help, buckets=buckets)
+
+    def unregister(self, name):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self):
+        """Semua metric dalam Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # Callback gagal (objek sudah ditutup) tidak boleh merusak export lain
+                lines.append(f"# ERROR {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Tulis snapshot ke file (atomic: tmp lalu os.replace)"""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    # --- Export di background ---
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Endpoint HTTP /metrics di thread daemon. Default hanya localhost"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Jangan spam stdout setiap scrape
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics at http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def start_dumper(self, path, interval=10.0):
+        """Dump ke file setiap interval detik (dan sekali lagi saat stop)"""
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+        self._dumper = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+        self._dumper.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._dumper is not None:
+            self._dumper.join(timeout=2)
+            self._dumper = None
+
+
+# Registry default satu proses
+REGISTRY = Registry()
+
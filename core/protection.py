@@ -0,0 +1,225 @@
+"""
+Protection Engine - Event Driven Safety Latch
+Evaluasi OR/AND/XOR untuk setiap sample langsung di thread MQTT,
+latch trip, dan publish OFF tanpa menunggu loop GUI.
+Latch dan state rule disimpan per device: trip di device mana pun di fleet
+mengunci device itu saja dan OFF dikirim ke topik device tersebut. Ganti
+device yang ditampilkan GUI tidak menyentuh latch.
+Rule tambahan (core.rules) dievaluasi setelah gate; rule dengan action "trip"
+ikut mengunci latch, rule "alarm" hanya ditampilkan.
+"""
+import threading
+import time
+from collections import deque
+import numpy as np
+
+from .rules import RuleEngine
+
+GATES = ("OR", "AND", "XOR")
+SETTINGS = ("setpoint_temp", "setpoint_curr", "gate", "force_short")
+
+
+class _DeviceLatch:
+    __slots__ = ("latched", "trip_count", "last_trip_time", "last_publish")
+
+    def __init__(self, latched=False, trip_count=0, last_trip_time=0.0):
+        self.latched = latched
+        self.trip_count = trip_count
+        self.last_trip_time = last_trip_time
+        self.last_publish = 0.0
+
+    def to_dict(self):
+        return {"latched": self.latched, "trip_count": self.trip_count, "last_trip_time": self.last_trip_time}
+
+
+class ProtectionEngine:
+    def __init__(self, setpoint_temp=60.0, setpoint_curr=2.0, gate="OR",
+                 publish=None, resend_interval=0.5, rules=()):
+        self._lock = threading.Lock()
+        self.setpoint_temp = setpoint_temp
+        self.setpoint_curr = setpoint_curr
+        self.gate = gate
+        self.publish = publish  # callable(cmd, device_id), biasanya IoTClient.send_command
+        # callable(method, settings): engine cermin di GUI meneruskan configure/reset ke proses ingest
+        self.forward = None
+        self.resend_interval = resend_interval
+
+        self.force_short = False  # Simulasi short circuit dari GUI
+        self._latches = {}        # device_id -> _DeviceLatch
+        self.trip_count = 0       # Total trip semua device
+        self.last_trip_time = 0.0
+        self.last_trip_device = None
+
+        self.rules = RuleEngine(rules)
+
+        # Latency message-arrival -> publish OFF (nanodetik)
+        self.latencies_ns = deque(maxlen=1000)
+
+    def configure(self, **settings):
+        """Update setpoint / gate / force_short (dipanggil dari thread GUI)"""
+        with self._lock:
+            for key, value in settings.items():
+                if key not in SETTINGS:
+                    raise AttributeError(f"Unknown protection setting: {key}")
+                if key == "gate" and value not in GATES:
+                    raise ValueError(f"Unknown gate type: {value}")
+                setattr(self, key, value)
+        if self.forward is not None:
+            self.forward("configure", settings)
+
+    def set_rules(self, rules):
+        """Ganti rule set (list Rule / dict); di-compile sekali di sini"""
+        engine = RuleEngine(rules)
+        with self._lock:
+            self.rules = engine
+
+    def rule_status(self, device_id=None):
+        with self._lock:
+            return self.rules.status(device_id)
+
+    def reset_rules(self, device_id=None):
+        """State hysteresis/debounce satu device dibuang (misal device diganti hardware-nya)"""
+        with self._lock:
+            self.rules.reset(device_id)
+
+    @property
+    def latched(self):
+        """True kalau ada device yang terkunci"""
+        return any(latch.latched for latch in list(self._latches.values()))
+
+    def is_latched(self, device_id):
+        latch = self._latches.get(device_id)
+        return latch is not None and latch.latched
+
+    def latched_devices(self):
+        return [d for d, latch in list(self._latches.items()) if latch.latched]
+
+    def device_trip_count(self, device_id):
+        latch = self._latches.get(device_id)
+        return 0 if latch is None else latch.trip_count
+
+    def clamp(self, temp, curr):
+        """
+        Arus negatif -> 0 dan override simulasi short circuit. Kalibrasi sudah
+        diterapkan saat ingest (CalibrationStore). Returns: (temp, curr)
+        """
+        curr = max(curr, 0.0)
+        if self.force_short:
+            curr = self.setpoint_curr + 1.5
+        return temp, curr
+
+    def check(self, temp, curr):
+        """
+        Evaluasi gate untuk nilai yang sudah dikalibrasi.
+        Returns: (is_over_temp, is_short_circuit, protect_trigger)
+        """
+        a = temp > self.setpoint_temp
+        b = curr > self.setpoint_curr
+        if self.gate == "OR": out = a or b
+        elif self.gate == "AND": out = a and b
+        elif self.gate == "XOR": out = a != b
+        else: out = False
+        return a, b, out
+
+    def process(self, temp, curr, relay_on, t_arrival_ns=None, volt=0.0, ts=None, device_id=None):
+        """Dipanggil untuk setiap sample masuk (semua device). Returns: True kalau device ini terkunci"""
+        with self._lock:
+            temp, curr = self.clamp(temp, curr)
+            _, _, out = self.check(temp, curr)
+            # Gate dulu: OFF tidak menunggu evaluasi rule
+            latched = self._latch(device_id, out, relay_on, t_arrival_ns)
+            if len(self.rules):
+                fired = self.rules.evaluate_one(time.time() if ts is None else ts, temp, volt, curr, key=device_id)
+                if any(f for f, trip in zip(fired, self.rules.trip_mask) if trip):
+                    latched = self._latch(device_id, True, relay_on, t_arrival_ns)
+            return latched
+
+    def process_batch(self, temps, currs, relays, t_arrival_ns=None, volts=None, ts=None, device_id=None):
+        """Versi vektor dari process() untuk batch / frame biner"""
+        with self._lock:
+            temps = np.asarray(temps, dtype=np.float64)
+            currs = np.maximum(np.asarray(currs, dtype=np.float64), 0.0)
+            if self.force_short:
+                currs = np.full_like(currs, self.setpoint_curr + 1.5)
+            a = temps > self.setpoint_temp
+            b = currs > self.setpoint_curr
+            if self.gate == "OR": out = a | b
+            elif self.gate == "AND": out = a & b
+            elif self.gate == "XOR": out = a ^ b
+            else: out = np.zeros_like(a)
+            if len(self.rules):
+                if ts is None:
+                    ts = np.full(len(temps), time.time())
+                volts = np.zeros(len(temps)) if volts is None else volts
+                fired = self.rules.evaluate(np.asarray(ts)[None], temps[None], np.asarray(volts)[None],
+                                            currs[None], keys=[device_id])[:, 0, :]
+                out = out | fired[self.rules.trip_mask].any(axis=0)
+
+            tripped = bool(out.any())
+            relays = np.asarray(relays, dtype=bool)
+            # Relay dianggap ON kalau ada sample ON sejak trip pertama di batch ini
+            first = int(np.argmax(out)) if tripped and not self.is_latched(device_id) else 0
+            return self._latch(device_id, tripped, bool(relays[first:].any()), t_arrival_ns)
+
+    def _latch(self, device_id, out, relay_on, t_arrival_ns):
+        latch = self._latches.get(device_id)
+        if latch is None:
+            latch = self._latches[device_id] = _DeviceLatch()
+        now = time.time()
+        if out and not latch.latched:
+            latch.latched = True
+            latch.trip_count += 1
+            latch.last_trip_time = now
+            latch.last_publish = 0.0
+            self.trip_count += 1
+            self.last_trip_time = now
+            self.last_trip_device = device_id
+
+        # Safety latch: selama terkunci, relay yang masih ON dipaksa OFF
+        if latch.latched and relay_on and now - latch.last_publish >= self.resend_interval:
+            latch.last_publish = now
+            if self.publish is not None:
+                self.publish("OFF", device_id)
+            if t_arrival_ns is not None:
+                self.latencies_ns.append(time.perf_counter_ns() - t_arrival_ns)
+        return latch.latched
+
+    def get_state(self):
+        """Latch per device + statistik trip untuk snapshot warm restart"""
+        with self._lock:
+            # Key JSON harus string: device None (tanpa id) disimpan sebagai ""
+            return {"trip_count": self.trip_count, "last_trip_time": self.last_trip_time,
+                    "last_trip_device": self.last_trip_device,
+                    "devices": {("" if d is None else d): latch.to_dict() for d, latch in self._latches.items()}}
+
+    def set_state(self, state):
+        """Latch yang tersimpan tetap terkunci setelah restart: relay ON berikutnya dipaksa OFF"""
+        with self._lock:
+            self._latches = {(d or None): _DeviceLatch(bool(v.get("latched", False)), int(v.get("trip_count", 0)),
+                                                       float(v.get("last_trip_time", 0.0)))
+                             for d, v in state.get("devices", {}).items()}
+            self.trip_count = int(state.get("trip_count", 0))
+            self.last_trip_time = float(state.get("last_trip_time", 0.0))
+            self.last_trip_device = state.get("last_trip_device")
+
+    def reset(self, device_id=None):
+        """Manual reset oleh operator (Non-Self-Resetting). device_id None = semua device"""
+        with self._lock:
+            for d, latch in self._latches.items():
+                if device_id is None or d == device_id:
+                    latch.latched = False
+        if self.forward is not None:
+            self.forward("reset", {"device_id": device_id})
+
+    def latency_stats(self):
+        """Statistik latency trip dalam mikrodetik: dict(count, p50, p99, max)"""
+        samples = sorted(self.latencies_ns)
+        if not samples:
+            return {"count": 0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        n = len(samples)
+        return {
+            "count": n,
+            "p50": samples[n // 2] / 1000.0,
+            "p99": samples[min(n - 1, int(n * 0.99))] / 1000.0,
+            "max": samples[-1] / 1000.0,
+        }
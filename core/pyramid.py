@@ -0,0 +1,153 @@
+"""
+Downsampling Pyramid - Multi-Resolution History
+Bucket min/max/mean per level (1 s, 10 s, 1 min, 10 min, 1 h) yang di-update
+incremental setiap sample masuk. Query zoom apa pun cukup membaca level yang
+jumlah bucket-nya ~ jumlah pixel, tanpa scan data mentah. Envelope min/max
+menjaga spike tetap terlihat setelah downsampling.
+"""
+import numpy as np
+
+# (lebar bucket detik, retensi jumlah bucket)
+DEFAULT_LEVELS = (
+    (1, 6 * 3600),        # 6 jam
+    (10, 3 * 24 * 360),   # 3 hari
+    (60, 30 * 24 * 60),   # 30 hari
+    (600, 365 * 24 * 6),  # 1 tahun
+    (3600, 5 * 365 * 24), # 5 tahun
+)
+
+# Kolom tetap: waktu awal bucket + jumlah sample
+_T = 0
+_N = 1
+
+
+class _Level:
+    """Satu resolusi. Array 2x retensi, di-compact kalau penuh supaya data selalu contiguous"""
+
+    def __init__(self, width, retention, n_signals):
+        self.width = width
+        self.retention = retention
+        self.data = np.zeros((retention * 2, 2 + 3 * n_signals), dtype=np.float64)
+        self.n = 0
+
+    def _make_room(self, extra):
+        if self.n + extra <= len(self.data):
+            return
+        keep = max(self.retention - extra, 0)
+        self.data[:keep] = self.data[self.n - keep:self.n]
+        self.n = keep
+
+    def extend(self, ts, values):
+        """ts monotonic (n,), values (n, n_signals)"""
+        ids = np.floor(ts / self.width)
+        # Batas grup = index di mana bucket berganti
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        counts = np.diff(np.r_[starts, len(ts)])
+        mins = np.minimum.reduceat(values, starts, axis=0)
+        maxs = np.maximum.reduceat(values, starts, axis=0)
+        sums = np.add.reduceat(values, starts, axis=0)
+        bucket_t = ids[starts] * self.width
+
+        first = 0
+        if self.n and self.data[self.n - 1, _T] == bucket_t[0]:
+            # Gabung ke bucket terbuka (terakhir)
+            row = self.data[self.n - 1]
+            row[_N] += counts[0]
+            row[2::3] = np.minimum(row[2::3], mins[0])
+            row[3::3] = np.maximum(row[3::3], maxs[0])
+            row[4::3] += sums[0]
+            first = 1
+
+        m = len(starts) - first
+        if m <= 0:
+            return
+        if m > self.retention:
+            first += m - self.retention
+            m = self.retention
+        self._make_room(m)
+        block = self.data[self.n:self.n + m]
+        block[:, _T] = bucket_t[first:]
+        block[:, _N] = counts[first:]
+        block[:, 2::3] = mins[first:]
+        block[:, 3::3] = maxs[first:]
+        block[:, 4::3] = sums[first:]
+        self.n += m
+
+    def rows(self, t0, t1):
+        view = self.data[:self.n]
+        i0 = int(np.searchsorted(view[:, _T], t0 - self.width, side="right"))
+        i1 = int(np.searchsorted(view[:, _T], t1, side="right"))
+        return view[i0:i1]
+
+
+class DownsamplePyramid:
+    def __init__(self, signals=("temp", "curr"), levels=DEFAULT_LEVELS):
+        self.signals = tuple(signals)
+        self.levels = [_Level(w, r, len(self.signals)) for w, r in levels]
+        self.last_ts = None
+
+    def extend(self, ts, **values):
+        """Tambah batch sample: extend(ts, temp=[...], curr=[...]). ts harus naik"""
+        ts = np.asarray(ts, dtype=np.float64)
+        if not len(ts):
+            return
+        if self.last_ts is not None and ts[0] < self.last_ts:
+            # Sample mundur (clock loncat) dibuang supaya bucket tetap urut
+            keep = ts >= self.last_ts
+            ts = ts[keep]
+            values = {k: np.asarray(v)[keep] for k, v in values.items()}
+            if not len(ts):
+                return
+        cols = np.column_stack([np.asarray(values[s], dtype=np.float64) for s in self.signals])
+        for level in self.levels:
+            level.extend(ts, cols)
+        self.last_ts = float(ts[-1])
+
+    def get_state(self):
+        """Bucket terisi per level (tanpa slot kosong) + last_ts"""
+        state = {"widths": np.array([lv.width for lv in self.levels], dtype=np.float64),
+                 "last_ts": np.float64(np.nan if self.last_ts is None else self.last_ts)}
+        for i, level in enumerate(self.levels):
+            state[f"level{i}"] = level.data[:level.n].copy()
+        return state
+
+    def set_state(self, state):
+        """Kebalikan get_state; diabaikan kalau level / signal tidak cocok"""
+        widths = [lv.width for lv in self.levels]
+        if list(state["widths"]) != widths:
+            return False
+        for i, level in enumerate(self.levels):
+            rows = state[f"level{i}"]
+            if rows.ndim != 2 or rows.shape[1] != level.data.shape[1]:
+                return False
+        for i, level in enumerate(self.levels):
+            rows = state[f"level{i}"][-level.retention:]
+            level.data[:len(rows)] = rows
+            level.n = len(rows)
+        last_ts = float(state["last_ts"])
+        self.last_ts = None if np.isnan(last_ts) else last_ts
+        return True
+
+    def level_for(self, t0, t1, max_points):
+        """Level paling halus yang jumlah bucket-nya <= max_points"""
+        span = max(t1 - t0, 1e-9)
+        for level in self.levels:
+            if span / level.width <= max_points:
+                return level
+        return self.levels[-1]
+
+    def query(self, t0, t1, max_points=1000):
+        """
+        Returns: dict dengan "t" (tengah bucket), "width", dan untuk tiap signal
+        "<signal>_min", "<signal>_max", "<signal>_mean" (NumPy array)
+        """
+        level = self.level_for(t0, t1, max_points)
+        rows = level.rows(t0, t1)
+        count = np.maximum(rows[:, _N], 1)
+        out = {"t": rows[:, _T] + level.width / 2.0, "width": level.width}
+        for i, name in enumerate(self.signals):
+            base = 2 + 3 * i
+            out[f"{name}_min"] = rows[:, base]
+            out[f"{name}_max"] = rows[:, base + 1]
+            out[f"{name}_mean"] = rows[:, base + 2] / count
+        return out
@@ -0,0 +1,329 @@
+"""
+Historical Query - Rollup API over Recorded Sessions
+Scan satu folder rekaman (.smr dan DataLog_*.csv) sekali, simpan sidecar index
+(file -> device, rentang waktu, jumlah record) di .smartamp_index.json, lalu jawab
+query rentang waktu dengan agregat per bucket (min/max/mean/count, 1 s s/d 1 hari).
+Rollup per file per lebar bucket di-cache ke .smartamp_cache/*.npz sehingga
+dashboard yang sama terbuka instan; cache otomatis basi kalau file berubah.
+
+Python:
+    q = RecordingQuery("logs")
+    q.query(t0, t1, bucket="1h", device="amp3")["curr_max"]
+    q.summary(t0, t1, device="amp3")["curr"]["max"]
+CLI:
+    python -m core.query logs index
+    python -m core.query logs query --from 2026-10-13 --to 2026-10-14 --bucket 1h --device amp3
+    python -m core.query logs summary --from 2026-10-13 --to 2026-10-14 --device amp3
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .datalogger import device_tag
+from .recording import EXTENSION, Recording, read_csv_log
+
+INDEX_FILE = ".smartamp_index.json"
+CACHE_DIR = ".smartamp_cache"
+SIGNALS = ("temp", "volt", "curr")
+
+# Lebar bucket yang diizinkan (detik)
+BUCKETS = {"1s": 1, "10s": 10, "1m": 60, "5m": 300, "15m": 900, "1h": 3600, "6h": 21600, "1d": 86400}
+
+# DataLog[_<device>]_YYYYMMDD_HHMMSS[_n].ext
+_NAME_RE = re.compile(r"^DataLog(?:_(?P<device>.+?))?_\d{8}_\d{6}(?:_\d+)?$")
+DEFAULT_DEVICE = "default"
+
+
+def device_from_name(path):
+    m = _NAME_RE.match(os.path.splitext(os.path.basename(path))[0])
+    return (m.group("device") if m and m.group("device") else DEFAULT_DEVICE)
+
+
+def parse_bucket(bucket):
+    """'1h' / 3600 -> detik"""
+    if isinstance(bucket, str):
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket {bucket!r}, use one of {', '.join(BUCKETS)}")
+        return BUCKETS[bucket]
+    width = int(bucket)
+    if not 1 <= width <= 86400:
+        raise ValueError("bucket must be between 1 s and 1 day")
+    return width
+
+
+def load_file(path):
+    """Structured array REC_DTYPE; .smr lewat memmap (tanpa copy)"""
+    if path.endswith(EXTENSION):
+        return Recording(path).data
+    return read_csv_log(path)
+
+
+def _rollup(rec, width, origin):
+    """Agregat per bucket untuk satu array record yang terurut waktu"""
+    out = {"bucket": np.zeros(0, np.int64), "count": np.zeros(0, np.int64),
+           "prot_count": np.zeros(0, np.int64)}
+    for sig in SIGNALS:
+        for agg in ("min", "max", "sum"):
+            out[f"{sig}_{agg}"] = np.zeros(0)
+    if not len(rec):
+        return out
+    ids = np.floor((rec["ts"] - origin) / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    out["bucket"] = ids[starts]
+    out["count"] = np.diff(np.r_[starts, len(ids)])
+    out["prot_count"] = np.add.reduceat(rec["prot"].astype(np.int64), starts)
+    for sig in SIGNALS:
+        v = np.asarray(rec[sig], dtype=np.float64)
+        out[f"{sig}_min"] = np.minimum.reduceat(v, starts)
+        out[f"{sig}_max"] = np.maximum.reduceat(v, starts)
+        out[f"{sig}_sum"] = np.add.reduceat(v, starts)
+    return out
+
+
+def _merge(parts):
+    """Gabung rollup beberapa file; bucket yang sama (lintas file) digabung"""
+    if not parts:
+        return _rollup(np.zeros(0, dtype=[("ts", "f8")]), 1, 0)
+    cat = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    order = np.argsort(cat["bucket"], kind="stable")
+    cat = {k: v[order] for k, v in cat.items()}
+    ids = cat["bucket"]
+    if not len(ids):
+        return cat
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    out = {"bucket": ids[starts]}
+    for k, v in cat.items():
+        if k == "bucket":
+            continue
+        if k.endswith("_min"):
+            out[k] = np.minimum.reduceat(v, starts)
+        elif k.endswith("_max"):
+            out[k] = np.maximum.reduceat(v, starts)
+        else:
+            out[k] = np.add.reduceat(v, starts)
+    return out
+
+
+class RecordingQuery:
+    def __init__(self, directory=".", refresh=True):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.cache_dir = os.path.join(directory, CACHE_DIR)
+        # Bucket >= 1 jam disejajarkan ke tengah malam lokal
+        self.origin = -datetime.now().astimezone().utcoffset().total_seconds()
+        self.index = self._load_index()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if refresh:
+            self.refresh()
+
+    # --- Index ---
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    def refresh(self):
+        """Scan folder; hanya file baru / berubah (size, mtime) yang dibaca ulang"""
+        smr = glob.glob(os.path.join(self.directory, "*" + EXTENSION))
+        stems = {os.path.splitext(p)[0] for p in smr}
+        # CSV yang sudah dikonversi ke .smr tidak dihitung dua kali
+        csvs = [p for p in glob.glob(os.path.join(self.directory, "DataLog_*.csv"))
+                if os.path.splitext(p)[0] not in stems]
+        index = {}
+        changed = False
+        for path in sorted(smr + csvs):
+            name = os.path.basename(path)
+            st = os.stat(path)
+            entry = self.index.get(name)
+            if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+                index[name] = entry
+                continue
+            try:
+                rec = load_file(path)
+            except (ValueError, OSError) as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            if not len(rec):
+                continue
+            index[name] = {"size": st.st_size, "mtime": st.st_mtime, "device": device_from_name(path),
+                           "t0": float(rec["ts"][0]), "t1": float(rec["ts"][-1]), "records": len(rec)}
+            changed = True
+        if changed or set(index) != set(self.index):
+            self.index = index
+            self._save_index()
+        return self.index
+
+    def devices(self):
+        return sorted({e["device"] for e in self.index.values()})
+
+    def files(self, t0=None, t1=None, device=None):
+        """Nama file yang overlap [t0, t1), urut waktu"""
+        device = device_tag(device) if device else None
+        hits = [(e["t0"], name) for name, e in self.index.items()
+                if (device is None or e["device"] == device)
+                and (t0 is None or e["t1"] >= t0) and (t1 is None or e["t0"] < t1)]
+        return [name for _, name in sorted(hits)]
+
+    # --- Rollup cache ---
+    def _file_rollup(self, name, width):
+        entry = self.index[name]
+        origin = self.origin if width >= 3600 else 0.0
+        stem = os.path.splitext(name)[0]
+        cache_path = os.path.join(self.cache_dir, f"{stem}.{width}s.{int(origin)}.npz")
+        try:
+            with np.load(cache_path) as z:
+                if float(z["src_size"]) == entry["size"] and float(z["src_mtime"]) == entry["mtime"]:
+                    self.cache_hits += 1
+                    return {k: z[k] for k in z.files if not k.startswith("src_")}
+        except (OSError, ValueError, KeyError):
+            pass
+        self.cache_misses += 1
+        rec = load_file(os.path.join(self.directory, name))
+        roll = _rollup(rec, width, origin)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        buf = io.BytesIO()
+        np.savez(buf, src_size=entry["size"], src_mtime=entry["mtime"], **roll)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, cache_path)
+        return roll
+
+    # --- Query ---
+    def query(self, t0, t1, bucket="1m", device=None):
+        """
+        Agregat per bucket untuk bucket yang overlap [t0, t1).
+        Returns: dict "t" (awal bucket, epoch), "width", "count", "prot_count", dan untuk
+        tiap signal "<sig>_min", "<sig>_max", "<sig>_mean". Bucket kosong tidak ada di hasil.
+        """
+        width = parse_bucket(bucket)
+        origin = self.origin if width >= 3600 else 0.0
+        lo = np.floor((t0 - origin) / width)
+        hi = np.floor((t1 - origin) / width)
+        parts = []
+        for name in self.files(t0, t1, device):
+            roll = self._file_rollup(name, width)
+            keep = (roll["bucket"] >= lo) & (roll["bucket"] <= hi)
+            parts.append({k: v[keep] for k, v in roll.items()})
+        merged = _merge(parts)
+        count = merged["count"]
+        out = {"t": merged["bucket"] * float(width) + origin, "width": width,
+               "count": count, "prot_count": merged["prot_count"]}
+        for sig in SIGNALS:
+            out[f"{sig}_min"] = merged[f"{sig}_min"]
+            out[f"{sig}_max"] = merged[f"{sig}_max"]
+            out[f"{sig}_mean"] = merged[f"{sig}_sum"] / np.maximum(count, 1)
+        return out
+
+    def summary(self, t0, t1, device=None):
+        """Agregat exact untuk seluruh [t0, t1) dibaca langsung dari rekaman (termasuk waktu puncak)"""
+        slices = []
+        for name in self.files(t0, t1, device):
+            rec = load_file(os.path.join(self.directory, name))
+            ts = rec["ts"]
+            i0, i1 = np.searchsorted(ts, t0, side="left"), np.searchsorted(ts, t1, side="left")
+            slices.append(rec[i0:i1])
+        data = np.concatenate(slices) if slices else None
+        out = {"count": 0 if data is None else len(data), "files": len(slices)}
+        if not out["count"]:
+            return out
+        out["prot_count"] = int(data["prot"].sum())
+        for sig in SIGNALS:
+            v = data[sig]
+            i_min, i_max = int(np.argmin(v)), int(np.argmax(v))
+            out[sig] = {"min": float(v[i_min]), "min_at": float(data["ts"][i_min]),
+                        "max": float(v[i_max]), "max_at": float(data["ts"][i_max]),
+                        "mean": float(v.mean())}
+        return out
+
+    def history(self, t0, t1, max_points=1000, device=None, signals=("temp", "curr")):
+        """
+        Bentuk sama seperti DownsamplePyramid.query (dipakai HistoryView):
+        bucket terkecil yang jumlahnya <= max_points, "t" = tengah bucket
+        """
+        span = max(t1 - t0, 1e-9)
+        width = next((w for w in sorted(BUCKETS.values()) if span / w <= max_points), BUCKETS["1d"])
+        q = self.query(t0, t1, bucket=width, device=device)
+        out = {"t": q["t"] + width / 2.0, "width": width}
+        for sig in signals:
+            for agg in ("min", "max", "mean"):
+                out[f"{sig}_{agg}"] = q[f"{sig}_{agg}"]
+        return out
+
+
+# --- CLI ---
+def _parse_time(text):
+    if text == "now":
+        return time.time()
+    return datetime.fromisoformat(text).timestamp()
+
+
+def _fmt_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query recorded SmartAmp sessions")
+    parser.add_argument("directory", help="Folder with DataLog_*.csv / .smr files")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("index", help="Rebuild / show the sidecar index")
+    for name in ("query", "summary"):
+        p = sub.add_parser(name)
+        p.add_argument("--from", dest="t0", required=True, help="ISO time, e.g. 2026-10-13 or 2026-10-13T08:00")
+        p.add_argument("--to", dest="t1", default="now")
+        p.add_argument("--device", default=None)
+        if name == "query":
+            p.add_argument("--bucket", default="1h", help=", ".join(BUCKETS))
+            p.add_argument("--signal", choices=SIGNALS, default=None, help="Only show one signal")
+    args = parser.parse_args(argv)
+
+    t_start = time.perf_counter()
+    q = RecordingQuery(args.directory)
+    if args.cmd == "index":
+        for name in q.files():
+            e = q.index[name]
+            print(f"{name:<45} {e['device']:<12} {_fmt_ts(e['t0'])} .. {_fmt_ts(e['t1'])} {e['records']:>10,}")
+        print(f"{len(q.index)} files, devices: {', '.join(q.devices()) or '-'}")
+        return
+
+    t0, t1 = _parse_time(args.t0), _parse_time(args.t1)
+    if args.cmd == "summary":
+        s = q.summary(t0, t1, device=args.device)
+        print(f"{s['count']:,} samples from {s['files']} files")
+        for sig in SIGNALS:
+            if sig in s:
+                v = s[sig]
+                print(f"  {sig:<5} min {v['min']:9.3f} @ {_fmt_ts(v['min_at'])} | max {v['max']:9.3f} @ "
+                      f"{_fmt_ts(v['max_at'])} | mean {v['mean']:9.3f}")
+        if s["count"]:
+            print(f"  protection active in {s['prot_count']:,} samples")
+    else:
+        r = q.query(t0, t1, bucket=args.bucket, device=args.device)
+        sigs = (args.signal,) if args.signal else SIGNALS
+        print("bucket              " + "".join(f"{s + ' min':>11}{s + ' max':>11}{s + ' mean':>11}" for s in sigs)
+              + "      count")
+        for i in range(len(r["t"])):
+            print(f"{_fmt_ts(r['t'][i])} "
+                  + "".join(f"{r[s + '_min'][i]:11.3f}{r[s + '_max'][i]:11.3f}{r[s + '_mean'][i]:11.3f}" for s in sigs)
+                  + f"{r['count'][i]:11,}")
+    print(f"({(time.perf_counter() - t_start) * 1000:.1f} ms, cache {q.cache_hits} hit / {q.cache_misses} miss)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Binary Recording - Compact Columnar Log (.smr)
+Append-only file: header kecil + record fixed-width (epoch ts + float64 + uint8).
+Reader memakai numpy.memmap sehingga log berhari-hari terbuka instan
+dan slicing berdasarkan waktu tanpa copy.
+
+Layout header (64 byte, little-endian):
+  8s magic "SMARTREC" | u16 version | u16 header_size | u16 record_size | f8 created_epoch
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import struct
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .datalogger import BackgroundLogger
+
+MAGIC = b"SMARTREC"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = struct.Struct("<8sHHHd")
+EXTENSION = ".smr"
+
+REC_DTYPE = np.dtype([
+    ("ts", "<f8"),    # epoch detik
+    ("temp", "<f8"),
+    ("volt", "<f8"),
+    ("curr", "<f8"),
+    ("prot", "u1"),   # Protection_Active
+])
+
+
+def write_header(f, created=None):
+    head = HEADER.pack(MAGIC, VERSION, HEADER_SIZE, REC_DTYPE.itemsize,
+                       time.time() if created is None else created)
+    f.write(head.ljust(HEADER_SIZE, b"\0"))
+
+
+def rows_to_records(rows):
+    """List tuple (ts, temp, volt, curr, prot) -> structured array"""
+    return np.array([tuple(r) for r in rows], dtype=REC_DTYPE)
+
+
+class BinaryLogger(BackgroundLogger):
+    """Sama seperti CsvLogger, tapi menulis .smr"""
+    extension = EXTENSION
+
+    def _open_file(self, path):
+        f = open(path, "wb")
+        write_header(f)
+        return f
+
+    def _write_rows(self, rows):
+        self._file.write(rows_to_records(rows).tobytes())
+
+
+class Recording:
+    """Reader .smr berbasis numpy.memmap (zero copy)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, ver, header_size, rec_size, created = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or ver != VERSION or rec_size != REC_DTYPE.itemsize:
+            raise ValueError(f"Not a SmartAmp recording: {path}")
+        self.created = created
+        # Record terakhir yang belum lengkap (writer sedang menulis) diabaikan
+        n = (os.path.getsize(path) - header_size) // rec_size
+        if n > 0:
+            self.data = np.memmap(path, dtype=REC_DTYPE, mode="r", offset=header_size, shape=(n,))
+        else:
+            self.data = np.zeros(0, dtype=REC_DTYPE)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, column):
+        """Kolom sebagai view, misal rec["curr"]"""
+        return self.data[column]
+
+    def time_range(self):
+        if not len(self.data):
+            return None, None
+        return float(self.data["ts"][0]), float(self.data["ts"][-1])
+
+    def slice_time(self, t0=None, t1=None):
+        """Record dengan t0 <= ts < t1 (view ke memmap, bukan copy)"""
+        ts = self.data["ts"]
+        i0 = 0 if t0 is None else int(np.searchsorted(ts, t0, side="left"))
+        i1 = len(ts) if t1 is None else int(np.searchsorted(ts, t1, side="left"))
+        return self.data[i0:i1]
+
+
+# --- CSV -> Binary ---
+_NAME_RE = re.compile(r"(\d{8})_(\d{6})")
+
+
+def read_csv_log(csv_path):
+    """
+    Baca DataLog_*.csv lama jadi structured array REC_DTYPE.
+    Tanggal diambil dari nama file, jam dari kolom Time (rollover tengah malam ditangani).
+    """
+    m = _NAME_RE.search(os.path.basename(csv_path))
+    if m:
+        start = datetime.strptime(m.group(1) + m.group(2), "%Y%m%d%H%M%S")
+    else:
+        start = datetime.fromtimestamp(os.path.getmtime(csv_path))
+    day = datetime(start.year, start.month, start.day)
+
+    rows = []
+    prev = None
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) < 5:
+                continue
+            h, mi, sec = (int(x) for x in row[0].split(":"))
+            secs = h * 3600 + mi * 60 + sec
+            if prev is not None and secs < prev:
+                day += timedelta(days=1)
+            prev = secs
+            ts = (day + timedelta(seconds=secs)).timestamp()
+            rows.append((ts, float(row[1]), float(row[2]), float(row[3]),
+                         1 if row[4].strip().lower() in ("true", "1") else 0))
+    return rows_to_records(rows)
+
+
+def csv_to_binary(csv_path, out_path=None, overwrite=False):
+    """Konversi satu DataLog_*.csv ke .smr. Returns: path output"""
+    out_path = out_path or os.path.splitext(csv_path)[0] + EXTENSION
+    if not overwrite and os.path.exists(out_path):
+        raise FileExistsError(f"{out_path} already exists")
+    records = read_csv_log(csv_path)
+    with open(out_path, "wb") as f:
+        write_header(f, created=float(records["ts"][0]) if len(records) else None)
+        f.write(records.tobytes())
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SmartAmp binary recording tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_conv = sub.add_parser("convert", help="Convert DataLog_*.csv to .smr")
+    p_conv.add_argument("files", nargs="+", help="CSV files or glob patterns")
+    p_conv.add_argument("--force", action="store_true", help="Overwrite existing .smr files")
+    p_info = sub.add_parser("info", help="Show record count and time range")
+    p_info.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    paths = [p for pattern in args.files for p in (glob.glob(pattern) or [pattern])]
+    for path in paths:
+        if args.cmd == "convert":
+            out = csv_to_binary(path, overwrite=args.force)
+            print(f"{path} -> {out} ({len(Recording(out))} records)")
+        else:
+            rec = Recording(path)
+            t0, t1 = rec.time_range()
+            span = "-" if t0 is None else f"{datetime.fromtimestamp(t0)} .. {datetime.fromtimestamp(t1)}"
+            print(f"{path}: {len(rec)} records, {span}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Session Replay - Offline Data Source
+Memutar ulang DataLog_*.csv / .smr dengan interface yang sama seperti IoTClient
+(get_data, check_online_status, send_command) pada kecepatan 1x, Nx,
+atau secepat mungkin (speed=0) tanpa hardware / broker.
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from .iot_client import IoTClient
+from .protection import ProtectionEngine
+from .rules import load_rules
+from .recording import EXTENSION, Recording, read_csv_log
+
+REPLAY_DEVICE = "replay"
+
+
+def load_records(path):
+    """Structured array REC_DTYPE dari file .smr atau .csv"""
+    if path.endswith(EXTENSION):
+        return np.asarray(Recording(path).data)
+    return read_csv_log(path)
+
+
+class ReplayClient(IoTClient):
+    def __init__(self, path, speed=1.0, chunk=256):
+        # Tidak pernah connect ke broker: jangan ambil slot default_client_id milik GUI/service
+        super().__init__(client_id=f"smartamp-replay-{os.getpid()}")
+        self.path = path
+        self.speed = speed    # 0 / None = as fast as possible
+        self.chunk = chunk    # Ukuran batch di mode as-fast-as-possible
+        self.broker = f"replay:{path}"
+        self.records = load_records(path)
+
+        self.relay_state = True  # Relay virtual, mengikuti perintah ON/OFF
+        self.commands = []       # (wall_ts, cmd) untuk analisis trip offline
+        self.samples_pushed = 0
+        self.elapsed = 0.0
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Posisi reader (GUI) untuk backpressure di mode as-fast-as-possible
+        self.consumer_cursor = None
+
+    # --- Interface IoTClient ---
+    def connect_broker(self, broker_address=None):
+        self._stop.clear()
+        self.finished.clear()
+        self.is_connected = True
+        self._thread = threading.Thread(target=self._run, name="ReplayClient", daemon=True)
+        self._thread.start()
+        return True
+
+    def disconnect_broker(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.is_connected = False
+
+    def send_command(self, cmd, device_id=None):
+        self.commands.append((time.time(), cmd))
+        self.relay_state = (cmd == "ON")
+        print(f"Command Sent (replay): {cmd}")
+
+    def check_online_status(self):
+        return self.is_connected and not self.finished.is_set()
+
+    def ack(self, cursor):
+        """Dipanggil reader setelah drain_since, membatasi seberapa jauh replay boleh mendahului"""
+        self.consumer_cursor = cursor
+
+    @property
+    def samples_per_second(self):
+        return self.samples_pushed / self.elapsed if self.elapsed > 0 else 0.0
+
+    # --- Replay thread ---
+    def _wait_for_consumer(self):
+        limit = self.buffer.capacity // 2
+        while (self.consumer_cursor is not None and not self._stop.is_set()
+               and self.buffer.write_seq - self.consumer_cursor > limit):
+            time.sleep(0.001)
+
+    def _run(self):
+        rec = self.records
+        t_start = time.perf_counter()
+        wall0 = time.time()
+        rec_t0 = float(rec["ts"][0]) if len(rec) else 0.0
+        step = 1 if self.speed else self.chunk
+
+        for i in range(0, len(rec), step):
+            if self._stop.is_set():
+                break
+            block = rec[i:i + step]
+            if self.speed:
+                # Tunggu sampai waktu rekaman (diskalakan) tercapai
+                delay = (float(block["ts"][0]) - rec_t0) / self.speed - (time.perf_counter() - t_start)
+                if delay > 0:
+                    self._stop.wait(delay)
+                row = block[0]
+                self._ingest(REPLAY_DEVICE, time.time(), float(row["temp"]), float(row["volt"]),
+                             float(row["curr"]), self.relay_state, time.perf_counter_ns())
+            else:
+                self._wait_for_consumer()
+                n = len(block)
+                ts = wall0 + (block["ts"] - rec_t0)
+                self._ingest_batch(REPLAY_DEVICE, ts, block["temp"], block["volt"], block["curr"],
+                                   np.full(n, self.relay_state), time.perf_counter_ns())
+            self.samples_pushed += len(block)
+
+        # Mode as-fast-as-possible: hitung sampai reader selesai mengambil semua sample
+        if not self.speed:
+            while (self.consumer_cursor is not None and not self._stop.is_set()
+                   and self.consumer_cursor < self.buffer.write_seq):
+                time.sleep(0.001)
+        self.elapsed = time.perf_counter() - t_start
+        print(f"Replay finished: {self.samples_pushed} samples in {self.elapsed:.2f} s "
+              f"({self.samples_per_second:,.0f} samples/s)")
+        self.finished.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a SmartAmp recording through ingest + protection")
+    parser.add_argument("path", help="DataLog_*.csv or .smr file")
+    parser.add_argument("--speed", type=float, default=0, help="Replay speed factor (0 = as fast as possible)")
+    parser.add_argument("--temp", type=float, default=60.0, help="Temperature setpoint (C)")
+    parser.add_argument("--curr", type=float, default=2.0, help="Current setpoint (A)")
+    parser.add_argument("--gate", default="OR", choices=["OR", "AND", "XOR"])
+    parser.add_argument("--rules", metavar="FILE", help="JSON list of extra rules (see core/rules.py)")
+    args = parser.parse_args(argv)
+
+    client = ReplayClient(args.path, speed=args.speed)
+    engine = ProtectionEngine(setpoint_temp=args.temp, setpoint_curr=args.curr, gate=args.gate,
+                              rules=load_rules(args.rules, default=()) if args.rules else ())
+    client.attach_protection(engine)
+    client.connect_broker()
+    client.finished.wait()
+    print(f"Trips: {engine.trip_count} | Commands: {len(client.commands)} | Latency: {engine.latency_stats()}")
+    for rule in engine.rule_status():
+        print(f"  rule {rule['name']:<16} {rule['action']:<5} fired {rule['count']}x  ({rule['expr']})")
+
+
+if __name__ == "__main__":
+    main()
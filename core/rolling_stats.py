@@ -0,0 +1,186 @@
+"""
+Rolling Statistics - Incremental Window Stats
+Min/max O(1) amortized via monotonic deque, sum/mean/variance berjalan,
+dan EWMA. Satu RollingStats bisa menyimpan beberapa window sekaligus
+(misal 60 sample terakhir, 1 menit, 15 menit, 1 jam).
+"""
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RollingWindow:
+    """Window berdasarkan jumlah sample (size) ATAU durasi (seconds)"""
+
+    def __init__(self, size=None, seconds=None):
+        if (size is None) == (seconds is None):
+            raise ValueError("RollingWindow needs exactly one of size or seconds")
+        self.size = size
+        self.seconds = seconds
+        self._items = deque()     # (seq, ts, x)
+        self._min = deque()       # kandidat min, x naik
+        self._max = deque()       # kandidat max, x turun
+        self._seq = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def push(self, ts, x):
+        seq = self._seq
+        self._seq += 1
+        self._items.append((seq, ts, x))
+        self._sum += x
+        self._sumsq += x * x
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((seq, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((seq, x))
+        self._evict(ts)
+
+    def _evict(self, now):
+        items = self._items
+        while items and ((self.size is not None and len(items) > self.size) or
+                         (self.seconds is not None and now - items[0][1] > self.seconds)):
+            seq, _, x = items.popleft()
+            self._sum -= x
+            self._sumsq -= x * x
+            if self._min[0][0] == seq:
+                self._min.popleft()
+            if self._max[0][0] == seq:
+                self._max.popleft()
+        if not items:
+            # Reset akumulator supaya error floating point tidak menumpuk
+            self._sum = self._sumsq = 0.0
+
+    def expire(self, now):
+        """Buang sample lama untuk window waktu walau tidak ada sample baru"""
+        self._evict(now)
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else 0.0
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else 0.0
+
+    @property
+    def mean(self):
+        n = len(self._items)
+        return self._sum / n if n else 0.0
+
+    @property
+    def variance(self):
+        n = len(self._items)
+        if n < 2:
+            return 0.0
+        return max(0.0, (self._sumsq - self._sum * self._sum / n) / (n - 1))
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    # --- Snapshot (warm restart) ---
+    def get_state(self):
+        """dict array NumPy: isi window + kandidat min/max apa adanya"""
+        return {"items": np.array(self._items, dtype=np.float64).reshape(-1, 3),
+                "min": np.array(self._min, dtype=np.float64).reshape(-1, 2),
+                "max": np.array(self._max, dtype=np.float64).reshape(-1, 2),
+                "seq": np.int64(self._seq)}
+
+    def set_state(self, state):
+        items = state["items"]
+        seqs = items[:, 0].astype(np.int64).tolist()
+        self._items = deque(zip(seqs, items[:, 1].tolist(), items[:, 2].tolist()))
+        self._min = deque(zip(state["min"][:, 0].astype(np.int64).tolist(), state["min"][:, 1].tolist()))
+        self._max = deque(zip(state["max"][:, 0].astype(np.int64).tolist(), state["max"][:, 1].tolist()))
+        self._seq = int(state["seq"])
+        # Akumulator dihitung ulang dari isi window (bukan disalin) supaya drift hilang
+        self._sum = math.fsum(items[:, 2].tolist())
+        self._sumsq = math.fsum((items[:, 2] ** 2).tolist())
+
+
+class EWMA:
+    """Exponentially weighted moving average dengan half-life dalam detik"""
+
+    def __init__(self, halflife=10.0):
+        self.halflife = halflife
+        self.value = None
+        self._last_ts = None
+
+    def push(self, ts, x):
+        if self.value is None:
+            self.value = x
+        else:
+            dt = max(ts - self._last_ts, 0.0)
+            alpha = 1.0 - 0.5 ** (dt / self.halflife)
+            self.value += alpha * (x - self.value)
+        self._last_ts = ts
+        return self.value
+
+    def get_state(self):
+        return {"value": np.float64(np.nan if self.value is None else self.value),
+                "last_ts": np.float64(np.nan if self._last_ts is None else self._last_ts)}
+
+    def set_state(self, state):
+        value, last_ts = float(state["value"]), float(state["last_ts"])
+        self.value = None if math.isnan(value) else value
+        self._last_ts = None if math.isnan(last_ts) else last_ts
+
+
+# Window default untuk panel statistik
+DEFAULT_WINDOWS = {
+    "60 pts": {"size": 60},
+    "1 min": {"seconds": 60},
+    "15 min": {"seconds": 15 * 60},
+    "1 h": {"seconds": 60 * 60},
+}
+
+
+class RollingStats:
+    """Beberapa RollingWindow + EWMA untuk satu sinyal"""
+
+    def __init__(self, windows=None, halflife=10.0):
+        windows = DEFAULT_WINDOWS if windows is None else windows
+        self.windows = {name: RollingWindow(**spec) for name, spec in windows.items()}
+        self.ewma = EWMA(halflife)
+
+    def push(self, ts, x):
+        for w in self.windows.values():
+            w.push(ts, x)
+        self.ewma.push(ts, x)
+
+    def extend(self, ts_values, values):
+        for ts, x in zip(ts_values, values):
+            self.push(ts, x)
+
+    def expire(self, now):
+        for w in self.windows.values():
+            w.expire(now)
+
+    def __getitem__(self, name):
+        return self.windows[name]
+
+    def get_state(self):
+        """Flat dict (key npz-friendly): w<i>_<field> per window + ewma_<field>"""
+        state = {f"ewma_{k}": v for k, v in self.ewma.get_state().items()}
+        for i, w in enumerate(self.windows.values()):
+            state.update({f"w{i}_{k}": v for k, v in w.get_state().items()})
+        return state
+
+    def set_state(self, state):
+        """Kebalikan get_state; window yang tidak ada di state dibiarkan kosong"""
+        for i, w in enumerate(self.windows.values()):
+            if f"w{i}_items" in state:
+                w.set_state({k: state[f"w{i}_{k}"] for k in ("items", "min", "max", "seq")})
+        if "ewma_value" in state:
+            self.ewma.set_state({"value": state["ewma_value"], "last_ts": state["ewma_last_ts"]})
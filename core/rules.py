@@ -0,0 +1,337 @@
+"""
+Rule Engine - Compiled Multi-Signal Protection Rules
+Rule deklaratif berupa ekspresi atas temp/volt/curr/power dan turunannya per
+detik (d_temp, d_volt, d_curr, d_power), misalnya:
+    {"name": "overpower", "expr": "power > 30 and curr > 1.5", "hysteresis": 2, "min_duration": 0.5}
+Ekspresi di-parse dan di-compile SEKALI menjadi kode NumPy; evaluate() memproses
+satu batch sample (N,) atau satu fleet (D, N) per panggilan tanpa loop per sample.
+Kode yang sama dijalankan dengan namespace Python biasa di evaluate_one() untuk
+jalur per pesan, di mana overhead NumPy per panggilan lebih mahal dari hitungannya.
+
+hysteresis : rule yang aktif baru lepas setelah nilai melewati threshold - hysteresis
+             (setiap perbandingan >, >= digeser turun; <, <= digeser naik)
+min_duration: rule baru FIRED setelah kondisinya aktif terus-menerus >= min_duration detik
+action     : "trip" -> latch + OFF lewat ProtectionEngine, "alarm" -> hanya ditampilkan
+"""
+import ast
+import json
+import math
+import os
+from functools import reduce
+
+import numpy as np
+
+VARIABLES = ("temp", "volt", "curr", "power")
+NAMES = VARIABLES + tuple(f"d_{v}" for v in VARIABLES)
+ACTIONS = ("trip", "alarm")
+
+# Contoh rule bawaan: hanya alarm, proteksi trip tetap lewat setpoint + gate
+DEFAULT_RULES = [
+    {"name": "undervolt", "expr": "volt > 1 and volt < 10.5", "hysteresis": 0.3, "min_duration": 1.0},
+    {"name": "temp_rise", "expr": "d_temp > 1.0", "min_duration": 2.0},
+    {"name": "overpower", "expr": "power > 30", "hysteresis": 2.0, "min_duration": 0.5},
+]
+
+_ALLOWED = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+            ast.Compare, ast.Gt, ast.GtE, ast.Lt, ast.LtE, ast.BinOp, ast.Add, ast.Sub, ast.Mult,
+            ast.Div, ast.Name, ast.Load, ast.Constant, ast.Call)
+_FUNCS = {"abs": np.abs, "min": np.minimum, "max": np.maximum}
+
+
+def _div(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.true_divide(a, b)
+
+
+def _scalar_div(a, b):
+    """a / b dengan semantik IEEE seperti _div: x/0 -> +-inf, 0/0 -> nan (bukan ZeroDivisionError)"""
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+_NAMESPACE = {"__builtins__": {}, "_and": lambda *a: reduce(np.logical_and, a),
+              "_or": lambda *a: reduce(np.logical_or, a), "_not": np.logical_not, "_div": _div, **_FUNCS}
+_SCALAR_NAMESPACE = {"__builtins__": {}, "_and": lambda *a: all(a), "_or": lambda *a: any(a),
+                     "_not": lambda a: not a, "_div": _scalar_div, "abs": abs, "min": min, "max": max}
+
+
+class _Vectorize(ast.NodeTransformer):
+    """
+    and/or/not/ -> _and/_or/_not/_div (NumPy atau Python, tergantung namespace), threshold digeser
+    sebesar hysteresis. Pembagian lewat _div supaya jalur scalar dan batch sama-sama IEEE (x/0 -> inf)
+    """
+
+    def __init__(self, hysteresis):
+        self.hysteresis = hysteresis
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        func = "_and" if isinstance(node.op, ast.And) else "_or"
+        return ast.Call(func=ast.Name(func, ast.Load()), args=node.values, keywords=[])
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return ast.Call(func=ast.Name("_div", ast.Load()), args=[node.left, node.right], keywords=[])
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(func=ast.Name("_not", ast.Load()), args=[node.operand], keywords=[])
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        # a < b < c -> (a < b) and (b < c)
+        parts, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            if self.hysteresis:
+                shift = ast.Sub() if isinstance(op, (ast.Gt, ast.GtE)) else ast.Add()
+                right_h = ast.BinOp(right, shift, ast.Constant(self.hysteresis))
+            else:
+                right_h = right
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right_h]))
+            left = right
+        if len(parts) == 1:
+            return parts[0]
+        return ast.Call(func=ast.Name("_and", ast.Load()), args=parts, keywords=[])
+
+
+def _compile(expr, hysteresis):
+    """Returns: (code tanpa hysteresis, code dengan hysteresis, nama signal yang dipakai)"""
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid rule expression {expr!r}: {e.msg}") from None
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED):
+            raise ValueError(f"Unsupported syntax in rule {expr!r}: {type(node).__name__}")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in _FUNCS):
+            raise ValueError(f"Only {', '.join(_FUNCS)} can be called in rule {expr!r}")
+        if isinstance(node, ast.Name) and node.id not in _FUNCS:
+            if node.id not in NAMES:
+                raise ValueError(f"Unknown signal {node.id!r} in rule {expr!r}, use one of {', '.join(NAMES)}")
+            names.add(node.id)
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"Only numeric constants allowed in rule {expr!r}")
+
+    def build(h):
+        t = ast.fix_missing_locations(_Vectorize(h).visit(ast.parse(expr, mode="eval")))
+        return compile(t, f"<rule {expr}>", "eval")
+    code_on = build(0.0)
+    return code_on, (build(hysteresis) if hysteresis else code_on), names
+
+
+class Rule:
+    def __init__(self, name, expr, hysteresis=0.0, min_duration=0.0, action="alarm"):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown rule action: {action}")
+        if hysteresis < 0 or min_duration < 0:
+            raise ValueError("hysteresis and min_duration must be >= 0")
+        self.name = name
+        self.expr = expr
+        self.hysteresis = float(hysteresis)
+        self.min_duration = float(min_duration)
+        self.action = action
+        self.code_on, self.code_hold, self.names = _compile(expr, self.hysteresis)
+
+    def to_dict(self):
+        return {"name": self.name, "expr": self.expr, "hysteresis": self.hysteresis,
+                "min_duration": self.min_duration, "action": self.action}
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.expr!r}, action={self.action!r})"
+
+
+def load_rules(path=None, default=DEFAULT_RULES):
+    """List Rule dari file JSON (list of dict); file tidak ada -> default"""
+    if path is None or not os.path.exists(path):
+        specs = default
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            specs = json.load(f)
+    return [r if isinstance(r, Rule) else Rule(**r) for r in specs]
+
+
+class RuleEngine:
+    """State per rule per device (hysteresis, awal run untuk debounce, nilai terakhir untuk turunan)"""
+
+    def __init__(self, rules=()):
+        self.rules = [r if isinstance(r, Rule) else Rule(**r) for r in rules]
+        self.names = [r.name for r in self.rules]
+        self.trip_mask = np.array([r.action == "trip" for r in self.rules], dtype=bool)
+        used = set().union(*(r.names for r in self.rules)) if self.rules else set()
+        self._derivs = [v for v in VARIABLES if f"d_{v}" in used]
+
+        n = len(self.rules)
+        self._keys = {}                             # device key -> kolom state
+        self._active = np.zeros((n, 0), dtype=bool)  # Output Schmitt trigger
+        self._fired = np.zeros((n, 0), dtype=bool)   # Setelah debounce
+        self._since = np.zeros((n, 0))               # ts awal run aktif saat ini
+        self._prev = np.full((len(VARIABLES) + 1, 0), np.nan)  # ts + nilai terakhir per device
+        self.fire_counts = np.zeros(n, dtype=np.int64)         # Jumlah rising edge FIRED
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _columns(self, keys):
+        new = [k for k in dict.fromkeys(keys) if k not in self._keys]
+        if new:
+            for k in new:
+                self._keys[k] = len(self._keys)
+            extra = len(new)
+            self._active = np.pad(self._active, ((0, 0), (0, extra)))
+            self._fired = np.pad(self._fired, ((0, 0), (0, extra)))
+            self._since = np.pad(self._since, ((0, 0), (0, extra)))
+            self._prev = np.pad(self._prev, ((0, 0), (0, extra)), constant_values=np.nan)
+        return np.array([self._keys[k] for k in keys], dtype=np.intp)
+
+    def evaluate(self, ts, temp, volt, curr, keys=None):
+        """
+        ts/temp/volt/curr: shape (N,) untuk satu device (keys=None),
+        atau (D, N) untuk D device dengan keys (panjang D). Sample harus urut waktu per device.
+        Returns: bool array FIRED shape (R, N) atau (R, D, N)
+        """
+        single = keys is None
+        ts = np.atleast_2d(np.asarray(ts, dtype=np.float64))
+        env = {"temp": np.atleast_2d(np.asarray(temp, dtype=np.float64)),
+               "volt": np.atleast_2d(np.asarray(volt, dtype=np.float64)),
+               "curr": np.atleast_2d(np.asarray(curr, dtype=np.float64))}
+        env["power"] = env["volt"] * env["curr"]
+        D, N = ts.shape
+        cols = self._columns([None] if single else list(keys))
+
+        # Turunan per detik, sample pertama memakai nilai terakhir batch sebelumnya
+        if self._derivs:
+            prev_ts = self._prev[0, cols][:, None]
+            dt = np.diff(np.concatenate([prev_ts, ts], axis=1), axis=1)
+            valid = np.isfinite(dt) & (dt > 0)
+            for v in self._derivs:
+                i = 1 + VARIABLES.index(v)
+                dv = np.diff(np.concatenate([self._prev[i, cols][:, None], env[v]], axis=1), axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    env[f"d_{v}"] = np.where(valid, dv / np.where(valid, dt, 1.0), 0.0)
+        self._prev[0, cols] = ts[:, -1]
+        for i, v in enumerate(VARIABLES):
+            self._prev[1 + i, cols] = env[v][:, -1]
+
+        idx = np.arange(N)
+        fired = np.zeros((len(self.rules), D, N), dtype=bool)
+        for r, rule in enumerate(self.rules):
+            on = np.broadcast_to(eval(rule.code_on, _NAMESPACE, env), (D, N))
+            hold = on if rule.code_hold is rule.code_on else np.broadcast_to(eval(rule.code_hold, _NAMESPACE, env), (D, N))
+
+            # Schmitt trigger: aktif kalau ada 'on' sejak 'hold' terakhir gagal.
+            # State batch sebelumnya dihitung sebagai 'on' di index -1
+            carry = self._active[r, cols]
+            last_on = np.maximum(np.maximum.accumulate(np.where(on, idx, -2), axis=1),
+                                 np.where(carry, -1, -2)[:, None])
+            last_off = np.maximum.accumulate(np.where(hold, -2, idx), axis=1)
+            active = last_on > last_off
+
+            if rule.min_duration > 0:
+                prev_active = np.concatenate([carry[:, None], active[:, :-1]], axis=1)
+                start_idx = np.maximum.accumulate(np.where(active & ~prev_active, idx, -1), axis=1)
+                since = np.where(start_idx >= 0, np.take_along_axis(ts, np.maximum(start_idx, 0), axis=1),
+                                 self._since[r, cols][:, None])
+                ok = active & (ts - since >= rule.min_duration)
+                self._since[r, cols] = since[:, -1]
+            else:
+                ok = active
+
+            prev_ok = np.concatenate([self._fired[r, cols][:, None], ok[:, :-1]], axis=1)
+            self.fire_counts[r] += int(np.count_nonzero(ok & ~prev_ok))
+            self._active[r, cols] = active[:, -1]
+            self._fired[r, cols] = ok[:, -1]
+            fired[r] = ok
+        return fired[:, 0, :] if single else fired
+
+    def evaluate_one(self, ts, temp, volt, curr, key=None):
+        """Satu sample satu device, tanpa NumPy di hot path. Returns: list bool FIRED per rule"""
+        col = self._keys.get(key)
+        if col is None:
+            col = int(self._columns([key])[0])
+        prev = self._prev[:, col].tolist()
+        env = {"temp": temp, "volt": volt, "curr": curr, "power": volt * curr}
+        if self._derivs:
+            dt = ts - prev[0]
+            valid = dt > 0  # NaN (belum ada sample sebelumnya) -> False
+            for v in self._derivs:
+                env[f"d_{v}"] = (env[v] - prev[1 + VARIABLES.index(v)]) / dt if valid else 0.0
+        self._prev[:, col] = (ts, temp, volt, curr, env["power"])
+
+        out = []
+        for r, rule in enumerate(self.rules):
+            was_active = self._active[r, col]
+            if eval(rule.code_on, _SCALAR_NAMESPACE, env):
+                active = True
+            else:
+                active = was_active and (rule.code_hold is not rule.code_on) and bool(eval(rule.code_hold, _SCALAR_NAMESPACE, env))
+            ok = active
+            if active and rule.min_duration > 0:
+                if not was_active:
+                    self._since[r, col] = ts
+                ok = ts - self._since[r, col] >= rule.min_duration
+            if ok and not self._fired[r, col]:
+                self.fire_counts[r] += 1
+            self._active[r, col] = active
+            self._fired[r, col] = ok
+            out.append(bool(ok))
+        return out
+
+    def status(self, key=None):
+        """List dict per rule: name, expr, action, state ("FIRED"/"ARMED"/"idle"), count"""
+        col = self._keys.get(key)
+        out = []
+        for r, rule in enumerate(self.rules):
+            state = "idle"
+            if col is not None:
+                if self._fired[r, col]:
+                    state = "FIRED"
+                elif self._active[r, col]:
+                    state = "ARMED"  # Kondisi aktif, menunggu min_duration
+            out.append({"name": rule.name, "expr": rule.expr, "action": rule.action,
+                        "state": state, "count": int(self.fire_counts[r])})
+        return out
+
+    def fired_names(self, key=None):
+        col = self._keys.get(key)
+        if col is None:
+            return []
+        return [name for name, f in zip(self.names, self._fired[:, col]) if f]
+
+    def status_masks(self, key=None):
+        """Returns: (fired, active) sebagai bitmask int (bit r = rule r), untuk shared memory"""
+        col = self._keys.get(key)
+        if col is None:
+            return 0, 0
+        fired = active = 0
+        for r in range(len(self.rules)):
+            if self._fired[r, col]:
+                fired |= 1 << r
+            if self._active[r, col]:
+                active |= 1 << r
+        return fired, active
+
+    def load_status(self, fired, active, counts, key=None):
+        """Kebalikan status_masks: cermin status engine di proses lain (tanpa evaluasi)"""
+        col = self._columns([key])[0]
+        for r in range(len(self.rules)):
+            self._fired[r, col] = bool(fired >> r & 1)
+            self._active[r, col] = bool(active >> r & 1)
+        n = min(len(self.rules), len(counts))
+        self.fire_counts[:n] = counts[:n]
+
+    def reset(self, key=None):
+        """Lupakan state device (misal saat device yang dipantau diganti)"""
+        col = self._keys.get(key)
+        if col is not None:
+            self._active[:, col] = False
+            self._fired[:, col] = False
+            self._prev[:, col] = np.nan
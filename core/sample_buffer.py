@@ -0,0 +1,97 @@
+"""
+Sample Ring Buffer - Lossless Telemetry Storage
+Preallocated NumPy ring of (arrival_ts, temp, volt, curr, relay, temp_raw, volt_raw, curr_raw) rows.
+temp/volt/curr sudah terkalibrasi (core.calibration), *_raw = nilai asli sensor.
+Ditulis dari thread paho, dibaca oleh GUI / logger / proteksi via cursor.
+"""
+import threading
+import numpy as np
+
+# Index kolom
+COL_TS = 0
+COL_TEMP = 1
+COL_VOLT = 2
+COL_CURR = 3
+COL_RELAY = 4
+COL_TEMP_RAW = 5
+COL_VOLT_RAW = 6
+COL_CURR_RAW = 7
+N_COLS = 8
+
+
+class SampleBuffer:
+    def __init__(self, capacity=4096):
+        self.capacity = int(capacity)
+        self._data = np.zeros((self.capacity, N_COLS), dtype=np.float64)
+        self._lock = threading.Lock()
+        self.write_seq = 0  # Total sample yang pernah masuk (monotonic)
+
+    def append(self, ts, temp, volt, curr, relay, raw=None):
+        """Tambah satu sample (dipanggil dari thread MQTT). raw = (temp, volt, curr) sebelum kalibrasi"""
+        temp_raw, volt_raw, curr_raw = raw if raw is not None else (temp, volt, curr)
+        with self._lock:
+            row = self._data[self.write_seq % self.capacity]
+            row[COL_TS] = ts
+            row[COL_TEMP] = temp
+            row[COL_VOLT] = volt
+            row[COL_CURR] = curr
+            row[COL_RELAY] = 1.0 if relay else 0.0
+            row[COL_TEMP_RAW] = temp_raw
+            row[COL_VOLT_RAW] = volt_raw
+            row[COL_CURR_RAW] = curr_raw
+            self.write_seq += 1
+
+    def extend(self, ts, temp, volt, curr, relay, raw=None):
+        """Tambah banyak sample sekaligus dari kolom NumPy (batch / frame biner)"""
+        n = len(temp)
+        if n == 0:
+            return
+        temp_raw, volt_raw, curr_raw = raw if raw is not None else (temp, volt, curr)
+        cols = (ts, temp, volt, curr, relay, temp_raw, volt_raw, curr_raw)
+        with self._lock:
+            if n > self.capacity:
+                # Hanya sample terakhir yang muat di ring
+                cols = tuple(c[-self.capacity:] for c in cols)
+                self.write_seq += n - self.capacity
+                n = self.capacity
+            i0 = self.write_seq % self.capacity
+            first = min(n, self.capacity - i0)
+            for dst, src in ((slice(i0, i0 + first), slice(0, first)),
+                             (slice(0, n - first), slice(first, n))):
+                block = self._data[dst]
+                for col, values in enumerate(cols):
+                    block[:, col] = values[src]
+            self.write_seq += n
+
+    def drain_since(self, cursor):
+        """
+        Ambil semua sample sejak cursor terakhir.
+        Returns: (rows: ndarray (n, N_COLS), new_cursor: int, lost: int)
+        lost > 0 berarti reader terlalu lambat dan sample lama sudah tertimpa.
+        """
+        with self._lock:
+            end = self.write_seq
+            start = max(cursor, end - self.capacity)
+            lost = start - cursor if cursor < start else 0
+            n = end - start
+            if n <= 0:
+                return self._data[:0].copy(), end, 0
+
+            i0 = start % self.capacity
+            i1 = i0 + n
+            if i1 <= self.capacity:
+                rows = self._data[i0:i1].copy()
+            else:
+                rows = np.concatenate((self._data[i0:], self._data[:i1 - self.capacity]))
+        return rows, end, lost
+
+    def latest(self):
+        """Sample terakhir (atau None kalau belum ada data)"""
+        with self._lock:
+            if self.write_seq == 0:
+                return None
+            return self._data[(self.write_seq - 1) % self.capacity].copy()
+
+    def cursor(self):
+        """Cursor 'sekarang' untuk reader yang hanya butuh data baru"""
+        return self.write_seq
@@ -0,0 +1,210 @@
+"""
+Headless Service - Protection Without GUI
+Menjalankan IoTClient + ProtectionEngine + kalibrasi + recording sebagai service
+ringan untuk edge box tanpa layar. Proteksi (latch per device) berlaku untuk
+SEMUA device yang publish ke smartamp/+/...; device_id hanya memilih device
+yang direkam ke DataLog. Modul ini (dan semua import-nya) tidak
+menyentuh tkinter maupun matplotlib.
+
+Jalankan: python main.py --headless --config smartamp.json
+"""
+import json
+import signal
+import sys
+import threading
+import time
+
+from .calibration import DEFAULT_KEY, CalibrationStore
+from .datalogger import CsvLogger, device_prefix
+from .connection import default_client_id
+from .iot_client import IoTClient
+from .metrics import REGISTRY
+from .protection import ProtectionEngine
+from .recording import BinaryLogger
+from .replay import ReplayClient
+from .sample_buffer import COL_CURR, COL_TEMP, COL_VOLT
+
+DEFAULT_CONFIG = {
+    "broker": "broker.emqx.io",
+    "port": 1883,
+    "client_id": None,          # None = smartamp-service-<hostname>
+    "device_id": None,          # Device yang direkam (None = pertama terlihat); proteksi selalu semua device
+    "setpoint_temp": 60.0,
+    "setpoint_curr": 2.0,
+    "cal_temp": 0.0,            # Trim untuk device tanpa profil di calibration_file
+    "cal_curr": 0.0,
+    "calibration_file": None,   # Profil per device (lihat core/calibration.py)
+    "gate": "OR",
+    "rules": [],                # Rule tambahan (core.rules), list of dict
+    "record": True,
+    "record_format": "csv",     # "csv" atau "binary"
+    "record_dir": ".",
+    "record_interval": 1.0,     # detik antar baris log
+    "tick_interval": 0.2,       # detik antar drain buffer
+    "status_interval": 10.0,    # detik antar baris status (0 = mati)
+    "metrics_port": None,       # Endpoint Prometheus di 127.0.0.1:<port>/metrics
+    "metrics_file": None,       # Dump metrics ke file setiap metrics_interval
+    "metrics_interval": 10.0,
+}
+
+
+def load_config(path=None, **overrides):
+    """DEFAULT_CONFIG + isi file JSON (opsional) + overrides. Key tidak dikenal -> ValueError"""
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+    if config["record_format"] not in ("csv", "binary"):
+        raise ValueError(f"record_format must be 'csv' or 'binary', got {config['record_format']!r}")
+    return config
+
+
+def process_footprint():
+    """Returns: (cpu_seconds, rss_mb) proses ini; rss_mb None kalau tidak bisa dibaca"""
+    cpu = time.process_time()
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return cpu, int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil  # Opsional (Windows)
+        return cpu, psutil.Process().memory_info().rss / 1048576.0
+    except ImportError:
+        pass
+    try:
+        import resource  # Peak RSS: KB di Linux, byte di macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return cpu, peak / (1048576.0 if sys.platform == "darwin" else 1024.0)
+    except ImportError:
+        return cpu, None
+
+
+class HeadlessService:
+    def __init__(self, config=None, iot=None):
+        self.config = load_config() if config is None else config
+        self.iot = iot if iot is not None else IoTClient(self.config["client_id"] or default_client_id("service"))
+        self.iot.port = self.config["port"]
+        if self.config["device_id"]:
+            self.iot.select_device(self.config["device_id"])
+
+        c = self.config
+        self.protection = ProtectionEngine(setpoint_temp=c["setpoint_temp"], setpoint_curr=c["setpoint_curr"],
+                                           gate=c["gate"], rules=c["rules"])
+        self.iot.attach_protection(self.protection)
+        # Kalibrasi diterapkan IoTClient saat ingest, bukan oleh ProtectionEngine
+        self.calibration = CalibrationStore(c["calibration_file"])
+        for name in ("temp", "curr"):
+            if c[f"cal_{name}"]:
+                self.calibration.set_trim(DEFAULT_KEY, name, c[f"cal_{name}"])
+        self.iot.attach_calibration(self.calibration)
+
+        self.logger = None
+        self.cursor = 0
+        self.last_record_time = 0.0
+        self.samples_processed = 0
+        self._stop = threading.Event()
+        self._last_status = (time.monotonic(), time.process_time())
+        REGISTRY.gauge("smartamp_logger_queue_depth", "Rows waiting in the recording queue",
+                       fn=lambda: self.logger.queue_depth if self.logger is not None else 0)
+        REGISTRY.counter("smartamp_logger_rows_dropped_total", "Rows dropped because the recording queue was full",
+                         fn=lambda: self.logger.rows_dropped if self.logger is not None else 0)
+        REGISTRY.counter("smartamp_logger_rows_lost_total", "Rows that failed to write (disk full, share gone)",
+                         fn=lambda: self.logger.rows_lost if self.logger is not None else 0)
+
+    def start(self):
+        c = self.config
+        if c["record"]:
+            logger_cls = BinaryLogger if c["record_format"] == "binary" else CsvLogger
+            self.logger = logger_cls(directory=c["record_dir"], prefix=device_prefix(c["device_id"])).start()
+            print(f"Recording to {self.logger.filename}")
+        if c["metrics_port"]:
+            REGISTRY.serve(c["metrics_port"])
+        if c["metrics_file"]:
+            REGISTRY.start_dumper(c["metrics_file"], c["metrics_interval"])
+        self.cursor = self.iot.buffer.cursor()
+        if isinstance(self.iot, ReplayClient):
+            self.iot.ack(self.cursor)  # Backpressure untuk mode replay
+        self.iot.connect_broker(c["broker"])  # Reconnect otomatis di background
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def tick(self):
+        """Drain sample baru, kalibrasi, dan log. Trip sudah ditangani ProtectionEngine di thread MQTT"""
+        rows, self.cursor, _lost = self.iot.buffer.drain_since(self.cursor)
+        if isinstance(self.iot, ReplayClient):
+            self.iot.ack(self.cursor)
+        if not len(rows):
+            return
+        self.samples_processed += len(rows)
+        now = time.time()
+        if self.logger is None or now - self.last_record_time < self.config["record_interval"]:
+            return
+        self.last_record_time = now
+        prot = False
+        # Baris buffer sudah dikalibrasi IoTClient saat ingest
+        for t, i in zip(rows[:, COL_TEMP].tolist(), rows[:, COL_CURR].tolist()):
+            prot |= self.protection.check(t, i)[2]
+        self.logger.log((now, t, float(rows[-1, COL_VOLT]), i, prot))
+
+    def status_line(self):
+        mono, cpu = time.monotonic(), time.process_time()
+        last_mono, last_cpu = self._last_status
+        self._last_status = (mono, cpu)
+        cpu_pct = (cpu - last_cpu) / max(mono - last_mono, 1e-9) * 100.0
+        _, rss = process_footprint()
+        lat = self.protection.latency_stats()
+        online = self.iot.devices.online_mask(time.time())
+        latched = self.protection.latched_devices()
+        line = (f"[{time.strftime('%H:%M:%S')}] devices={int(online.sum())}/{len(online)} online "
+                f"msgs={self.iot.messages_received} samples={self.samples_processed} "
+                f"trips={self.protection.trip_count} latched={','.join(map(str, latched)) or '-'}")
+        if len(self.protection.rules):
+            fired = sorted({n for d in self.iot.devices.device_ids for n in self.protection.rules.fired_names(d)})
+            line += f" rules={','.join(fired) or '-'}"
+        if lat["count"]:
+            line += f" p99={lat['p99']:.0f}us"
+        conn = self.iot.connection
+        if conn.reconnects or conn.failed_attempts:
+            line += f" reconnects={conn.reconnects} failed={conn.failed_attempts} downtime={conn.downtime:.1f}s"
+        line += f" | cpu {cpu_pct:.1f}%"
+        if rss is not None:
+            line += f" rss {rss:.1f} MB"
+        return line
+
+    def run(self, duration=None):
+        """Blocking loop sampai stop(), SIGINT/SIGTERM, durasi habis, atau replay selesai"""
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *a: self.stop())
+        c = self.config
+        t_end = None if duration is None else time.monotonic() + duration
+        next_status = time.monotonic() + c["status_interval"]
+        finished = self.iot.finished if isinstance(self.iot, ReplayClient) else None
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                now = time.monotonic()
+                if c["status_interval"] and now >= next_status:
+                    print(self.status_line())
+                    next_status = now + c["status_interval"]
+                if (t_end is not None and now >= t_end) or (finished is not None and finished.is_set()):
+                    self.tick()
+                    break
+                self._stop.wait(c["tick_interval"])
+        finally:
+            self.iot.disconnect_broker()
+            if self.logger is not None:
+                self.logger.stop()
+            REGISTRY.stop()
+            cpu, rss = process_footprint()
+            print(f"Stopped: {self.samples_processed} samples, {self.protection.trip_count} trips | "
+                  f"cpu {cpu:.2f} s total" + (f", rss {rss:.1f} MB" if rss is not None else ""))
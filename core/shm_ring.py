@@ -0,0 +1,200 @@
+"""
+Shared Memory Ring - Cross-Process Sample Stream
+Ring sample (kolom sama dengan SampleBuffer) di multiprocessing.shared_memory.
+Satu writer (proses ingest) dan reader read-only (GUI) tanpa lock: writer
+menaikkan seqlock jadi ganjil, menulis baris, menaikkan write_seq, lalu
+seqlock genap lagi. Reader menyalin lalu mengulang kalau seqlock berubah,
+sehingga writer tidak pernah menunggu reader (GUI hang tidak menunda apa pun).
+
+Header juga membawa status ringan (koneksi, latch, trip, rule) yang ditulis
+writer per field int64/float64 dan dibaca GUI tanpa sinkronisasi.
+"""
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .sample_buffer import N_COLS
+
+RING_NAME = "smartamp_ring"
+MAGIC = 0x534D5252  # "SMRR"
+VERSION = 1
+
+# Header int64
+I_MAGIC = 0
+I_VERSION = 1
+I_CAPACITY = 2
+I_NCOLS = 3
+I_SEQLOCK = 4
+I_WRITE_SEQ = 5
+I_CONNECTED = 6
+I_LATCHED = 7           # latch device terpilih
+I_TRIPS = 8
+I_MESSAGES = 9
+I_RECONNECTS = 10
+I_RULES_FIRED = 11      # bitmask rule FIRED (device terpilih)
+I_RULES_ACTIVE = 12     # bitmask rule aktif (termasuk yang masih menunggu min_duration)
+I_PID = 13
+I_LATENCY_NS = 14       # latency trip terakhir
+I_LATCHED_DEVICES = 15  # jumlah device yang terkunci (seluruh fleet)
+I_DEVICE_TRIPS = 16     # trip device terpilih (I_TRIPS = total fleet)
+I_LAST_TRIP_SLOT = 17   # slot DeviceStore device yang terakhir trip, -1 = belum ada
+I_RULE_COUNTS = 32      # fire count per rule, maks MAX_RULES
+MAX_RULES = 32
+N_INT = 64
+
+# Header float64
+F_LAST_RECEIVED = 0
+F_LAST_TRIP = 1
+F_HEARTBEAT = 2         # time.time() terakhir writer hidup
+F_LAST_GAP = 3          # durasi putus broker terakhir (detik)
+F_DOWNTIME = 4
+N_FLOAT = 8
+
+_DATA_OFFSET = (N_INT + N_FLOAT) * 8
+
+
+def _attach_untracked(name):
+    """
+    Attach tanpa resource tracker: di POSIX (Python < 3.13) tracker proses
+    reader akan meng-unlink segment saat reader keluar, padahal pemiliknya writer
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _owner_pid(name, wait=1.0):
+    """
+    PID writer yang tercatat di header segment name (0 = tidak diketahui).
+    Segment yang baru dibuat proses lain mungkin belum berisi PID: tunggu sebentar
+    """
+    shm = _attach_untracked(name)
+    try:
+        if shm.size < N_INT * 8:
+            return 0
+        ints = np.ndarray((N_INT,), dtype=np.int64, buffer=shm.buf, offset=0)
+        t_end = time.monotonic() + wait
+        pid = int(ints[I_PID])
+        while not pid and time.monotonic() < t_end:
+            time.sleep(0.01)
+            pid = int(ints[I_PID])
+        del ints
+        return pid
+    finally:
+        shm.close()
+
+
+class SharedRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.ints = np.ndarray((N_INT,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.floats = np.ndarray((N_FLOAT,), dtype=np.float64, buffer=shm.buf, offset=N_INT * 8)
+        if self.ints[I_MAGIC] != MAGIC or self.ints[I_VERSION] != VERSION or self.ints[I_NCOLS] != N_COLS:
+            raise ValueError(f"Shared memory {shm.name} is not a compatible sample ring")
+        self.capacity = int(self.ints[I_CAPACITY])
+        self._data = np.ndarray((self.capacity, N_COLS), dtype=np.float64, buffer=shm.buf, offset=_DATA_OFFSET)
+        self.retries = 0  # Reader: jumlah salinan yang diulang karena writer sedang menulis
+
+    @classmethod
+    def create(cls, name=RING_NAME, capacity=65536):
+        size = _DATA_OFFSET + capacity * N_COLS * 8
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            from .connection import pid_alive
+            pid = _owner_pid(name)
+            if pid and pid_alive(pid):
+                raise RuntimeError(f"Shared memory {name} is owned by running process {pid}; "
+                                   f"attach to it or stop that process first") from None
+            # Sisa proses ingest yang crash: pakai ulang namanya
+            old = _attach_untracked(name)
+            old.close()
+            old.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        ints = np.ndarray((N_INT,), dtype=np.int64, buffer=shm.buf, offset=0)
+        ints[:] = 0
+        ints[I_PID] = os.getpid()  # Pertama: proses lain yang melihat segment ini tahu pemiliknya
+        ints[I_CAPACITY] = capacity
+        ints[I_NCOLS] = N_COLS
+        ints[I_VERSION] = VERSION
+        ints[I_MAGIC] = MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=RING_NAME):
+        return cls(_attach_untracked(name), owner=False)
+
+    def close(self):
+        # Lepas view NumPy dulu, kalau tidak close() gagal (exported pointers)
+        self.ints = self.floats = self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # --- Writer ---
+    def extend(self, rows):
+        """Tambah baris (n, N_COLS); hanya dipanggil satu thread di proses writer"""
+        n = len(rows)
+        if n == 0:
+            return
+        ints = self.ints
+        seq = int(ints[I_WRITE_SEQ])
+        if n > self.capacity:
+            rows = rows[-self.capacity:]
+            seq += n - self.capacity
+            n = self.capacity
+        ints[I_SEQLOCK] += 1  # ganjil: sedang menulis
+        i0 = seq % self.capacity
+        first = min(n, self.capacity - i0)
+        self._data[i0:i0 + first] = rows[:first]
+        if first < n:
+            self._data[:n - first] = rows[first:]
+        ints[I_WRITE_SEQ] = seq + n
+        ints[I_SEQLOCK] += 1  # genap: konsisten
+
+    # --- Reader (API sama dengan SampleBuffer) ---
+    @property
+    def write_seq(self):
+        return int(self.ints[I_WRITE_SEQ])
+
+    def cursor(self):
+        return self.write_seq
+
+    def drain_since(self, cursor, max_retries=100):
+        """Returns: (rows, new_cursor, lost) seperti SampleBuffer.drain_since"""
+        ints = self.ints
+        for _ in range(max_retries):
+            s1 = int(ints[I_SEQLOCK])
+            if s1 & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            end = int(ints[I_WRITE_SEQ])
+            start = max(cursor, end - self.capacity)
+            n = end - start
+            if n <= 0:
+                rows = self._data[:0].copy()
+            else:
+                i0 = start % self.capacity
+                i1 = i0 + n
+                if i1 <= self.capacity:
+                    rows = self._data[i0:i1].copy()
+                else:
+                    rows = np.concatenate((self._data[i0:], self._data[:i1 - self.capacity]))
+            if int(ints[I_SEQLOCK]) == s1:
+                lost = start - cursor if cursor < start else 0
+                return rows, max(end, cursor), lost
+            self.retries += 1
+        return self._data[:0].copy(), cursor, 0  # Writer terus menulis: coba lagi tick berikutnya
+
+    def latest(self):
+        rows, _, _ = self.drain_since(max(self.write_seq - 1, 0))
+        return rows[-1] if len(rows) else None
@@ -0,0 +1,56 @@
+"""
+Warm-Restart Snapshot - Crash-Safe State File
+Satu file .npz: state kecil (setpoint, gate, device, latch, kalibrasi) sebagai
+JSON + array NumPy (buffer chart, statistik, pyramid) tanpa pickle. Ditulis ke
+file .tmp, fsync, lalu os.replace: setelah crash / listrik mati yang tersisa
+selalu snapshot lama yang utuh atau snapshot baru yang utuh.
+"""
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".smartamp", "snapshot.npz")
+_STATE_KEY = "_state"
+
+
+def save_snapshot(path, state, arrays):
+    """state: dict JSON-serializable, arrays: dict nama -> ndarray. Returns: ukuran file (byte)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    state = dict(state, version=SNAPSHOT_VERSION, saved_at=time.time())
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **{_STATE_KEY: np.array(json.dumps(state))}, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def load_snapshot(path):
+    """Returns: (state, arrays) atau None kalau tidak ada / rusak / versi lain"""
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            state = json.loads(str(z[_STATE_KEY]))
+            arrays = {k: z[k] for k in z.files if k != _STATE_KEY}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"Ignoring snapshot {path}: {e}")
+        return None
+    if state.get("version") != SNAPSHOT_VERSION:
+        return None
+    return state, arrays
+
+
+def prefixed(prefix, arrays):
+    """{"x": a} -> {"<prefix>.x": a} supaya beberapa objek bisa berbagi satu file"""
+    return {f"{prefix}.{k}": v for k, v in arrays.items()}
+
+
+def unprefixed(prefix, arrays):
+    head = prefix + "."
+    return {k[len(head):]: v for k, v in arrays.items() if k.startswith(head)}
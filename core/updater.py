@@ -1,44 +1,169 @@
 # File: core/updater.py
-import requests
+import json
+import os
+import random
+import threading
+import time
 import webbrowser
+
+import requests
 from packaging import version
 
+# Cache respons terakhir (ETag / Last-Modified + isi version.txt)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".smartamp")
+CACHE_FILE = "update_cache.json"
+
 class OTAUpdater:
-    def __init__(self, current_version="1.0"):
+    def __init__(self, current_version="1.0", version_url=None, cache_dir=DEFAULT_CACHE_DIR, timeout=5):
         self.current_version = current_version
-        
+
         # --- GANTI LINK INI DENGAN LINK RAW GITHUB KAMU ---
-        self.version_url = "https://raw.githubusercontent.com/AndriUhuy/project-sinta2-update/refs/heads/main/version.txt" 
+        self.version_url = version_url or "https://raw.githubusercontent.com/AndriUhuy/project-sinta2-update/refs/heads/main/version.txt"
         # --------------------------------------------------
-        
+
         # Link halaman download (bisa diarahkan ke repo utama)
-        self.download_url = "https://github.com/AndriUhuy/project-sinta2-update/tree/main" 
+        self.download_url = "https://github.com/AndriUhuy/project-sinta2-update/tree/main"
+
+        self.timeout = timeout
+        self.cache_path = os.path.join(cache_dir, CACHE_FILE) if cache_dir else None
+        self.cache = self._load_cache()
+        self.last_status = None     # 200 / 304 / None (gagal)
+
+        self._lock = threading.Lock()   # Satu cek jalan dalam satu waktu
+        self._stop = threading.Event()
+        self._periodic = None
 
+    # --- Cache di disk ---
+    def _load_cache(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Cache dari URL lain tidak valid
+        return cache if cache.get("url") == self.version_url else {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.cache, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"Update cache not saved: {e}")
+
+    def _conditional_headers(self):
+        headers = {}
+        if self.cache.get("etag"):
+            headers["If-None-Match"] = self.cache["etag"]
+        if self.cache.get("last_modified"):
+            headers["If-Modified-Since"] = self.cache["last_modified"]
+        return headers
+
+    # --- Cek versi ---
     def check_for_updates(self):
         """
-        Cek ke internet apakah ada versi baru.
+        Cek ke internet apakah ada versi baru (blocking, jangan panggil dari thread GUI).
+        Request kondisional: server cukup balas 304 kalau version.txt tidak berubah.
         Returns: (is_available: bool, new_version: str)
         """
-        try:
-            print(f"Checking update from cloud...")
-            # Tambahkan random number biar gak di-cache sama proxy/isp
-            response = requests.get(self.version_url, params={'t': 'nocache'}, timeout=5)
-            
-            if response.status_code == 200:
-                latest_version = response.text.strip()
-                print(f"Cloud Version: {latest_version} | Local: {self.current_version}")
-                
+        with self._lock:
+            try:
+                print(f"Checking update from cloud...")
+                response = requests.get(self.version_url, headers=self._conditional_headers(), timeout=self.timeout)
+                self.last_status = response.status_code
+
+                if response.status_code == 304 and "body" in self.cache:
+                    latest_version = self.cache["body"]
+                elif response.status_code == 200:
+                    latest_version = response.text.strip()
+                    self.cache = {
+                        "url": self.version_url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "body": latest_version,
+                    }
+                else:
+                    return False, "Error"
+                self.cache["checked_at"] = time.time()
+                self._save_cache()
+                print(f"Cloud Version: {latest_version} | Local: {self.current_version} (HTTP {response.status_code})")
+
                 # Bandingkan versi (misal 2.0 > 1.0)
                 if version.parse(latest_version) > version.parse(self.current_version):
                     return True, latest_version
                 else:
                     return False, latest_version
-            else:
-                return False, "Error"
-        except Exception as e:
-            print(f"Update Check Error: {e}")
-            return False, "Connection Error"
+            except Exception as e:
+                self.last_status = None
+                print(f"Update Check Error: {e}")
+                return False, "Connection Error"
+
+    def check_async(self, callback):
+        """
+        Jalankan check_for_updates di worker thread.
+        callback(is_available, new_version) dipanggil DARI WORKER THREAD -
+        GUI harus meneruskannya ke thread Tk sendiri (misal lewat queue + after()).
+        """
+        def worker():
+            callback(*self.check_for_updates())
+        t = threading.Thread(target=worker, name="ota-check", daemon=True)
+        t.start()
+        return t
+
+    def start_periodic(self, callback, interval=6 * 3600, jitter=0.2, initial_delay=60):
+        """
+        Cek berkala di background. Setiap jeda diacak +/- jitter supaya banyak
+        instance tidak menembak server di detik yang sama.
+        """
+        if self._periodic is not None and self._periodic.is_alive():
+            return self._periodic
+        self._stop.clear()
+
+        def loop():
+            delay = initial_delay * random.uniform(1.0 - jitter, 1.0 + jitter)
+            while not self._stop.wait(delay):
+                callback(*self.check_for_updates())
+                delay = interval * random.uniform(1.0 - jitter, 1.0 + jitter)
+        self._periodic = threading.Thread(target=loop, name="ota-periodic", daemon=True)
+        self._periodic.start()
+        return self._periodic
+
+    def stop(self):
+        self._stop.set()
 
     def open_download_page(self):
         """Buka browser ke halaman download"""
-        webbrowser.open(self.download_url)
\ No newline at end of file
+        webbrowser.open(self.download_url)
+
+
+def main(argv=None):
+    """
+    Cek update dari command line, misal terhadap server lokal:
+        python -m http.server 8000      (folder berisi version.txt)
+        python -m core.updater --url http://localhost:8000/version.txt --repeat 2
+    Cek kedua harus HTTP 304 (isi diambil dari cache).
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OTA update check")
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--current", default="1.0", help="versi lokal")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    updater = OTAUpdater(args.current, version_url=args.url, cache_dir=args.cache_dir)
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        available, latest = updater.check_for_updates()
+        print(f"HTTP {updater.last_status} | available={available} latest={latest} | {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Frame Profiler - Per-Stage Timing untuk update_loop
+Opt-in: saat nonaktif setiap mark() hanya satu cek boolean. Saat aktif, durasi
+tiap stage (perf_counter_ns) disimpan di window bergulir untuk p50/p95/max.
+capture(n) merekam n tick berikutnya dengan cProfile (.prof, buka dengan
+snakeviz / flameprof) + trace stage format Chrome trace event (.json, buka di
+Perfetto / chrome://tracing / speedscope).
+"""
+import cProfile
+import json
+import os
+import time
+from collections import deque
+
+TOTAL = "total"
+
+
+class FrameProfiler:
+    def __init__(self, window=300, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.stages = {}            # nama -> deque durasi ns (urutan pertama kali muncul)
+        self._t_begin = 0
+        self._t_last = 0
+        self.ticks = 0
+
+        # Capture cProfile + trace
+        self._profile = None
+        self._capture_left = 0
+        self._capture_path = None
+        self._trace = []
+        self.last_capture = None    # (prof_path, trace_path) setelah capture selesai
+
+    # --- Instrumentasi ---
+    def begin(self):
+        if not (self.enabled or self._capture_left):
+            return
+        if self._profile is not None:
+            self._profile.enable()
+        self._t_begin = self._t_last = time.perf_counter_ns()
+
+    def mark(self, stage):
+        """Tutup stage yang baru selesai (waktu sejak mark / begin sebelumnya)"""
+        if not (self.enabled or self._capture_left):
+            return
+        now = time.perf_counter_ns()
+        self._record(stage, self._t_last, now)
+        self._t_last = now
+
+    def end(self):
+        if not (self.enabled or self._capture_left):
+            return
+        now = time.perf_counter_ns()
+        self._record(TOTAL, self._t_begin, now)
+        self.ticks += 1
+        if self._capture_left:
+            self._profile.disable()
+            self._capture_left -= 1
+            if not self._capture_left:
+                self._finish_capture()
+
+    def _record(self, stage, t0, t1):
+        samples = self.stages.get(stage)
+        if samples is None:
+            samples = self.stages[stage] = deque(maxlen=self.window)
+        samples.append(t1 - t0)
+        if self._capture_left:
+            self._trace.append({"name": stage, "ph": "X", "pid": 1, "tid": 1 if stage != TOTAL else 0,
+                                "ts": t0 / 1000.0, "dur": (t1 - t0) / 1000.0})
+
+    # --- Statistik ---
+    def summary(self):
+        """dict stage -> (p50_ms, p95_ms, max_ms), urutan sesuai update_loop"""
+        out = {}
+        for stage, samples in self.stages.items():
+            s = sorted(samples)
+            if not s:
+                continue
+            n = len(s)
+            out[stage] = (s[n // 2] / 1e6, s[min(n - 1, int(n * 0.95))] / 1e6, s[-1] / 1e6)
+        return out
+
+    def format_summary(self, budget_ms=200.0):
+        """Satu baris untuk status bar: stage p50/p95 ms + total vs budget"""
+        summary = self.summary()
+        if not summary:
+            return "profiler: waiting for ticks..."
+        parts = [f"{stage} {p50:.1f}/{p95:.1f}" for stage, (p50, p95, _) in summary.items() if stage != TOTAL]
+        if TOTAL in summary:
+            p50, p95, worst = summary[TOTAL]
+            parts.append(f"TOTAL {p50:.1f}/{p95:.1f} max {worst:.1f} ({p95 / budget_ms:.0%} of {budget_ms:.0f} ms)")
+        return "p50/p95 ms | " + " | ".join(parts)
+
+    def reset(self):
+        self.stages.clear()
+        self.ticks = 0
+
+    # --- Capture ---
+    def capture(self, ticks=50, path=None):
+        """Rekam cProfile + trace stage untuk `ticks` tick berikutnya"""
+        self._capture_path = path or os.path.abspath(time.strftime("profile_%Y%m%d_%H%M%S"))
+        self._profile = cProfile.Profile()
+        self._trace = []
+        self._capture_left = ticks
+
+    @property
+    def capturing(self):
+        return self._capture_left > 0
+
+    def _finish_capture(self):
+        prof_path = self._capture_path + ".prof"
+        trace_path = self._capture_path + ".json"
+        self._profile.dump_stats(prof_path)
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self._trace, "displayTimeUnit": "ms"}, f)
+        self._profile = None
+        self._trace = []
+        self.last_capture = (prof_path, trace_path)
+        print(f"Profile written: {prof_path} (cProfile), {trace_path} (trace events)")
@@ -6,19 +6,51 @@ Updates:
 3. Perfected Layout & Fonts
 """
 
-from core.updater import OTAUpdater  # <--- Tambahan Baru
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import socket
 import sys
 import time
-import csv
 import subprocess
-from datetime import datetime
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import queue
+import threading
 from collections import deque
-from core import IoTClient
+import numpy as np
+# NOTE: matplotlib, OTAUpdater (requests/packaging) dan HistoryView di-import
+# lazily saat pertama dipakai supaya window muncul secepat mungkin.
+from core import IoTClient, ProtectionEngine
+from core.datalogger import CsvLogger, device_prefix
+from core.recording import BinaryLogger
+from core.replay import ReplayClient
+from core.sample_buffer import COL_TS, COL_TEMP, COL_VOLT, COL_CURR, COL_RELAY
+from core.rolling_stats import RollingStats, DEFAULT_WINDOWS
+from core.pyramid import DownsamplePyramid
+from core.metrics import REGISTRY
+from core.rules import load_rules
+from core.calibration import CalibrationStore
+from core import snapshot
+from gui.view_model import ViewModel
+from gui.logic_diagram import LogicDiagram
+from gui.frame_profiler import FrameProfiler
+
+# Refresh UI digerakkan data, digabung maksimal REFRESH_HZ per detik. Thread paho
+# tidak pernah memanggil Tk: saat flag data_pending naik (edge) ia menulis satu byte
+# ke socketpair yang ditunggu mainloop lewat createfilehandler, jadi Tk tidur
+# selama tidak ada data. Tanpa createfilehandler (Windows) flag di-poll setiap
+# DATA_POLL_MS, berhenti setelah DATA_IDLE_S tanpa data; heartbeat ringan
+# menangani transisi status online/offline dan menyalakan poll lagi.
+REFRESH_HZ = 20
+DATA_POLL_MS = 1000 // REFRESH_HZ
+DATA_IDLE_S = 2.0
+HEARTBEAT_MS = 1000
+# Rule proteksi tambahan (lihat core/rules.py); tidak ada -> DEFAULT_RULES (alarm saja)
+RULES_FILE = "rules.json"
+# Profil kalibrasi per device (gain/offset, polynomial, LUT); spinbox offset = trim device terpilih
+CALIBRATION_FILE = "calibration.json"
+CALIBRATION_SAVE_MS = 500  # Simpan calibration.json setelah spinbox diam sekian ms
+# Snapshot warm restart (setpoint, latch, kalibrasi, buffer chart/statistik/history)
+SNAPSHOT_INTERVAL_MS = 30000
 
 # --- FUNGSI BARU: PENCARI JALUR ASET ---
 def resource_path(relative_path):
@@ -32,7 +64,7 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class FirmataControllerApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, iot=None, profile=False, restore=True):
         try:
             import ctypes 
             # GANTI STRING INI (Misal jadi .fixed atau .v101)
@@ -73,24 +105,44 @@ class FirmataControllerApp(tk.Tk):
         self.minsize(1200, 750)
         self._setup_styles()
 
-        self.iot = IoTClient()
+        # Sumber data: IoTClient (MQTT), ReplayClient (rekaman offline) atau
+        # RemoteIoTClient (proses ingest terpisah, --ingest-process)
+        self.iot = iot if iot is not None else IoTClient()
+        # core.ingest_process (multiprocessing.connection, subprocess) hanya di-load main.py
+        # untuk --ingest-process; kalau belum di-import, iot pasti bukan RemoteIoTClient
+        ingest = sys.modules.get("core.ingest_process")
+        self._remote = remote = ingest is not None and isinstance(self.iot, ingest.RemoteIoTClient)
         # --- INIT UPDATER ---
         self.app_version = "1.0" #pastikan ganti ini sebelu realise versi terbaru 
-        self.updater = OTAUpdater(current_version=self.app_version)
+        self._updater = None # Dibuat saat pertama cek update (lazy)
+        self._update_results = queue.Queue() # Hasil cek dari worker thread -> thread Tk
+        self._update_poll_after = None # Poll queue hanya selama cek manual berjalan
         
         # --- VARIABLES ---
-        self.broker_address = tk.StringVar(value="broker.emqx.io")
+        self.broker_address = tk.StringVar(value=self.iot.broker if remote else "broker.emqx.io")
+        self.device_var = tk.StringVar(value="")
+        self.known_device_count = 0
         self.setpoint_temp = tk.DoubleVar(value=60.0) 
         self.setpoint_curr = tk.DoubleVar(value=2.0)  
         self.cal_temp = tk.DoubleVar(value=0.0)
         self.cal_curr = tk.DoubleVar(value=0.0)
+        self._loading_cal = False
+        self._cal_save_after = None
 
         self.txt_logic_temp = tk.StringVar(value="OVER TEMP (>60°C)")
         self.txt_logic_curr = tk.StringVar(value="SHORT CIRCUIT (>2A)")
 
         self.is_monitoring = False
+        self.data_cursor = 0 # Posisi baca di ring buffer IoTClient
         self.temp_data = deque([0.0]*60, maxlen=60)
         self.curr_data = deque([0.0]*60, maxlen=60)
+        # Statistik incremental (O(1) per sample) untuk beberapa window sekaligus
+        self.temp_stats = RollingStats()
+        self.curr_stats = RollingStats()
+        self.stats_window = tk.StringVar(value="60 pts")
+        # Riwayat panjang (detik s/d hari) untuk tampilan History
+        self.pyramid = DownsamplePyramid(signals=("temp", "curr"))
+        self.chart_view = tk.StringVar(value="LIVE")
         
         self.inputA = tk.BooleanVar(value=False) 
         self.inputB = tk.BooleanVar(value=False) 
@@ -98,13 +150,91 @@ class FirmataControllerApp(tk.Tk):
         
         self.is_recording = False
         self.csv_filename = ""
+        self.logger = None
         self.record_interval = tk.IntVar(value=1)
+        self.record_format = tk.StringVar(value="CSV")
         self.last_record_time = 0.0
         self.blink_state = False
         self.sim_short_circuit = False 
 
+        # --- PROTECTION ENGINE (jalan di thread MQTT, bukan di loop GUI) ---
+        try:
+            rules = load_rules(RULES_FILE)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring {RULES_FILE}: {e}")
+            rules = load_rules()
+        self.protection = ProtectionEngine(rules=rules)
+        self.iot.attach_protection(self.protection)
+        if remote:
+            # Proses ingest sudah jalan: setpoint/gate miliknya yang berlaku
+            self.setpoint_temp.set(self.protection.setpoint_temp)
+            self.setpoint_curr.set(self.protection.setpoint_curr)
+            self.gate_type.set(self.protection.gate)
+        try:
+            self.calibration = CalibrationStore(CALIBRATION_FILE)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring {CALIBRATION_FILE}: {e}")
+            self.calibration = CalibrationStore()
+            self.calibration.path = CALIBRATION_FILE
+        self.iot.attach_calibration(self.calibration)
+        self._load_calibration_vars()
+        self.last_trip_count = 0
+        self.last_reconnects = 0
+        # Refresh data-driven: thread paho -> flag data_pending + byte wakeup -> request_refresh -> update_loop
+        self._refresh_after = None
+        self._heartbeat_after = None
+        self._data_poll_after = None
+        self._last_data_seen = 0.0
+        self._wakeup = self._setup_data_wakeup()
+        self._last_refresh = 0.0
+        self._last_link_state = None
+        self.stats_window.trace_add("write", lambda *a: self.request_refresh())
+        # Profiler per stage update_loop (opt-in: --profile atau F12, Shift+F12 = capture cProfile)
+        self.profiler = FrameProfiler(enabled=profile)
+        self.last_profile_text = 0.0
+        self.m_tick = REGISTRY.histogram("smartamp_ui_tick_seconds", "GUI update_loop tick duration")
+        REGISTRY.gauge("smartamp_logger_queue_depth", "Rows waiting in the recording queue",
+                       fn=lambda: self.logger.queue_depth if self.logger is not None else 0)
+        REGISTRY.counter("smartamp_logger_rows_dropped_total", "Rows dropped because the recording queue was full",
+                         fn=lambda: self.logger.rows_dropped if self.logger is not None else 0)
+        REGISTRY.counter("smartamp_logger_rows_lost_total", "Rows that failed to write (disk full, share gone)",
+                         fn=lambda: self.logger.rows_lost if self.logger is not None else 0)
+        for var in (self.setpoint_temp, self.setpoint_curr, self.gate_type):
+            var.trace_add("write", self._sync_protection)
+        for var in (self.cal_temp, self.cal_curr):
+            var.trace_add("write", self._sync_calibration)
+
+        # Widget berat (chart, history, logic canvas) dibuat setelah frame pertama tampil
+        self.chart = None
+        self.history_view = None
+        self.logic_canvas = None
+        self.logic_diagram = None
+        # Semua update widget per tick lewat view model: Tk hanya disentuh kalau nilai berubah
+        self.view = ViewModel()
+
+        self.snapshot_path = snapshot.DEFAULT_PATH
+        self._snapshot_thread = None
+        restored = self._restore_snapshot() if restore else None
+
         self._build_ui()
+        if restored:
+            self.status_bar.configure(text=restored, fg=self.theme["accent_blue"])
+        self.after(SNAPSHOT_INTERVAL_MS, self._periodic_snapshot)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bind_all("<F12>", self.toggle_profiler)
+        self.bind_all("<Shift-F12>", lambda e: self.capture_profile())
+        if profile: self.lbl_profile.pack(fill="x", side="bottom", before=self.status_bar)
+        self.after_idle(lambda: self.after(0, self._build_live_chart))
+        # Cek update berkala di background, mulai setelah startup selesai
+        # Hasil cek berkala diambil heartbeat / cek manual berikutnya (tanpa timer sendiri)
+        self.after(5000, lambda: self.updater.start_periodic(lambda *r: self._update_results.put((False,) + r)))
+
+    @property
+    def updater(self):
+        if self._updater is None:
+            from core.updater import OTAUpdater
+            self._updater = OTAUpdater(current_version=self.app_version)
+        return self._updater
 
     def _setup_styles(self):
         style = ttk.Style(self)
@@ -174,7 +304,8 @@ class FirmataControllerApp(tk.Tk):
         self._build_monitor_tab(self.tab_monitor)
         self.tab_logic = ttk.Frame(self.notebook, style="Card.TFrame")
         self.notebook.add(self.tab_logic, text="   ⚡ Logic Analysis   ")
-        self._build_logic_tab(self.tab_logic) 
+        # Tab logic dibangun saat pertama kali dibuka
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # RIGHT
         right_panel = tk.Frame(main_container, bg=self.theme["bg_root"])
@@ -184,6 +315,8 @@ class FirmataControllerApp(tk.Tk):
         
         self.status_bar = tk.Label(self, text="Waiting for Connection...", bg=self.theme["bg_header"], fg=self.theme["text_muted"], anchor="w", padx=10)
         self.status_bar.pack(fill="x", side="bottom", pady=(5,0))
+        # Readout profiler (hanya tampil saat profiler aktif)
+        self.lbl_profile = tk.Label(self, text="", bg=self.theme["bg_header"], fg=self.theme["accent_blue"], anchor="w", padx=10, font=("Consolas", 8))
 
     def _create_card_frame(self, parent, title, expand_content=False):
         frame = tk.Frame(parent, bg=self.theme["bg_card"], highlightthickness=1, highlightbackground=self.theme["border"])
@@ -204,6 +337,10 @@ class FirmataControllerApp(tk.Tk):
         self.ent_broker.pack(fill="x", pady=(5, 10))
         self.btn_connect = ttk.Button(content, text="Connect Cloud", style="Accent.TButton", command=self.toggle_connection)
         self.btn_connect.pack(fill="x")
+        tk.Label(content, text="Device:", bg=self.theme["bg_card"], fg="grey").pack(anchor="w", pady=(10, 0))
+        self.cbox_device = ttk.Combobox(content, textvariable=self.device_var, values=[], state="readonly")
+        self.cbox_device.pack(fill="x", pady=(5, 0))
+        self.cbox_device.bind("<<ComboboxSelected>>", self.on_device_selected)
 
     def _build_control_card(self, parent):
         content = self._create_card_frame(parent, "System Configuration")
@@ -245,7 +382,7 @@ class FirmataControllerApp(tk.Tk):
         
         btn_row = tk.Frame(cmd_frame, bg="#0d1117"); btn_row.pack(fill="x")
         self.btn_on = tk.Button(btn_row, text="ACTIVATE", font=("Segoe UI", 8, "bold"), bg=self.theme["btn_inactive"], fg="#2ea043", 
-                               bd=0, cursor="hand2", command=lambda: self.iot.send_command("ON"))
+                               bd=0, cursor="hand2", command=self.manual_reset)
         self.btn_on.pack(side="left", fill="x", expand=True, padx=(0,2), ipady=5)
         
         self.btn_off = tk.Button(btn_row, text="SHUTDOWN", font=("Segoe UI", 8, "bold"), bg=self.theme["accent_red"], fg="white", 
@@ -256,6 +393,7 @@ class FirmataControllerApp(tk.Tk):
         content = self._create_card_frame(parent, "⚠️ Simulation")
         def toggle_short():
             self.sim_short_circuit = not self.sim_short_circuit
+            self.protection.configure(force_short=self.sim_short_circuit)
             if self.sim_short_circuit:
                 self.btn_sim.config(text="STOP SIMULATION", bg=self.theme["accent_red"])
             else:
@@ -299,8 +437,25 @@ class FirmataControllerApp(tk.Tk):
         self.lbl_temp_big = tk.Label(t_in, text="0.0°C", font=("Segoe UI", 48, "bold"), bg="#21262d", fg=self.theme["accent_blue"])
         self.lbl_temp_big.pack(expand=True)
 
-        # Graph
+        # Graph (LIVE = 60 titik terakhir, HISTORY = pyramid zoomable)
+        view_row = tk.Frame(container, bg=self.theme["bg_card"]); view_row.pack(fill="x", pady=(0, 5))
+        for v in ("LIVE", "HISTORY"):
+            tk.Radiobutton(view_row, text=v, variable=self.chart_view, value=v, command=self._switch_chart_view,
+                           bg=self.theme["bg_card"], fg="white", selectcolor=self.theme["accent_blue"],
+                           indicatoron=0, width=8, pady=3, bd=0, font=("Segoe UI", 8, "bold")).pack(side="left", padx=2)
+        self.monitor_container = container
         graph_frame = tk.Frame(container, bg=self.theme["bg_card"]); graph_frame.pack(fill="both", expand=True)
+        self.live_graph_frame = graph_frame
+        self.lbl_chart_loading = tk.Label(graph_frame, text="Loading chart...", bg=self.theme["bg_card"], fg=self.theme["text_muted"])
+        self.lbl_chart_loading.pack(expand=True)
+
+    def _build_live_chart(self):
+        """Import matplotlib + bangun chart live (dipanggil setelah window tampil)"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from .live_chart import BlitChart
+        graph_frame = self.live_graph_frame
+        self.lbl_chart_loading.destroy()
         self.fig = Figure(figsize=(5, 3), dpi=100, facecolor=self.theme["bg_card"])
         self.fig.subplots_adjust(left=0.1, bottom=0.15, right=0.9, top=0.9)
         self.ax = self.fig.add_subplot(111)
@@ -316,7 +471,32 @@ class FirmataControllerApp(tk.Tk):
         labels = [l.get_label() for l in lines]
         self.ax.legend(lines, labels, loc='upper left', frameon=False, labelcolor='white', fontsize=8)
         self.canvas_chart = FigureCanvasTkAgg(self.fig, master=graph_frame)
+        # Blitting: hanya garis data yang digambar ulang tiap frame
+        self.chart = BlitChart(self.canvas_chart, self.ax, self.ax2, self.line_temp, self.line_curr, max_fps=10)
         self.canvas_chart.draw(); self.canvas_chart.get_tk_widget().pack(fill="both", expand=True)
+        self.lbl_render = tk.Label(graph_frame, text="", font=("Segoe UI", 7), bg=self.theme["bg_card"], fg=self.theme["text_muted"])
+        self.lbl_render.pack(anchor="e")
+
+    def _switch_chart_view(self):
+        if self.chart_view.get() == "HISTORY":
+            if self.history_view is None:
+                from .history_view import HistoryView
+                from core.query import RecordingQuery
+                # Index rekaman dibangun di worker HistoryView, bukan di thread Tk
+                self.history_view = HistoryView(self.monitor_container, self.pyramid, self.theme,
+                                                archive=lambda: RecordingQuery(os.getcwd()))
+            self.history_view.device = self.device_var.get() or None
+            self.live_graph_frame.pack_forget()
+            self.history_view.pack(fill="both", expand=True)
+            self.history_view.refresh()
+        else:
+            self.history_view.pack_forget()
+            self.live_graph_frame.pack(fill="both", expand=True)
+        self.request_refresh()
+
+    def _on_tab_changed(self, event=None):
+        if self.logic_canvas is None and self.notebook.select() == str(self.tab_logic):
+            self._build_logic_tab(self.tab_logic)
 
     def _build_logic_tab(self, parent):
         container = tk.Frame(parent, bg=self.theme["bg_card"])
@@ -330,6 +510,7 @@ class FirmataControllerApp(tk.Tk):
                           indicatoron=0, width=8, pady=5, bd=0).pack(side="left", padx=2)
         self.logic_canvas = tk.Canvas(container, bg="#0d1117", highlightthickness=0)
         self.logic_canvas.pack(fill="both", expand=True)
+        self.logic_diagram = LogicDiagram(self.logic_canvas, self.theme, self.view)
         input_frame = tk.Frame(container, bg=self.theme["bg_card"], pady=10)
         input_frame.pack(fill="x")
         f_a = tk.Frame(input_frame, bg=self.theme["bg_card"]); f_a.pack(side="left", expand=True)
@@ -338,9 +519,19 @@ class FirmataControllerApp(tk.Tk):
         f_b = tk.Frame(input_frame, bg=self.theme["bg_card"]); f_b.pack(side="left", expand=True)
         tk.Label(f_b, textvariable=self.txt_logic_curr, fg=self.theme["accent_yellow"], bg=self.theme["bg_card"], font=("bold")).pack()
         ttk.Checkbutton(f_b, variable=self.inputB, style="Switch.TCheckbutton", state="disabled").pack()
+        rules_frame = tk.Frame(container, bg=self.theme["bg_card"]); rules_frame.pack(fill="x")
+        tk.Label(rules_frame, text=f"RULES ({RULES_FILE}):", bg=self.theme["bg_card"], fg="grey", font=("bold")).pack(anchor="w")
+        self.rule_rows = []
+        for _ in self.protection.rule_status():
+            row = tk.Label(rules_frame, text="", anchor="w", font=("Consolas", 9), bg=self.theme["bg_card"], fg=self.theme["text_muted"])
+            row.pack(fill="x")
+            self.rule_rows.append(row)
 
     def _build_stats_card(self, parent):
         content = self._create_card_frame(parent, "Live Statistics")
+        win_row = tk.Frame(content, bg=self.theme["bg_card"]); win_row.pack(fill="x", pady=(0, 8))
+        tk.Label(win_row, text="Window:", bg=self.theme["bg_card"], fg="grey").pack(side="left")
+        ttk.Combobox(win_row, textvariable=self.stats_window, values=list(DEFAULT_WINDOWS), width=8, state="readonly").pack(side="right")
         tk.Label(content, text="TEMPERATURE", font=("Segoe UI", 8, "bold"), bg=self.theme["bg_card"], fg=self.theme["accent_blue"]).pack(anchor="w")
         self.stat_temp_max = self._add_stat(content, "Max:", "0.0°C")
         self.stat_temp_min = self._add_stat(content, "Min:", "0.0°C")
@@ -371,6 +562,10 @@ class FirmataControllerApp(tk.Tk):
         cbox = ttk.Combobox(int_row, textvariable=self.record_interval, values=[x[1] for x in intervals], width=5, state="readonly")
         cbox.pack(side="right"); cbox.current(0)
         
+        fmt_row = tk.Frame(content, bg=self.theme["bg_card"]); fmt_row.pack(fill="x", pady=(0, 10))
+        tk.Label(fmt_row, text="Log Format:", bg=self.theme["bg_card"], fg="grey").pack(side="left")
+        ttk.Combobox(fmt_row, textvariable=self.record_format, values=["CSV", "Binary"], width=7, state="readonly").pack(side="right")
+        
         self.btn_record = tk.Button(content, text="START RECORDING", font=("Segoe UI", 10, "bold"),
                                   bg=self.theme["btn_record_off"], fg="white",
                                   activebackground="#30363d", activeforeground="white",
@@ -396,14 +591,34 @@ class FirmataControllerApp(tk.Tk):
     # --- LOGIC UPDATE ---
     def check_software_update(self):
         self.btn_update.config(text="CONNECTING TO CLOUD...", state="disabled", fg="grey")
-        self.update() # Refresh UI biar gak freeze
-        
-        # Delay dikit biar kerasa "Loading"-nya (Simulasi proses)
-        self.after(500, self._perform_update_check)
+        # Request jalan di worker thread; hasil dikirim lewat queue supaya GUI tidak freeze
+        self.updater.check_async(lambda *r: self._update_results.put((True,) + r))
+        if self._update_poll_after is None:
+            self._update_poll_after = self.after(250, self._poll_update_results)
+
+    def _drain_update_results(self):
+        """Ambil hasil cek update dari worker thread (dijalankan di thread Tk)"""
+        try:
+            while True:
+                manual, is_available, new_ver = self._update_results.get_nowait()
+                self._show_update_result(manual, is_available, new_ver)
+        except queue.Empty:
+            pass
+
+    def _poll_update_results(self):
+        """Hanya dijadwalkan selama cek manual belum selesai (tombol masih disabled)"""
+        self._update_poll_after = None
+        self._drain_update_results()
+        if str(self.btn_update["state"]) == "disabled":
+            self._update_poll_after = self.after(250, self._poll_update_results)
+
+    def _show_update_result(self, manual, is_available, new_ver):
+        if not manual:
+            # Cek berkala: diam kecuali ada versi baru, tanpa dialog
+            if is_available and str(self.btn_update["state"]) == "normal":
+                self.btn_update.config(text=f"UPDATE AVAILABLE (v{new_ver})", bg=self.theme["accent_green"], fg="white")
+            return
 
-    def _perform_update_check(self):
-        is_available, new_ver = self.updater.check_for_updates()
-        
         self.btn_update.config(state="normal")
         
         if is_available:
@@ -427,18 +642,96 @@ class FirmataControllerApp(tk.Tk):
         v.pack(side="right")
         return v
 
+    def _sync_protection(self, *args):
+        """Kirim setpoint/gate terbaru ke ProtectionEngine"""
+        try:
+            self.protection.configure(setpoint_temp=self.setpoint_temp.get(),
+                                      setpoint_curr=self.setpoint_curr.get(),
+                                      gate=self.gate_type.get())
+        except (tk.TclError, ValueError):
+            pass # Input spinbox belum lengkap, pakai nilai lama
+        self.request_refresh()
+
+    def _sync_calibration(self, *args):
+        """Spinbox offset -> trim profil kalibrasi device terpilih (berlaku untuk sample berikutnya)"""
+        if self._loading_cal: return
+        try:
+            trims = {"temp": self.cal_temp.get(), "curr": self.cal_curr.get()}
+        except tk.TclError:
+            return # Input spinbox belum lengkap
+        device = self.iot.device_id
+        for signal, trim in trims.items():
+            self.calibration.set_trim(device, signal, trim)
+        # Tulis file sekali setelah input berhenti, bukan per ketikan
+        if self._cal_save_after is not None:
+            self.after_cancel(self._cal_save_after)
+        self._cal_save_after = self.after(CALIBRATION_SAVE_MS, self._save_calibration)
+
+    def _save_calibration(self):
+        self._cal_save_after = None
+        try:
+            self.calibration.save()
+        except OSError as e:
+            self.status_bar.configure(text=f"Calibration not saved: {e}", fg=self.theme["accent_yellow"])
+
+    def _load_calibration_vars(self):
+        """Tampilkan trim profil device terpilih di spinbox"""
+        profile = self.calibration.profile_for(self.iot.device_id)
+        self._loading_cal = True
+        try:
+            self.cal_temp.set(profile.trim("temp"))
+            self.cal_curr.set(profile.trim("curr"))
+        finally:
+            self._loading_cal = False
+
+    def on_device_selected(self, *args):
+        """Pindah device yang dipantau, grafik mulai dari kosong"""
+        self.iot.select_device(self.device_var.get())
+        self._load_calibration_vars()
+        self.data_cursor = self.iot.buffer.cursor()
+        self.temp_data.extend([0.0] * self.temp_data.maxlen)
+        self.curr_data.extend([0.0] * self.curr_data.maxlen)
+        self.temp_stats = RollingStats()
+        self.curr_stats = RollingStats()
+        self.pyramid = DownsamplePyramid(signals=("temp", "curr"))
+        if self.history_view is not None:
+            self.history_view.pyramid = self.pyramid
+            self.history_view.device = self.device_var.get() or None
+        self.request_refresh()
+
+    def _refresh_device_list(self):
+        if len(self.iot.devices) == self.known_device_count: return
+        ids = list(self.iot.devices.device_ids)
+        self.known_device_count = len(ids)
+        self.cbox_device.config(values=ids)
+        if not self.device_var.get() and self.iot.device_id:
+            self.device_var.set(self.iot.device_id)
+            self._load_calibration_vars()
+
+    def manual_reset(self):
+        """Reset safety latch device terpilih lalu nyalakan relay-nya"""
+        self.protection.reset(self.iot.device_id)
+        self.iot.send_command("ON")
+
     def toggle_connection(self):
-        if not self.iot.is_connected:
+        if not self.is_monitoring:
             broker = self.broker_address.get()
+            self.data_cursor = self.iot.buffer.cursor()
+            if isinstance(self.iot, ReplayClient):
+                self.iot.ack(self.data_cursor)
+                broker = self.iot.broker
+                self.replay_reported = False
             if self.iot.connect_broker(broker):
                 self.btn_connect.configure(text="Disconnect Cloud", style="Destructive.TButton")
-                self.status_bar.configure(text=f"Connected to {broker}", fg=self.theme["accent_green"])
-                # HEADER UPDATE (ONLINE)
-                self.cloud_dot.itemconfig(self.cloud_dot_id, fill=self.theme["accent_green"])
-                self.lbl_cloud_text.config(text="ONLINE", fg=self.theme["accent_green"])
+                # Connect jalan di background (reconnect otomatis); header diupdate update_loop
+                self.status_bar.configure(text=f"Connecting to {broker}...", fg=self.theme["accent_green"])
+                self.last_reconnects = self.iot.connection.reconnects
                 
                 self.is_monitoring = True
-                self.update_loop()
+                self._last_link_state = None
+                self.request_refresh()
+                if self._heartbeat_after is None: self._heartbeat()
+                self._start_data_poll()
             else:
                 messagebox.showerror("Error", "Gagal connect ke Broker MQTT")
         else:
@@ -447,126 +740,255 @@ class FirmataControllerApp(tk.Tk):
             self.is_monitoring = False
             self.status_bar.configure(text="Disconnected", fg=self.theme["text_muted"])
             # HEADER UPDATE (OFFLINE)
-            self.cloud_dot.itemconfig(self.cloud_dot_id, fill="#30363d")
-            self.lbl_cloud_text.config(text="OFFLINE", fg="#8b949e")
+            self.view.itemconfig(self.cloud_dot, self.cloud_dot_id, fill="#30363d")
+            self.view.config(self.lbl_cloud_text, text="OFFLINE", fg="#8b949e")
             # RELAY UPDATE (UNKNOWN)
-            self.lbl_relay_status.config(text="UNKNOWN", fg="grey")
+            self.view.config(self.lbl_relay_status, text="UNKNOWN", fg="grey")
 
     def update_loop(self):
+        """Satu frame UI: dipanggil lewat request_refresh (data pending) atau heartbeat (perubahan link)"""
         if not self.is_monitoring: return
+        t_tick = time.perf_counter()
+        self.iot.ack_data_signal() # Sebelum drain: sample yang masuk setelah ini memicu signal baru
+        prof = self.profiler
+        prof.begin()
         
         data = self.iot.get_data()
         is_online = self.iot.check_online_status()
+        self._refresh_device_list()
         
         # Header Status Check (Double Check)
         if is_online:
-            self.cloud_dot.itemconfig(self.cloud_dot_id, fill=self.theme["accent_green"])
-            self.lbl_cloud_text.config(text="ONLINE", fg=self.theme["accent_green"])
+            self.view.itemconfig(self.cloud_dot, self.cloud_dot_id, fill=self.theme["accent_green"])
+            self.view.config(self.lbl_cloud_text, text="ONLINE", fg=self.theme["accent_green"])
+        elif not self.iot.is_connected:
+            # Broker putus: ConnectionManager sedang backoff / reconnect
+            self.view.itemconfig(self.cloud_dot, self.cloud_dot_id, fill=self.theme["accent_yellow"])
+            self.view.config(self.lbl_cloud_text, text="RECONNECTING...", fg=self.theme["accent_yellow"])
         else:
-            self.cloud_dot.itemconfig(self.cloud_dot_id, fill=self.theme["accent_red"])
-            self.lbl_cloud_text.config(text="DISCONNECTED", fg=self.theme["accent_red"])
+            self.view.itemconfig(self.cloud_dot, self.cloud_dot_id, fill=self.theme["accent_red"])
+            self.view.config(self.lbl_cloud_text, text="DISCONNECTED", fg=self.theme["accent_red"])
+        conn = self.iot.connection
+        if conn.reconnects != self.last_reconnects:
+            self.last_reconnects = conn.reconnects
+            self.status_bar.configure(text=f"Reconnected to broker (#{conn.reconnects}) - gap {conn.last_gap:.1f} s, "
+                                           f"total downtime {conn.downtime:.1f} s", fg=self.theme["accent_yellow"])
 
-        real_temp = data.get('temp', 0.0)
-        real_volt = data.get('volt', 0.0)
-        real_curr = data.get('curr', 0.0)
-        relay_on = data.get('relay', True)
-        
-        calibrated_temp = real_temp + self.cal_temp.get()
-        calibrated_curr = real_curr + self.cal_curr.get()
-        if calibrated_curr < 0: calibrated_curr = 0.0
-        
-        try:
-            current_limit_t = self.setpoint_temp.get()
-            current_limit_c = self.setpoint_curr.get()
-            self.txt_logic_temp.set(f"OVER TEMP (>{current_limit_t}°C)")
-            self.txt_logic_curr.set(f"SHORT CIRCUIT (>{current_limit_c}A)")
-        except:
-            current_limit_t = 60.0; current_limit_c = 2.0
-
-        if self.sim_short_circuit:
-            display_curr = current_limit_c + 1.5 
+        # Ambil SEMUA sample sejak tick terakhir (tidak ada yang terlewat)
+        rows, self.data_cursor, _lost = self.iot.buffer.drain_since(self.data_cursor)
+        if isinstance(self.iot, ReplayClient):
+            self.iot.ack(self.data_cursor) # Backpressure untuk mode replay
+            if self.iot.finished.is_set() and not self.replay_reported:
+                self.replay_reported = True
+                self.status_bar.configure(text=f"Replay finished: {self.iot.samples_pushed} samples, "
+                                               f"{self.iot.samples_per_second:,.0f} samples/s end-to-end",
+                                          fg=self.theme["accent_blue"])
+        # Tanpa sample baru (heartbeat / perubahan link): hanya status yang diupdate,
+        # chart / statistik / log tidak diberi titik palsu dari latest_data lama
+        has_rows = len(rows) > 0
+        relay_on = bool(rows[-1, COL_RELAY]) if has_rows else data.get('relay', True)
+        current_limit_t = self.protection.setpoint_temp
+        current_limit_c = self.protection.setpoint_curr
+        self.view.set(self.txt_logic_temp, f"OVER TEMP (>{current_limit_t}°C)")
+        self.view.set(self.txt_logic_curr, f"SHORT CIRCUIT (>{current_limit_c}A)")
+        if has_rows:
+            # Kalibrasi per device sudah diterapkan IoTClient saat ingest (kolom *_RAW = nilai asli)
+            calibrated_temps = rows[:, COL_TEMP].tolist()
+            if self.sim_short_circuit:
+                calibrated_currs = [self.protection.setpoint_curr + 1.5] * len(rows)
+            else:
+                calibrated_currs = np.maximum(rows[:, COL_CURR], 0.0).tolist()
+            display_volt = float(rows[-1, COL_VOLT])
+            display_temp = calibrated_temps[-1]
+            display_curr = calibrated_currs[-1]
+            prof.mark("ingest")
+
+            self.temp_data.extend(calibrated_temps)
+            self.curr_data.extend(calibrated_currs)
+            self.view.config(self.lbl_temp_big, text=f"{display_temp:.1f}°C")
+            self.view.config(self.lbl_volt, text=f"{display_volt:.2f} V")
+            self.view.config(self.lbl_curr, text=f"{display_curr:.3f} A", fg=self.theme["accent_red"] if display_curr > current_limit_c else "white")
+            prof.mark("labels")
+
+            ts = rows[:, COL_TS].tolist()
+            self.temp_stats.extend(ts, calibrated_temps)
+            self.curr_stats.extend(ts, calibrated_currs)
+            self.pyramid.extend(ts, temp=calibrated_temps, curr=calibrated_currs)
         else:
-            display_curr = calibrated_curr
-        
-        display_volt = real_volt
-        display_temp = calibrated_temp
-            
-        self.temp_data.append(display_temp)
-        self.curr_data.append(display_curr)
-        
-        self.lbl_temp_big.config(text=f"{display_temp:.1f}°C")
-        self.lbl_volt.config(text=f"{display_volt:.2f} V")
-        self.lbl_curr.config(text=f"{display_curr:.3f} A", fg=self.theme["accent_red"] if display_curr > current_limit_c else "white")
-        
-        t_list = list(self.temp_data); c_list = list(self.curr_data)
-        if t_list:
-            self.stat_temp_max.config(text=f"{max(t_list):.1f}°C")
-            self.stat_temp_min.config(text=f"{min(t_list):.1f}°C")
-            self.stat_temp_avg.config(text=f"{sum(t_list)/len(t_list):.1f}°C")
-        if c_list:
-            self.stat_curr_max.config(text=f"{max(c_list):.2f} A")
-            self.stat_curr_min.config(text=f"{min(c_list):.2f} A")
-            self.stat_curr_avg.config(text=f"{sum(c_list)/len(c_list):.2f} A")
+            now = time.time()
+            self.temp_stats.expire(now); self.curr_stats.expire(now)
+        win = self.stats_window.get()
+        t_win = self.temp_stats[win]; c_win = self.curr_stats[win]
+        if t_win.count:
+            self.view.config(self.stat_temp_max, text=f"{t_win.max:.1f}°C")
+            self.view.config(self.stat_temp_min, text=f"{t_win.min:.1f}°C")
+            self.view.config(self.stat_temp_avg, text=f"{t_win.mean:.1f}°C")
+        if c_win.count:
+            self.view.config(self.stat_curr_max, text=f"{c_win.max:.2f} A")
+            self.view.config(self.stat_curr_min, text=f"{c_win.min:.2f} A")
+            self.view.config(self.stat_curr_avg, text=f"{c_win.mean:.2f} A")
+        prof.mark("stats")
         
         # --- UPDATE STATUS RELAY & BUTTONS ---
         if is_online:
             if relay_on:
-                self.btn_on.config(bg=self.theme["btn_active"])
-                self.btn_off.config(bg=self.theme["accent_red"])
+                self.view.config(self.btn_on, bg=self.theme["btn_active"])
+                self.view.config(self.btn_off, bg=self.theme["accent_red"])
                 # Update Label di Panel Kanan
-                self.lbl_relay_status.config(text="ACTIVE (ON)", fg=self.theme["accent_green"])
+                self.view.config(self.lbl_relay_status, text="ACTIVE (ON)", fg=self.theme["accent_green"])
             else:
-                self.btn_on.config(bg=self.theme["btn_inactive"])
-                self.btn_off.config(bg="#800000")
+                self.view.config(self.btn_on, bg=self.theme["btn_inactive"])
+                self.view.config(self.btn_off, bg="#800000")
                 # Update Label di Panel Kanan
-                self.lbl_relay_status.config(text="CUT OFF (PROTECTED)", fg=self.theme["accent_red"])
+                self.view.config(self.lbl_relay_status, text="CUT OFF (PROTECTED)", fg=self.theme["accent_red"])
         else:
-            self.lbl_relay_status.config(text="UNKNOWN", fg="grey")
+            self.view.config(self.lbl_relay_status, text="UNKNOWN", fg="grey")
+        prof.mark("relay")
 
-        self.line_temp.set_data(range(len(self.temp_data)), self.temp_data)
-        self.line_curr.set_data(range(len(self.curr_data)), self.curr_data)
-        
-        if len(self.temp_data) > 0:
-            self.ax.set_ylim(min(self.temp_data)-5, max(self.temp_data)+10)
-            self.ax2.set_ylim(0, max(self.curr_data)*1.5 + 0.5)
-        
-        self.ax.set_xlim(0, 60)
-        self.canvas_chart.draw_idle()
+        if self.chart_view.get() == "HISTORY":
+            self.history_view.refresh_if_due()
+        elif self.chart is not None and has_rows:
+            self.chart.update(self.temp_data, self.curr_data)
+            self.view.config(self.lbl_render, text=f"render {self.chart.frame_ms:.1f} ms (max {self.chart.frame_ms_max:.1f}) | full redraws {self.chart.full_redraws} | tk calls {self.view.last_calls}/tick")
+        prof.mark("chart")
 
-        is_over_temp = display_temp > current_limit_t
-        is_short_circuit = display_curr > current_limit_c
-        
-        self.inputA.set(is_over_temp)
-        self.inputB.set(is_short_circuit)
-        
-        gate = self.gate_type.get()
-        protect_trigger = False
-        if gate == "OR": protect_trigger = is_over_temp or is_short_circuit
-        elif gate == "AND": protect_trigger = is_over_temp and is_short_circuit
-        elif gate == "XOR": protect_trigger = is_over_temp != is_short_circuit
-        
-        self.draw_logic_circuit(is_over_temp, is_short_circuit, protect_trigger, gate)
+        if has_rows:
+            gate = self.protection.gate
+            is_over_temp = is_short_circuit = protect_trigger = False
+            # Visualisasi saja: keputusan trip sudah diambil ProtectionEngine di thread MQTT
+            for t, c in zip(calibrated_temps, calibrated_currs):
+                a, b, out = self.protection.check(t, c)
+                is_over_temp |= a
+                is_short_circuit |= b
+                protect_trigger |= out
+
+            self.view.set(self.inputA, is_over_temp)
+            self.view.set(self.inputB, is_short_circuit)
+            self.draw_logic_circuit(is_over_temp, is_short_circuit, protect_trigger, gate)
+        self._update_rule_panel()
+        prof.mark("logic")
         
-        if protect_trigger and relay_on and is_online:
-            print("Logic Triggered -> Sending Force OFF")
-            self.iot.send_command("OFF")
+        if self.protection.trip_count != self.last_trip_count:
+            self.last_trip_count = self.protection.trip_count
+            device = self.protection.last_trip_device
+            msg = f"PROTECTION TRIPPED (#{self.last_trip_count})"
+            if device is not None:
+                msg += f" on {device}"
+            tripped_by = [r["name"] for r in self.protection.rule_status(device) if r["state"] == "FIRED" and r["action"] == "trip"]
+            if tripped_by:
+                msg += f" by rule {', '.join(tripped_by)}"
+            if self.protection.latencies_ns:
+                msg += f" - OFF sent {self.protection.latencies_ns[-1] / 1000:.0f} µs after message arrival"
+            self.status_bar.configure(text=msg, fg=self.theme["accent_red"])
         
-        if self.is_recording:
+        if self.is_recording and has_rows:
             self.write_csv(display_temp, display_volt, display_curr, protect_trigger)
+        prof.mark("record")
+
+        self.view.end_tick()
+        prof.end()
+        self.m_tick.observe(time.perf_counter() - t_tick)
+        if prof.enabled and t_tick - self.last_profile_text >= 1.0:
+            self.last_profile_text = t_tick
+            self.lbl_profile.config(text=prof.format_summary(budget_ms=1000.0 / REFRESH_HZ))
+
+    # --- Refresh data-driven ---
+    def _setup_data_wakeup(self):
+        """
+        Socketpair: thread paho/watcher menulis satu byte (iot.on_data), mainloop bangun
+        lewat createfilehandler. Thread lain tidak pernah memanggil Tk: event_generate
+        menunggu mainloop (Tcl threaded), sehingga redraw / dialog modal bisa menahan
+        on_message dan keputusan trip. Returns: (reader, writer), atau None -> fallback poll
+        """
+        try:
+            reader, writer = socket.socketpair()
+        except OSError:
+            return None
+        reader.setblocking(False)
+        writer.setblocking(False)
+        try:
+            self.tk.createfilehandler(reader, tk.READABLE, self._on_data_wakeup)
+        except (AttributeError, tk.TclError):
+            reader.close()
+            writer.close()
+            return None  # Windows: tidak ada file handler Tcl
+
+        def wake():
+            try:
+                writer.send(b"\0")
+            except OSError:
+                pass  # Buffer penuh / sudah ditutup: flag data_pending tetap terbaca
+        self.iot.on_data = wake
+        return reader, writer
+
+    def _on_data_wakeup(self, fileobj, mask):
+        try:
+            while self._wakeup[0].recv(4096):
+                pass
+        except OSError:
+            pass  # Kosong (BlockingIOError)
+        if self.iot.data_pending:
+            self.request_refresh()
+
+    def _start_data_poll(self):
+        """Fallback tanpa wakeup: poll flag data_pending sampai idle DATA_IDLE_S"""
+        if self._wakeup is not None or self._data_poll_after is not None: return
+        self._last_data_seen = time.monotonic()
+        self._poll_data()
+
+    def _poll_data(self):
+        self._data_poll_after = None
+        if not self.is_monitoring: return
+        now = time.monotonic()
+        if self.iot.data_pending:
+            self._last_data_seen = now
+            self.request_refresh()
+        elif now - self._last_data_seen >= DATA_IDLE_S:
+            return  # Idle: heartbeat menyalakan poll lagi saat data datang
+        self._data_poll_after = self.after(DATA_POLL_MS, self._poll_data)
+
+    def request_refresh(self, event=None):
+        """Jadwalkan satu update_loop; request yang datang berdekatan digabung (maks REFRESH_HZ)"""
+        if not self.is_monitoring or self._refresh_after is not None: return
+        wait = 1.0 / REFRESH_HZ - (time.perf_counter() - self._last_refresh)
+        self._refresh_after = self.after(max(int(wait * 1000), 0), self._run_refresh)
 
-        self.after(200, self.update_loop)
+    def _run_refresh(self):
+        self._refresh_after = None
+        self._last_refresh = time.perf_counter()
+        self.update_loop()
+
+    def _heartbeat(self):
+        """Saat idle: refresh hanya kalau status link berubah, ada device baru, atau data pending"""
+        self._heartbeat_after = None
+        if not self.is_monitoring: return
+        self._drain_update_results()
+        self._refresh_device_list()
+        state = (self.iot.check_online_status(), self.iot.is_connected, self.iot.connection.reconnects)
+        replay_done = isinstance(self.iot, ReplayClient) and self.iot.finished.is_set() and not self.replay_reported
+        if state != self._last_link_state or self.iot.data_pending or replay_done:
+            self._last_link_state = state
+            self.request_refresh()
+        if self.iot.data_pending:
+            self._start_data_poll()
+        self._heartbeat_after = self.after(HEARTBEAT_MS, self._heartbeat)
 
     def toggle_recording(self):
         if not self.is_recording:
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.csv_filename = f"DataLog_{ts}.csv"
-            with open(self.csv_filename, 'w', newline='') as f:
-                csv.writer(f).writerow(["Time", "Temp(C)", "Volt(V)", "Curr(A)", "Protection_Active"])
+            # Tulis file di background thread, loop GUI hanya memasukkan ke queue
+            logger_cls = BinaryLogger if self.record_format.get() == "Binary" else CsvLogger
+            self.logger = logger_cls(prefix=device_prefix(self.device_var.get())).start()
+            self.csv_filename = self.logger.filename
             self.is_recording = True
             self.btn_record.config(text="STOP RECORDING", bg=self.theme["btn_record_on"])
             self._animate_rec_dot()
         else:
             self.is_recording = False
+            self.logger.stop(timeout=0)
+            if self.logger.rows_dropped or self.logger.rows_lost:
+                self.status_bar.configure(text=f"Recording stopped - {self.logger.rows_dropped} rows dropped (disk too slow), "
+                                               f"{self.logger.rows_lost} lost to write errors ({self.logger.last_error})",
+                                          fg=self.theme["accent_yellow"])
             self.btn_record.config(text="START RECORDING", bg=self.theme["btn_record_off"])
             self.rec_dot.itemconfig(self.dot_id, fill="#21262d")
 
@@ -580,8 +1002,7 @@ class FirmataControllerApp(tk.Tk):
     def write_csv(self, t, v, i, prot):
         if time.time() - self.last_record_time < self.record_interval.get(): return
         self.last_record_time = time.time()
-        with open(self.csv_filename, 'a', newline='') as f:
-            csv.writer(f).writerow([datetime.now().strftime("%H:%M:%S"), t, f"{v:.2f}", f"{i:.2f}", prot])
+        self.logger.log((self.last_record_time, t, v, i, prot))
 
     def open_folder(self):
         path = os.getcwd()
@@ -589,41 +1010,143 @@ class FirmataControllerApp(tk.Tk):
         else: subprocess.Popen(["xdg-open", path])
 
     def draw_logic_circuit(self, a, b, out, gate):
-        c = self.logic_canvas; c.delete("all")
-        w, h = c.winfo_width(), c.winfo_height()
-        if w<10: return
-        cx, cy = w//2, h//2
-        col_a = self.theme["accent_red"] if a else "#30363d" 
-        col_b = self.theme["accent_red"] if b else "#30363d" 
-        col_out = self.theme["accent_red"] if out else self.theme["accent_green"] 
-        outline_col = "white"
-        c.create_line(40, cy-30, cx-40, cy-30, fill=col_a, width=3)
-        c.create_line(40, cy+30, cx-40, cy+30, fill=col_b, width=3)
-        c.create_line(cx+30, cy, w-40, cy, fill=col_out, width=3)
-        if gate == "AND":
-            c.create_line(cx-40, cy-40, cx-40, cy+40, fill=outline_col, width=2)
-            c.create_line(cx-40, cy-40, cx-10, cy-40, fill=outline_col, width=2)
-            c.create_line(cx-40, cy+40, cx-10, cy+40, fill=outline_col, width=2)
-            c.create_arc(cx-50, cy-40, cx+30, cy+40, start=-90, extent=180, style="arc", outline=outline_col, width=2)
-            eq_text = "Q = A • B"
-        elif gate == "OR":
-            c.create_arc(cx-80, cy-40, cx-20, cy+40, start=-70, extent=140, style="arc", outline=outline_col, width=2)
-            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=0, extent=100, style="arc", outline=outline_col, width=2)
-            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=-100, extent=100, style="arc", outline=outline_col, width=2)
-            eq_text = "Q = A + B"
-        elif gate == "XOR":
-            c.create_arc(cx-90, cy-40, cx-30, cy+40, start=-70, extent=140, style="arc", outline=outline_col, width=2)
-            c.create_arc(cx-80, cy-40, cx-20, cy+40, start=-70, extent=140, style="arc", outline=outline_col, width=2)
-            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=0, extent=100, style="arc", outline=outline_col, width=2)
-            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=-100, extent=100, style="arc", outline=outline_col, width=2)
-            eq_text = "Q = A ⊕ B"
-        status_text = "TRIGGERED" if out else "SAFE"
-        c.create_text(cx, h-40, text=f"STATUS: {status_text}", fill=col_out, font=("Segoe UI", 10, "bold"))
-        c.create_text(cx, h-20, text=eq_text, fill="white", font=("Segoe UI", 14, "italic"))
+        if self.logic_diagram is None: return # Tab logic belum pernah dibuka
+        self.logic_diagram.update(a, b, out, gate)
+
+    def _update_rule_panel(self):
+        if self.logic_diagram is None: return
+        colors = {"trip": self.theme["accent_red"], "alarm": self.theme["accent_yellow"]}
+        for row, rule in zip(self.rule_rows, self.protection.rule_status(self.iot.device_id)):
+            if rule["state"] == "FIRED": fg = colors[rule["action"]]
+            elif rule["state"] == "ARMED": fg = self.theme["accent_blue"]
+            else: fg = self.theme["text_muted"]
+            dot = "○" if rule["state"] == "idle" else "●"
+            self.view.config(row, text=f"{dot} {rule['name']:<14} {rule['action']:<5} {rule['state']:<5} {rule['count']:>4}x  {rule['expr']}", fg=fg)
+
+    def toggle_profiler(self, event=None):
+        self.profiler.enabled = not self.profiler.enabled
+        if self.profiler.enabled:
+            self.profiler.reset()
+            self.lbl_profile.config(text="profiler: waiting for ticks...")
+            self.lbl_profile.pack(fill="x", side="bottom", before=self.status_bar)
+        else:
+            self.lbl_profile.pack_forget()
+
+    def capture_profile(self, ticks=50):
+        """Rekam cProfile + trace stage untuk `ticks` tick update_loop berikutnya"""
+        self.profiler.capture(ticks)
+        self.status_bar.configure(text=f"Profiling next {ticks} ticks...", fg=self.theme["accent_blue"])
+        self._report_capture()
+
+    def _report_capture(self):
+        if self.profiler.capturing:
+            self.after(500, self._report_capture)
+        elif self.profiler.last_capture:
+            prof_path, trace_path = self.profiler.last_capture
+            self.status_bar.configure(text=f"Profile saved: {os.path.basename(prof_path)} + {os.path.basename(trace_path)}",
+                                      fg=self.theme["accent_blue"])
 
     def update_logic_visualization(self, *args): self.update()
+    # --- Snapshot warm restart ---
+    def _snapshot_payload(self):
+        """Dikumpulkan di thread Tk (konsisten), ditulis di thread lain"""
+        state = {
+            "device": self.iot.device_id or self.device_var.get() or None,
+            "setpoint_temp": self.protection.setpoint_temp,
+            "setpoint_curr": self.protection.setpoint_curr,
+            "gate": self.protection.gate,
+            "stats_window": self.stats_window.get(),
+            "protection": self.protection.get_state(),
+            "calibration": self.calibration.to_dict(),
+        }
+        arrays = {"temp_data": np.array(self.temp_data), "curr_data": np.array(self.curr_data)}
+        arrays.update(snapshot.prefixed("temp_stats", self.temp_stats.get_state()))
+        arrays.update(snapshot.prefixed("curr_stats", self.curr_stats.get_state()))
+        arrays.update(snapshot.prefixed("pyramid", self.pyramid.get_state()))
+        return state, arrays
+
+    def save_snapshot(self, background=True):
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            if background: return # Tulis sebelumnya belum selesai (disk lambat)
+            self._snapshot_thread.join()
+        state, arrays = self._snapshot_payload()
+
+        def write():
+            try:
+                snapshot.save_snapshot(self.snapshot_path, state, arrays)
+            except OSError as e:
+                print(f"Snapshot not saved: {e}")
+        if background:
+            self._snapshot_thread = threading.Thread(target=write, name="snapshot", daemon=True)
+            self._snapshot_thread.start()
+        else:
+            write()
+
+    def _periodic_snapshot(self):
+        self.save_snapshot()
+        self.after(SNAPSHOT_INTERVAL_MS, self._periodic_snapshot)
+
+    def _restore_snapshot(self):
+        """Returns: teks status kalau snapshot dipulihkan, None kalau tidak ada"""
+        t0 = time.perf_counter()
+        snap = snapshot.load_snapshot(self.snapshot_path)
+        if snap is None: return None
+        state, arrays = snap
+        try:
+            # calibration.json tetap sumber utama; snapshot hanya cadangan
+            if state.get("calibration") and not os.path.exists(CALIBRATION_FILE):
+                self.calibration.update(state["calibration"])
+            # Proses ingest (--ingest-process) memegang device, setpoint dan latch yang sebenarnya
+            remote = self._remote
+            if state.get("device") and not remote:
+                self.device_var.set(state["device"])
+                self.iot.select_device(state["device"])
+            if not remote:
+                self.setpoint_temp.set(state["setpoint_temp"])
+                self.setpoint_curr.set(state["setpoint_curr"])
+                self.gate_type.set(state["gate"])
+            if state.get("stats_window") in DEFAULT_WINDOWS:
+                self.stats_window.set(state["stats_window"])
+            self._load_calibration_vars()
+            # Latch + trip count per device dari snapshot; di mode ingest-process latch dipegang proses ingest
+            if not remote:
+                self.protection.set_state(state["protection"])
+            self.last_trip_count = self.protection.trip_count
+
+            self.temp_data.extend(arrays["temp_data"].tolist())
+            self.curr_data.extend(arrays["curr_data"].tolist())
+            self.temp_stats.set_state(snapshot.unprefixed("temp_stats", arrays))
+            self.curr_stats.set_state(snapshot.unprefixed("curr_stats", arrays))
+            self.pyramid.set_state(snapshot.unprefixed("pyramid", arrays))
+        except (KeyError, ValueError, TypeError, tk.TclError) as e:
+            print(f"Snapshot {self.snapshot_path} incomplete, starting fresh: {e}")
+            return None
+        ms = (time.perf_counter() - t0) * 1000
+        saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["saved_at"]))
+        latched = self.protection.latched_devices()
+        latch = f" - PROTECTION LATCHED ({', '.join(d or '-' for d in latched)})" if latched else ""
+        print(f"Restored snapshot from {saved} in {ms:.1f} ms")
+        return f"Restored session from {saved} ({ms:.0f} ms){latch}"
+
     def on_close(self):
-        self.iot.disconnect_broker()
+        if self._wakeup is not None:
+            self.iot.on_data = None
+            self.tk.deletefilehandler(self._wakeup[0])
+            for sock in self._wakeup:
+                sock.close()
+        if self._cal_save_after is not None:
+            self.after_cancel(self._cal_save_after)
+            self._save_calibration()
+        self.save_snapshot(background=False)
+        if self._updater is not None:
+            self._updater.stop()
+        REGISTRY.stop()
+        if self.logger is not None:
+            self.logger.stop(timeout=2)
+        if self._remote:
+            self.iot.detach() # Proteksi + session MQTT tetap jalan di proses ingest
+        else:
+            self.iot.disconnect_broker()
         self.destroy()
 
 if __name__ == "__main__":
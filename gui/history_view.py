@@ -0,0 +1,204 @@
+"""
+History View - Zoomable Long-Term Trend
+Pan/zoom dari detik sampai hari, dibaca dari DownsamplePyramid sehingga
+setiap zoom hanya menggambar ~1 titik per pixel (envelope min/max + mean).
+Bagian rentang yang lebih tua dari data live diisi dari rekaman di disk
+(core.query.RecordingQuery) kalau archive diberikan. Index dan query rekaman
+jalan di thread "history-archive"; thread Tk hanya memakai hasil terakhirnya.
+"""
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+ARCHIVE_REINDEX_S = 60  # Scan ulang folder rekaman (file baru / yang sedang ditulis)
+ARCHIVE_POLL_MS = 100
+
+SPANS = [("1 min", 60), ("10 min", 600), ("1 h", 3600), ("6 h", 6 * 3600),
+         ("1 day", 86400), ("7 days", 7 * 86400)]
+
+
+class HistoryView(tk.Frame):
+    def __init__(self, parent, pyramid, theme, refresh_interval=1.0, archive=None, device=None):
+        """archive: RecordingQuery, atau callable yang membuatnya (dipanggil di worker thread)"""
+        super().__init__(parent, bg=theme["bg_card"])
+        self.pyramid = pyramid
+        self.archive = archive
+        self.device = device
+        self._last_index = None if callable(archive) else time.time()
+        # Worker archive: request terbaru menimpa yang belum diproses
+        self._archive_lock = threading.Lock()
+        self._archive_wake = threading.Event()
+        self._archive_request = None
+        self._archive_result = None  # (request, history dict)
+        self._archive_fresh = False
+        self._archive_poll_after = None
+        self._archive_thread = None
+        self.theme = theme
+        self.refresh_interval = refresh_interval
+        self.span = 3600
+        self.end = None  # None = ikuti waktu sekarang
+        self._last_refresh = 0.0
+        self.span_var = tk.StringVar(value="1 h")
+
+        # Toolbar: span, pan, now
+        bar = tk.Frame(self, bg=theme["bg_card"]); bar.pack(fill="x", pady=(0, 5))
+        tk.Label(bar, text="Span:", bg=theme["bg_card"], fg="grey").pack(side="left")
+        cbox = ttk.Combobox(bar, textvariable=self.span_var, values=[s[0] for s in SPANS], width=7, state="readonly")
+        cbox.pack(side="left", padx=5)
+        cbox.bind("<<ComboboxSelected>>", self._on_span_selected)
+        for text, cmd in (("◀", lambda: self.pan(-1)), ("▶", lambda: self.pan(1)), ("NOW", self.follow_now)):
+            tk.Button(bar, text=text, command=cmd, bg=theme["btn_inactive"], fg="white", bd=0,
+                      font=("Segoe UI", 8, "bold"), padx=8).pack(side="left", padx=2)
+        self.lbl_level = tk.Label(bar, text="", bg=theme["bg_card"], fg=theme["text_muted"], font=("Segoe UI", 7))
+        self.lbl_level.pack(side="right")
+
+        self.fig = Figure(figsize=(5, 3), dpi=100, facecolor=theme["bg_card"])
+        self.fig.subplots_adjust(left=0.1, bottom=0.15, right=0.9, top=0.9)
+        self.ax = self.fig.add_subplot(111)
+        self.ax2 = self.ax.twinx()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.canvas.mpl_connect("scroll_event", self._on_scroll)
+        self._utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+
+    # --- Navigasi ---
+    def _on_span_selected(self, *args):
+        self.span = dict(SPANS)[self.span_var.get()]
+        self.refresh()
+
+    def _on_scroll(self, event):
+        """Scroll = zoom in/out di sekitar posisi kursor"""
+        factor = 0.5 if event.button == "up" else 2.0
+        t1 = self.end or time.time()
+        new_span = min(max(self.span * factor, 10), 30 * 86400)
+        if event.xdata is not None:
+            # Posisi kursor (hari matplotlib) -> epoch
+            cursor = event.xdata * 86400 - self._utc_offset
+            frac = (t1 - cursor) / self.span
+            t1 = min(cursor + frac * new_span, time.time())
+            self.end = None if t1 >= time.time() - 1 else t1
+        self.span = new_span
+        self.refresh()
+
+    def pan(self, direction):
+        t1 = (self.end or time.time()) + direction * self.span * 0.5
+        self.end = None if t1 >= time.time() else t1
+        self.refresh()
+
+    def follow_now(self):
+        self.end = None
+        self.refresh()
+
+    # --- Render ---
+    def _to_dates(self, t):
+        return ((t + self._utc_offset) * 1000).astype("datetime64[ms]")
+
+    def refresh_if_due(self):
+        """Dipanggil dari loop GUI; hanya redraw saat mengikuti waktu sekarang"""
+        if self.end is None and time.time() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    # --- Archive (worker thread) ---
+    def _archive_run(self):
+        while True:
+            self._archive_wake.wait()
+            with self._archive_lock:
+                self._archive_wake.clear()
+                request, self._archive_request = self._archive_request, None
+            if request is None:
+                continue
+            t0, t1, px, device = request
+            try:
+                if callable(self.archive):
+                    self.archive = self.archive()  # Index dibangun di sini, bukan di thread Tk
+                    self._last_index = time.time()
+                elif time.time() - self._last_index > ARCHIVE_REINDEX_S:
+                    self.archive.refresh()  # File rekaman baru
+                    self._last_index = time.time()
+                old = self.archive.history(t0, t1, max_points=px, device=device)
+            except Exception as e:
+                print(f"History archive error: {e}")
+                old = None
+            with self._archive_lock:
+                if old is not None:
+                    self._archive_result = (request, old)
+                self._archive_fresh = True
+
+    def _request_archive(self, request):
+        with self._archive_lock:
+            self._archive_request = request
+        if self._archive_thread is None:
+            self._archive_thread = threading.Thread(target=self._archive_run, name="history-archive", daemon=True)
+            self._archive_thread.start()
+        self._archive_wake.set()
+        if self._archive_poll_after is None:
+            self._archive_poll_after = self.after(ARCHIVE_POLL_MS, self._poll_archive)
+
+    def _poll_archive(self):
+        """Redraw sekali saat worker selesai; poll hanya berjalan selama ada request"""
+        self._archive_poll_after = None
+        with self._archive_lock:
+            fresh, self._archive_fresh = self._archive_fresh, False
+            pending = self._archive_request is not None
+        if fresh:
+            self.refresh(request_archive=False)
+        if pending or not fresh:
+            self._archive_poll_after = self.after(ARCHIVE_POLL_MS, self._poll_archive)
+
+    def _archive_for(self, t0, t1, px):
+        """Hasil archive terakhir yang dipotong ke [t0, t1); None kalau perlu query baru"""
+        with self._archive_lock:
+            result = self._archive_result
+        if result is None:
+            return None, True
+        (r0, r1, rpx, rdev), old = result
+        if rdev != self.device:
+            return None, True
+        tol = max(self.span * 0.05, 5.0)
+        stale = rpx != px or abs(r0 - t0) > tol or abs(r1 - t1) > tol
+        keep = (old["t"] >= t0) & (old["t"] < t1)
+        return {k: (v[keep] if k != "width" else v) for k, v in old.items()}, stale
+
+    def refresh(self, request_archive=True):
+        self._last_refresh = time.time()
+        t1 = self.end or self._last_refresh
+        t0 = t1 - self.span
+        px = max(self.canvas.get_tk_widget().winfo_width(), 100)
+        q = self.pyramid.query(t0, t1, max_points=px)
+        n_archive = 0
+        if self.archive is not None:
+            # Bagian sebelum sampel live pertama diambil dari rekaman (hasil worker terakhir)
+            live_start = q["t"][0] - q["width"] / 2.0 if len(q["t"]) else t1
+            if live_start > t0:
+                old, stale = self._archive_for(t0, live_start, px)
+                if stale and request_archive:
+                    self._request_archive((t0, live_start, px, self.device))
+                if old is not None and len(old["t"]):
+                    q = {k: (np.concatenate([old[k], v]) if k != "width" else v) for k, v in q.items()}
+                    n_archive = len(old["t"])
+
+        for ax in (self.ax, self.ax2):
+            ax.cla()
+        self.ax.set_facecolor("#0d1117")
+        self.ax.grid(True, color=self.theme["border"], linestyle="--", linewidth=0.5)
+        self.ax.tick_params(axis="y", colors=self.theme["accent_blue"], labelsize=8)
+        self.ax.tick_params(axis="x", colors=self.theme["text_muted"], labelsize=8)
+        self.ax2.tick_params(axis="y", colors=self.theme["accent_yellow"], labelsize=8)
+
+        x = self._to_dates(q["t"])
+        if len(x):
+            # Envelope min/max supaya spike tetap terlihat
+            self.ax.fill_between(x, q["temp_min"], q["temp_max"], color=self.theme["accent_blue"], alpha=0.25, linewidth=0)
+            self.ax.plot(x, q["temp_mean"], color=self.theme["accent_blue"], linewidth=1.2)
+            self.ax2.fill_between(x, q["curr_min"], q["curr_max"], color=self.theme["accent_yellow"], alpha=0.25, linewidth=0)
+            self.ax2.plot(x, q["curr_mean"], color=self.theme["accent_yellow"], linewidth=1.2)
+        self.ax.set_xlim(self._to_dates(np.array([t0, t1])))
+        src = f" ({n_archive} from recordings)" if n_archive else ""
+        self.lbl_level.config(text=f"{len(x)} buckets @ {q['width']} s{src}")
+        self.canvas.draw_idle()
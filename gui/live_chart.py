@@ -0,0 +1,106 @@
+"""
+Live Chart - Blitted Renderer
+Background (axes, tick, grid, legend) di-cache sekali, setiap frame hanya
+line_temp/line_curr yang digambar ulang. Sumbu-Y hanya di-rescale kalau data
+keluar range (dengan hysteresis), dan render rate dibatasi terpisah dari data rate.
+"""
+import time
+from collections import deque
+
+
+class BlitChart:
+    def __init__(self, canvas, ax, ax2, line_temp, line_curr, max_fps=10, x_span=60):
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.ax = ax
+        self.ax2 = ax2
+        self.lines = ((ax, line_temp), (ax2, line_curr))
+        self.line_temp = line_temp
+        self.line_curr = line_curr
+        self.min_interval = 1.0 / max_fps
+        self.x_span = x_span
+
+        self._background = None
+        self._last_render = 0.0
+        self._pending = None        # after() id untuk render yang ditunda
+        self._data = ((), ())
+        self.frame_times = deque(maxlen=100)  # detik per frame (blit)
+        self.full_redraws = 0
+
+        for _, line in self.lines:
+            line.set_animated(True)
+        self.ax.set_xlim(0, x_span)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # --- Background cache ---
+    def _on_draw(self, event):
+        """Dipanggil setelah full draw (resize / rescale): simpan background baru"""
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.full_redraws += 1
+        self._blit_lines()
+
+    def _blit_lines(self):
+        for ax, line in self.lines:
+            ax.draw_artist(line)
+        self.canvas.blit(self.fig.bbox)
+
+    # --- Y-axis dengan hysteresis ---
+    @staticmethod
+    def _rescale(axis, lo, hi, target):
+        """Set ylim=target kalau data keluar range, atau target < 1/2 range sekarang"""
+        cur_lo, cur_hi = axis.get_ylim()
+        if lo < cur_lo or hi > cur_hi or (target[1] - target[0]) * 2 < (cur_hi - cur_lo):
+            axis.set_ylim(*target)
+            return True
+        return False
+
+    def _update_limits(self, temps, currs):
+        t_lo, t_hi = min(temps), max(temps)
+        c_hi = max(currs)
+        changed = self._rescale(self.ax, t_lo, t_hi, (t_lo - 5, t_hi + 10))
+        changed |= self._rescale(self.ax2, 0.0, c_hi, (0, c_hi * 1.5 + 0.5))
+        return changed
+
+    # --- API ---
+    def update(self, temps, currs):
+        """Set data terbaru; render maksimal max_fps kali per detik"""
+        self.line_temp.set_data(range(len(temps)), temps)
+        self.line_curr.set_data(range(len(currs)), currs)
+        self._data = (temps, currs)
+
+        wait = self.min_interval - (time.perf_counter() - self._last_render)
+        if wait > 0:
+            if self._pending is None:
+                widget = self.canvas.get_tk_widget()
+                self._pending = widget.after(int(wait * 1000) + 1, self._deferred_render)
+            return
+        self.render()
+
+    def _deferred_render(self):
+        self._pending = None
+        self.render()
+
+    def render(self):
+        t0 = time.perf_counter()
+        self._last_render = t0
+        temps, currs = self._data
+        if len(temps) and self._update_limits(temps, currs):
+            # Skala berubah -> full redraw, background di-cache ulang di _on_draw
+            self.canvas.draw_idle()
+        elif self._background is None:
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(self._background)
+            self._blit_lines()
+            self.frame_times.append(time.perf_counter() - t0)
+
+    @property
+    def frame_ms(self):
+        """Rata-rata waktu blit per frame (ms)"""
+        if not self.frame_times:
+            return 0.0
+        return sum(self.frame_times) / len(self.frame_times) * 1000.0
+
+    @property
+    def frame_ms_max(self):
+        return max(self.frame_times, default=0.0) * 1000.0
@@ -0,0 +1,67 @@
+"""
+Logic Diagram - Retained-Mode Gate Canvas
+Item canvas (kabel, bentuk gate, teks) dibuat sekali per gate/ukuran canvas.
+Setiap tick hanya warna kabel dan teks status yang di-update via itemconfig,
+lewat ViewModel supaya nilai yang sama tidak dikirim ulang ke Tk.
+"""
+
+OFF_COLOR = "#30363d"
+OUTLINE = "white"
+
+EQUATIONS = {"AND": "Q = A • B", "OR": "Q = A + B", "XOR": "Q = A ⊕ B"}
+
+
+class LogicDiagram:
+    def __init__(self, canvas, theme, view):
+        self.canvas = canvas
+        self.theme = theme
+        self.view = view
+        self.items = {}
+        self._built_for = None      # (gate, w, h) yang sedang tergambar
+        self.rebuilds = 0
+        canvas.bind("<Configure>", self._on_resize)
+
+    def _on_resize(self, event):
+        self._built_for = None  # Ukuran berubah -> bangun ulang di update berikutnya
+
+    def _build(self, gate, w, h):
+        c = self.canvas
+        c.delete("all")
+        self.view.forget(c)
+        cx, cy = w // 2, h // 2
+        self.items = {
+            "a": c.create_line(40, cy-30, cx-40, cy-30, fill=OFF_COLOR, width=3),
+            "b": c.create_line(40, cy+30, cx-40, cy+30, fill=OFF_COLOR, width=3),
+            "out": c.create_line(cx+30, cy, w-40, cy, fill=OFF_COLOR, width=3),
+        }
+        if gate == "AND":
+            c.create_line(cx-40, cy-40, cx-40, cy+40, fill=OUTLINE, width=2)
+            c.create_line(cx-40, cy-40, cx-10, cy-40, fill=OUTLINE, width=2)
+            c.create_line(cx-40, cy+40, cx-10, cy+40, fill=OUTLINE, width=2)
+            c.create_arc(cx-50, cy-40, cx+30, cy+40, start=-90, extent=180, style="arc", outline=OUTLINE, width=2)
+        elif gate == "OR":
+            c.create_arc(cx-80, cy-40, cx-20, cy+40, start=-70, extent=140, style="arc", outline=OUTLINE, width=2)
+            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=0, extent=100, style="arc", outline=OUTLINE, width=2)
+            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=-100, extent=100, style="arc", outline=OUTLINE, width=2)
+        elif gate == "XOR":
+            c.create_arc(cx-90, cy-40, cx-30, cy+40, start=-70, extent=140, style="arc", outline=OUTLINE, width=2)
+            c.create_arc(cx-80, cy-40, cx-20, cy+40, start=-70, extent=140, style="arc", outline=OUTLINE, width=2)
+            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=0, extent=100, style="arc", outline=OUTLINE, width=2)
+            c.create_arc(cx-90, cy-50, cx+50, cy+50, start=-100, extent=100, style="arc", outline=OUTLINE, width=2)
+        self.items["status"] = c.create_text(cx, h-40, text="", fill=OFF_COLOR, font=("Segoe UI", 10, "bold"))
+        c.create_text(cx, h-20, text=EQUATIONS.get(gate, ""), fill="white", font=("Segoe UI", 14, "italic"))
+        self._built_for = (gate, w, h)
+        self.rebuilds += 1
+
+    def update(self, a, b, out, gate):
+        c = self.canvas
+        w, h = c.winfo_width(), c.winfo_height()
+        if w < 10: return
+        if self._built_for != (gate, w, h):
+            self._build(gate, w, h)
+
+        col_out = self.theme["accent_red"] if out else self.theme["accent_green"]
+        self.view.itemconfig(c, self.items["a"], fill=self.theme["accent_red"] if a else OFF_COLOR)
+        self.view.itemconfig(c, self.items["b"], fill=self.theme["accent_red"] if b else OFF_COLOR)
+        self.view.itemconfig(c, self.items["out"], fill=col_out)
+        self.view.itemconfig(c, self.items["status"], text=f"STATUS: {'TRIGGERED' if out else 'SAFE'}", fill=col_out)
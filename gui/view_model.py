@@ -0,0 +1,59 @@
+"""
+View Model - Change-Only Widget Updates
+Menyimpan nilai yang sedang tampil di setiap widget dan hanya memanggil Tk
+(config / itemconfig / Variable.set) kalau nilainya berubah. Jumlah panggilan
+Tk per tick dihitung supaya biaya update UI bisa diukur.
+"""
+
+
+class ViewModel:
+    def __init__(self):
+        self._shown = {}        # key -> dict opsi yang sedang tampil
+        self.calls = 0          # panggilan Tk pada tick berjalan
+        self.skipped = 0        # update yang di-skip karena tidak berubah
+        self.last_calls = 0     # hasil tick sebelumnya
+        self.last_skipped = 0
+
+    def _diff(self, key, opts):
+        shown = self._shown.setdefault(key, {})
+        changed = {k: v for k, v in opts.items() if shown.get(k, _MISSING) != v}
+        self.skipped += len(opts) - len(changed)
+        if changed:
+            shown.update(changed)
+            self.calls += 1
+        return changed
+
+    def config(self, widget, **opts):
+        """widget.config(...) hanya dengan opsi yang berubah"""
+        changed = self._diff(str(widget), opts)
+        if changed:
+            widget.config(**changed)
+
+    def itemconfig(self, canvas, item, **opts):
+        """canvas.itemconfig(item, ...) hanya dengan opsi yang berubah"""
+        changed = self._diff((str(canvas), item), opts)
+        if changed:
+            canvas.itemconfig(item, **changed)
+
+    def set(self, var, value):
+        """tk.Variable.set hanya kalau nilainya berubah"""
+        if self._diff(str(var), {"value": value}):
+            var.set(value)
+
+    def forget(self, prefix):
+        """Lupakan cache widget di bawah path Tk tertentu (misal setelah canvas di-rebuild)"""
+        prefix = str(prefix)
+        # Path itu sendiri atau turunannya; ".!canvas" tidak ikut menghapus ".!canvas2"
+        below = prefix.rstrip(".") + "."
+        for key in [k for k in self._shown
+                    if (path := k[0] if isinstance(k, tuple) else k) == prefix or path.startswith(below)]:
+            del self._shown[key]
+
+    def end_tick(self):
+        """Tutup satu tick GUI: simpan hitungan lalu reset. Returns: jumlah panggilan Tk"""
+        self.last_calls, self.last_skipped = self.calls, self.skipped
+        self.calls = self.skipped = 0
+        return self.last_calls
+
+
+_MISSING = object()
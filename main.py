@@ -1,7 +1,61 @@
-from gui import FirmataControllerApp
+import argparse
+import os
+
+# GUI (tkinter/matplotlib) hanya di-import kalau tidak --headless
 
 def main():
-    app = FirmataControllerApp()
+    parser = argparse.ArgumentParser(description="Smart Amp IoT Protection System")
+    parser.add_argument("--replay", metavar="FILE", help="Replay a DataLog_*.csv / .smr file instead of MQTT")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (0 = as fast as possible)")
+    parser.add_argument("--headless", action="store_true", help="Run ingest, protection and recording without the GUI")
+    parser.add_argument("--config", metavar="FILE", help="JSON config for --headless (see core/service.py DEFAULT_CONFIG)")
+    parser.add_argument("--duration", type=float, default=None, help="Exit after N seconds")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", metavar="FILE", help="Dump Prometheus metrics to FILE every 10 s")
+    parser.add_argument("--profile", action="store_true", help="Show per-stage update_loop timing (toggle with F12)")
+    parser.add_argument("--profile-capture", type=int, metavar="TICKS", default=0,
+                        help="Write a cProfile + trace-event dump covering TICKS update_loop ticks")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the last session snapshot (setpoints, latch, charts)")
+    parser.add_argument("--ingest-process", action="store_true",
+                        help="Run MQTT ingest + protection in a separate process (attach if one is already running)")
+    args = parser.parse_args()
+    if args.ingest_process and (args.replay or args.headless):
+        parser.error("--ingest-process cannot be combined with --replay or --headless")
+
+    iot = None
+    if args.replay:
+        from core.replay import ReplayClient
+        iot = ReplayClient(args.replay, speed=args.speed)
+
+    if args.headless:
+        from core.service import HeadlessService, load_config
+        config = load_config(args.config, metrics_port=args.metrics_port, metrics_file=args.metrics_file)
+        service = HeadlessService(config, iot=iot)
+        service.start().run(duration=args.duration)
+        return
+
+    if args.ingest_process:
+        # Proses ingest hidup terus setelah GUI ditutup: GUI berikutnya attach lagi
+        from core.ingest_process import RemoteIoTClient
+        from gui.gui_app import CALIBRATION_FILE, RULES_FILE
+        spawn_args = ["--rules", os.path.abspath(RULES_FILE), "--calibration", os.path.abspath(CALIBRATION_FILE)]
+        spawn_args += ["--config", os.path.abspath(args.config)] if args.config else ["--no-record"]
+        iot = RemoteIoTClient.connect_or_spawn(spawn_args)
+
+    from gui import FirmataControllerApp
+    app = FirmataControllerApp(iot=iot, profile=args.profile, restore=not args.fresh)
+    if args.profile_capture:
+        app.after(1000, lambda: app.capture_profile(args.profile_capture))
+    if args.metrics_port or args.metrics_file:
+        from core.metrics import REGISTRY
+        if args.metrics_port:
+            REGISTRY.serve(args.metrics_port)
+        if args.metrics_file:
+            REGISTRY.start_dumper(args.metrics_file)
+    if iot is not None:
+        app.after(500, app.toggle_connection)
+    if args.duration is not None:
+        app.after(int(args.duration * 1000), app.on_close)
     app.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""
+Load Generator - Synthetic ESP32 Fleet
+Emulasi N device yang publish schema smartamp/<id>/data pada M Hz ke broker lokal
+(misal mosquitto di localhost), dengan jitter dan fault injection.
+
+Contoh:
+  python -m tools.loadgen --devices 50 --rate 20 --duration 60 --fault-rate 0.01
+"""
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+FAULTS = ("overtemp", "short", "malformed")
+
+
+class SimDevice:
+    """State satu ESP32 virtual (nilai sensor + fault yang sedang aktif)"""
+
+    def __init__(self, device_id, rng):
+        self.device_id = device_id
+        self.rng = rng
+        self.temp = rng.uniform(35.0, 45.0)
+        self.volt = 12.0
+        self.curr = rng.uniform(0.5, 1.5)
+        self.relay = True
+        self.fault = None
+        self.fault_until = 0.0
+
+    def payload(self, now):
+        # Random walk kecil supaya data tidak konstan
+        self.temp += self.rng.uniform(-0.1, 0.1)
+        self.curr = max(0.0, self.curr + self.rng.uniform(-0.02, 0.02))
+        if self.fault and now >= self.fault_until:
+            self.fault = None
+        if self.fault == "malformed":
+            return b'{"temp": 4'  # JSON terpotong
+        temp = 85.0 if self.fault == "overtemp" else self.temp
+        curr = 5.0 if self.fault == "short" else self.curr
+        return json.dumps({"temp": round(temp, 2), "volt": self.volt, "curr": round(curr, 3),
+                           "relay": self.relay, "ts": now}).encode()
+
+
+class LoadGenerator:
+    def __init__(self, broker="localhost", port=1883, devices=10, rate=10.0,
+                 jitter=0.1, fault_rate=0.0, fault_duration=2.0, faults=FAULTS,
+                 prefix="sim", seed=None, qos=0):
+        self.broker = broker
+        self.port = port
+        self.rate = rate
+        self.jitter = jitter              # Fraksi periode, misal 0.1 = +-10%
+        self.fault_rate = fault_rate      # Probabilitas fault per publish
+        self.fault_duration = fault_duration
+        self.faults = tuple(faults)
+        self.qos = qos
+        self.rng = random.Random(seed)
+        self.devices = [SimDevice(f"{prefix}{i:03d}", self.rng) for i in range(devices)]
+
+        self.published = 0
+        self.faults_injected = {kind: 0 for kind in self.faults}
+        self._stop = threading.Event()
+        self._thread = None
+        self.client = mqtt.Client(client_id=f"SmartAmpLoadGen-{self.rng.randint(0, 100000)}")
+
+    def start(self, duration=None):
+        self.client.connect(self.broker, self.port, 60)
+        self.client.loop_start()
+        self._thread = threading.Thread(target=self._run, args=(duration,), name="LoadGenerator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.client.loop_stop()
+        self.client.disconnect()
+
+    def wait(self):
+        self._thread.join()
+
+    def _next_delay(self):
+        period = 1.0 / self.rate
+        return period * (1.0 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _run(self, duration):
+        start = time.perf_counter()
+        # Heap (due_time, index): satu thread menjadwalkan semua device
+        heap = [(start + self.rng.uniform(0, 1.0 / self.rate), i) for i in range(len(self.devices))]
+        heapq.heapify(heap)
+        while heap and not self._stop.is_set():
+            due, i = heapq.heappop(heap)
+            if duration is not None and due - start >= duration:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            dev = self.devices[i]
+            now = time.time()
+            if dev.fault is None and self.fault_rate and self.rng.random() < self.fault_rate:
+                dev.fault = self.rng.choice(self.faults)
+                dev.fault_until = now + self.fault_duration
+                self.faults_injected[dev.fault] += 1
+            self.client.publish(f"smartamp/{dev.device_id}/data", dev.payload(now), qos=self.qos)
+            self.published += 1
+            heapq.heappush(heap, (due + self._next_delay(), i))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic SmartAmp ESP32 fleet publisher")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--devices", type=int, default=10, help="Number of emulated ESP32 devices")
+    parser.add_argument("--rate", type=float, default=10.0, help="Publish rate per device (Hz)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Period jitter as a fraction (0.1 = +-10%%)")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run (default: forever)")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Fault probability per publish")
+    parser.add_argument("--fault-duration", type=float, default=2.0, help="Seconds a fault stays active")
+    parser.add_argument("--faults", default=",".join(FAULTS), help="Comma separated: " + ",".join(FAULTS))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    faults = args.faults.split(",")
+    unknown = set(faults) - set(FAULTS)
+    if unknown:
+        parser.error(f"unknown fault kind(s): {', '.join(sorted(unknown))}")
+
+    gen = LoadGenerator(args.broker, args.port, args.devices, args.rate, args.jitter,
+                        args.fault_rate, args.fault_duration, faults, seed=args.seed)
+    print(f"Publishing {args.devices} devices x {args.rate} Hz to {args.broker}:{args.port} ...")
+    gen.start(args.duration)
+    try:
+        gen.wait()
+    except KeyboardInterrupt:
+        pass
+    gen.stop()
+    print(f"Published: {gen.published} | Faults: {gen.faults_injected}")
+
+
+if __name__ == "__main__":
+    main()
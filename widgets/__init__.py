@@ -1 +1,2 @@
-from .animated_led import AnimatedLED
\ No newline at end of file
+from .animated_led import AnimatedLED
+from .animation_clock import AnimationClock
\ No newline at end of file
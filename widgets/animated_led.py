@@ -5,6 +5,48 @@ Custom Canvas widget dengan animasi LED realistis
 
 import tkinter as tk
 import math
+from functools import lru_cache
+
+from .animation_clock import AnimationClock
+
+PULSE_STEPS = 30  # Frame per siklus pulse (30 x 50 ms = 1.5 s)
+
+
+@lru_cache(maxsize=None)
+def adjust_brightness(hex_color, factor):
+    """
+    Adjust brightness of hex color (hasil di-cache per warna & faktor)
+    
+    Args:
+        hex_color: Color in hex format (#RRGGBB)
+        factor: Brightness factor (>1 brighter, <1 darker)
+    
+    Returns:
+        Adjusted hex color
+    """
+    hex_color = hex_color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    
+    r = min(255, int(r * factor))
+    g = min(255, int(g * factor))
+    b = min(255, int(b * factor))
+    
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+@lru_cache(maxsize=None)
+def led_palette(color):
+    """
+    Semua varian warna untuk satu warna LED, dihitung sekali
+    
+    Returns:
+        (glow_middle, highlight, center_dot, pulse) - pulse adalah tuple warna
+        glow_outer untuk setiap frame siklus pulse
+    """
+    pulse = tuple(adjust_brightness(color, 0.3 * (1 + 0.1 * math.sin(step * 2 * math.pi / PULSE_STEPS)))
+                  for step in range(PULSE_STEPS))
+    return (adjust_brightness(color, 0.5), adjust_brightness(color, 1.5),
+            adjust_brightness(color, 1.8), pulse)
 
 
 class AnimatedLED(tk.Canvas):
@@ -23,7 +65,10 @@ class AnimatedLED(tk.Canvas):
         self.size = size
         self.state = False
         self.animation_step = 0
+        self._pulse_colors = ()
+        self._clock = AnimationClock.for_widget(self)
         self._draw_led()
+        self.bind("<Destroy>", lambda e: self._clock.unregister(self) if e.widget is self else None)
     
     def _draw_led(self):
         """Draw all LED layers"""
@@ -75,50 +120,29 @@ class AnimatedLED(tk.Canvas):
     
     def animate_on(self, color):
         """Animate LED turning ON"""
-        self.itemconfig(self.glow_outer, fill=self._adjust_brightness(color, 0.3))
-        self.itemconfig(self.glow_middle, fill=self._adjust_brightness(color, 0.5))
+        glow_middle, highlight, center_dot, pulse = led_palette(color)
+        self._pulse_colors = pulse
+        self.itemconfig(self.glow_outer, fill=pulse[self.animation_step])
+        self.itemconfig(self.glow_middle, fill=glow_middle)
         self.itemconfig(self.led_body, fill=color, outline=color)
-        self.itemconfig(self.highlight, fill=self._adjust_brightness(color, 1.5))
-        self.itemconfig(self.center_dot, fill=self._adjust_brightness(color, 1.8))
-        self._pulse()
+        self.itemconfig(self.highlight, fill=highlight)
+        self.itemconfig(self.center_dot, fill=center_dot)
+        self._clock.register(self)
     
     def animate_off(self):
         """Animate LED turning OFF"""
+        self._clock.unregister(self)
         self.itemconfig(self.glow_outer, fill="#1a1a2e")
         self.itemconfig(self.glow_middle, fill="#16213e")
         self.itemconfig(self.led_body, fill="#2d3748", outline="#4a5568")
         self.itemconfig(self.highlight, fill="#374151")
         self.itemconfig(self.center_dot, fill="#1f2937")
     
-    def _pulse(self):
-        """Create pulsing glow effect"""
-        if not self.state:
-            return
-        
-        scale = 1 + 0.1 * math.sin(self.animation_step * 0.3)
-        self.animation_step += 1
-        
-        if self.animation_step % 30 == 0:
-            self.animation_step = 0
-        
-        self.after(50, self._pulse)
+    def tick(self, step):
+        """Frame pulse, dipanggil AnimationClock hanya saat LED terlihat"""
+        self.animation_step = step % PULSE_STEPS
+        self.itemconfig(self.glow_outer, fill=self._pulse_colors[self.animation_step])
     
     def _adjust_brightness(self, hex_color, factor):
-        """
-        Adjust brightness of hex color
-        
-        Args:
-            hex_color: Color in hex format (#RRGGBB)
-            factor: Brightness factor (>1 brighter, <1 darker)
-        
-        Returns:
-            Adjusted hex color
-        """
-        hex_color = hex_color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        
-        r = min(255, int(r * factor))
-        g = min(255, int(g * factor))
-        b = min(255, int(b * factor))
-        
-        return f'#{r:02x}{g:02x}{b:02x}'
+        """Alias lama untuk adjust_brightness"""
+        return adjust_brightness(hex_color, factor)
@@ -0,0 +1,84 @@
+"""
+Animation Clock
+Satu timer after() untuk semua widget animasi dalam satu aplikasi.
+Timer berhenti kalau tidak ada widget terdaftar yang terlihat, dan jalan lagi
+saat ada window yang di-map (tab dipilih, window di-restore).
+"""
+
+import tkinter as tk
+
+
+class AnimationClock:
+    """Ticker bersama: satu callback per frame menggerakkan semua widget terdaftar"""
+
+    def __init__(self, root, interval=50):
+        """
+        Initialize clock
+
+        Args:
+            root: Tk root (pemilik timer)
+            interval: Jeda antar frame dalam ms
+        """
+        self.root = root
+        self.interval = interval
+        self.step = 0
+        self._subscribers = []
+        self._after_id = None
+        self._toplevels = set()  # Toplevel yang <Map>-nya sudah di-bind ke _resume
+
+    @classmethod
+    def for_widget(cls, widget):
+        """Clock milik root dari widget (dibuat saat pertama dipakai)"""
+        root = widget._root()
+        clock = getattr(root, "_animation_clock", None)
+        if clock is None:
+            clock = cls(root)
+            root._animation_clock = clock
+        return clock
+
+    def register(self, widget):
+        """
+        Daftarkan widget yang punya method tick(step)
+
+        Args:
+            widget: Widget animasi
+        """
+        if widget not in self._subscribers:
+            self._subscribers.append(widget)
+        # <Map> widget mana pun di toplevel ini (bindtags) membangunkan clock yang tidur
+        top = widget.winfo_toplevel()
+        if str(top) not in self._toplevels:
+            self._toplevels.add(str(top))
+            top.bind("<Map>", self._resume, add="+")
+        self._resume()
+
+    def unregister(self, widget):
+        if widget in self._subscribers:
+            self._subscribers.remove(widget)
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def _resume(self, event=None):
+        if self._after_id is None and self._subscribers:
+            self._after_id = self.root.after(self.interval, self._tick)
+
+    def _tick(self):
+        self.step += 1
+        visible = False
+        for widget in list(self._subscribers):
+            try:
+                # Widget yang tidak terlihat (tab lain, di-minimize) tidak digambar
+                if widget.winfo_viewable():
+                    widget.tick(self.step)
+                    visible = True
+            except tk.TclError:
+                # Widget sudah di-destroy
+                self._subscribers.remove(widget)
+
+        # Berhenti sendiri kalau tidak ada yang perlu dianimasikan / terlihat; <Map> -> _resume
+        if visible:
+            self._after_id = self.root.after(self.interval, self._tick)
+        else:
+            self._after_id = None